@@ -0,0 +1,118 @@
+from cgroups import recortar
+from snapshot import np
+
+# --------------------------------------------------
+# Agregación por grupo sobre una ProcessSnapshot
+# --------------------------------------------------
+
+def agregar_por(snapshot, grupo, columnas):
+    """
+    Suma varias columnas de la foto agrupando por una columna de ids
+    (por ejemplo 'usuario'), y cuenta los procesos de cada grupo.
+
+    Devuelve (cuenta, {columna: totales}), ambos indexados por id.
+    Con numpy es un np.bincount por columna sobre los ids internados; sin
+    numpy es una sola pasada que acumula todas las columnas a la vez.
+    Las columnas que la foto no tiene se omiten del resultado.
+    """
+    columnas = [c for c in columnas if snapshot.tiene(c)]
+    n = snapshot.total_ids(grupo)
+
+    if np is not None:
+        cuenta = snapshot.contar_por(grupo, n)
+        totales = {c: snapshot.sumar_por(grupo, c, n) for c in columnas}
+        return cuenta, totales
+
+    cuenta = [0] * n
+    acumulados = [[0.0] * n for _ in columnas]
+    valores = [snapshot.lista(c) for c in columnas]
+    for i, g in enumerate(snapshot.lista(grupo)):
+        cuenta[g] += 1
+        for acc, vals in zip(acumulados, valores):
+            acc[g] += vals[i]
+    return cuenta, dict(zip(columnas, acumulados))
+
+
+def resumen_usuarios(snapshot, num_cpus):
+    """
+    Una fila por usuario con procesos en la foto:
+    (usuario, procesos, cpu %, rss en bytes, disco B/s, red B/s)
+
+    El CPU se normaliza por num_cpus (y se limita a 100) para que quede
+    en la escala 0-100 del Task Manager. Disco y red son None cuando la
+    foto no trae esas columnas.
+    """
+    cuenta, totales = agregar_por(
+        snapshot, "usuario",
+        ("cpu", "rss", "io_lectura", "io_escritura", "red_rx", "red_tx"),
+    )
+    cpu = totales["cpu"]
+    rss = totales["rss"]
+    lectura = totales.get("io_lectura")
+    escritura = totales.get("io_escritura")
+    rx = totales.get("red_rx")
+    tx = totales.get("red_tx")
+
+    filas = []
+    for uid, usuario in enumerate(snapshot.usuarios[:len(cuenta)]):
+        procesos = int(cuenta[uid])
+        if not procesos:
+            continue  # usuario visto antes, sin procesos en esta foto
+        cpu_pct = min(float(cpu[uid]) / num_cpus, 100.0)
+        disco = float(lectura[uid] + escritura[uid]) if lectura is not None else None
+        red = float(rx[uid] + tx[uid]) if rx is not None else None
+        filas.append((usuario, procesos, cpu_pct, int(rss[uid]), disco, red))
+    return filas
+
+
+def resumen_cgroups(snapshot, num_cpus, niveles=None, cgroupfs=None):
+    """
+    Una fila por cgroup (o por su ancestro de 'niveles' componentes):
+    (cgroup, procesos, cpu %, memoria en bytes, disco B/s, red B/s,
+     cpu % de cgroupfs, memoria de cgroupfs)
+
+    CPU, memoria, disco y red son sumas de los procesos de la foto.
+    cgroupfs es {grupo: (cpu %, memoria)} ya leído (ver
+    cgroups.leer_grupos); lo que no está ahí queda en None. La CPU se
+    normaliza por num_cpus como en resumen_usuarios. Lista vacía si la
+    foto no trae la columna 'cgroup'.
+    """
+    if not snapshot.tiene("cgroup"):
+        return []
+    cuenta, totales = agregar_por(
+        snapshot, "cgroup",
+        ("cpu", "rss", "io_lectura", "io_escritura", "red_rx", "red_tx"),
+    )
+    cpu = totales["cpu"]
+    rss = totales["rss"]
+    disco = [a + b for a, b in zip(totales["io_lectura"], totales["io_escritura"])]
+    red = None
+    if "red_rx" in totales:
+        red = [a + b for a, b in zip(totales["red_rx"], totales["red_tx"])]
+
+    # [procesos, cpu, rss, disco, red] por grupo
+    grupos = {}
+    for cid, ruta in enumerate(snapshot.cgroups[:len(cuenta)]):
+        procesos = int(cuenta[cid])
+        if not procesos:
+            continue
+        grupo = recortar(ruta, niveles) or "(desconocido)"
+        acc = grupos.get(grupo)
+        if acc is None:
+            acc = grupos[grupo] = [0, 0.0, 0, 0.0, 0.0]
+        acc[0] += procesos
+        acc[1] += float(cpu[cid])
+        acc[2] += int(rss[cid])
+        acc[3] += float(disco[cid])
+        if red is not None:
+            acc[4] += float(red[cid])
+
+    cgroupfs = cgroupfs or {}
+    filas = []
+    for grupo, (procesos, cpu_grupo, memoria, disco_grupo, red_grupo) in grupos.items():
+        cpu_cg, memoria_cg = cgroupfs.get(grupo, (None, None))
+        if cpu_cg is not None:
+            cpu_cg = min(cpu_cg / num_cpus, 100.0)
+        filas.append((grupo, procesos, min(cpu_grupo / num_cpus, 100.0), memoria,
+                      disco_grupo, None if red is None else red_grupo, cpu_cg, memoria_cg))
+    return filas
@@ -0,0 +1,189 @@
+from snapshot import np
+
+# --------------------------------------------------
+# Índice padre -> hijos entre fotos
+# --------------------------------------------------
+
+class IndiceArbol:
+    """
+    Relación padre/hijo de los procesos (columna ppid de la foto),
+    mantenida entre fotos.
+
+    actualizar() compara los pares (pid, ppid) de la foto nueva con los que
+    ya conoce y solo toca los procesos que nacieron, terminaron o cambiaron
+    de padre (los huérfanos se re-cuelgan de init o de un subreaper). Los
+    hijos se guardan por PID del padre aunque ese padre no esté en la foto;
+    esos procesos, los de ppid 0 y los que son su propio padre (PID 0 en
+    Windows) son las raíces.
+    """
+
+    def __init__(self):
+        self.padre = {}   # pid -> ppid
+        self.hijos = {}   # ppid -> set de PIDs hijos (solo padres con hijos)
+        self.propios = set()  # PIDs con ppid == pid (no figuran en hijos)
+        self.cambios = 0  # PIDs tocados en la última actualización
+        self._foto = None
+
+    def __len__(self):
+        return len(self.padre)
+
+    def actualizar(self, snapshot):
+        if snapshot is self._foto:
+            self.cambios = 0
+            return  # refresco sin foto nueva (pausa, búsqueda)
+        self._foto = snapshot
+        actual = dict(zip(snapshot.lista("pid"), snapshot.lista("ppid")))
+        padre = self.padre
+        muertos = padre.keys() - actual.keys()
+        nuevos_o_movidos = actual.items() - padre.items()
+
+        for pid in muertos:
+            self._soltar(pid, padre.pop(pid))
+        for pid, ppid in nuevos_o_movidos:
+            anterior = padre.get(pid)
+            if anterior is not None:
+                self._soltar(pid, anterior)
+            padre[pid] = ppid
+            if ppid == pid:
+                self.propios.add(pid)
+            else:
+                self.hijos.setdefault(ppid, set()).add(pid)
+        self.cambios = len(muertos) + len(nuevos_o_movidos)
+
+    def _soltar(self, pid, ppid):
+        if ppid == pid:
+            self.propios.discard(pid)
+            return
+        hermanos = self.hijos.get(ppid)
+        if hermanos is not None:
+            hermanos.discard(pid)
+            if not hermanos:
+                del self.hijos[ppid]
+
+    def raices(self):
+        """
+        PIDs cuyo padre no está en la foto (o es 0), y los que son su propio
+        padre.
+        """
+        padre = self.padre
+        raices = [pid for ppid, hijos in self.hijos.items() if ppid not in padre for pid in hijos]
+        raices.extend(self.propios)
+        return raices
+
+    def ancestros(self, pid):
+        """
+        PIDs del padre hacia arriba hasta la raíz.
+        """
+        vistos = {pid}
+        ppid = self.padre.get(pid)
+        while ppid in self.padre and ppid not in vistos:
+            yield ppid
+            vistos.add(ppid)
+            ppid = self.padre[ppid]
+
+    def descendientes(self, pid):
+        """
+        Todos los PIDs debajo de pid (sin incluirlo), padres antes que hijos.
+        """
+        resultado = []
+        vistos = {pid}
+        pendientes = [pid]
+        while pendientes:
+            for hijo in self.hijos.get(pendientes.pop(), ()):
+                if hijo not in vistos:
+                    vistos.add(hijo)
+                    resultado.append(hijo)
+                    pendientes.append(hijo)
+        return resultado
+
+    def sumas(self, snapshot, columnas):
+        """
+        Suma de cada columna sobre el subárbol de cada proceso (él incluido),
+        alineada con las posiciones de la foto: sumas[k][i] es el total de
+        columnas[k] para el proceso i.
+
+        Con numpy cada proceso suma su valor a todos sus ancestros subiendo
+        un nivel por paso (tantos pasos como profundidad tenga el árbol, cada
+        uno vectorizado). Sin numpy, o si el árbol es más profundo que
+        MAX_NIVELES, un recorrido en post-orden.
+        """
+        if np is not None:
+            totales = _sumas_np(snapshot, columnas)
+            if totales is not None:
+                return totales
+
+        pids = snapshot.lista("pid")
+        propios = dict(zip(pids, zip(*(snapshot.lista(c) for c in columnas))))
+        hijos = self.hijos
+        totales = {}
+
+        def recorrer(raices):
+            pila = [(pid, False) for pid in raices]
+            while pila:
+                pid, listo = pila.pop()
+                if listo:
+                    total = list(propios[pid])
+                    for hijo in hijos.get(pid, ()):
+                        parcial = totales.get(hijo)
+                        if parcial is not None:
+                            for k, v in enumerate(parcial):
+                                total[k] += v
+                    totales[pid] = total
+                elif pid not in totales and pid in propios:
+                    totales[pid] = None  # en curso (corta ciclos por PID reutilizado)
+                    pila.append((pid, True))
+                    pila.extend((hijo, False) for hijo in hijos.get(pid, ()))
+
+        recorrer(self.raices())
+        if len(totales) < len(propios):
+            recorrer([pid for pid in propios if pid not in totales])  # ciclos
+        return [[totales[pid][k] for pid in pids] for k in range(len(columnas))]
+
+
+MAX_NIVELES = 64  # pasos vectorizados antes de pasar al recorrido (un ciclo no termina)
+
+
+def _sumas_np(snapshot, columnas):
+    pids = snapshot.columna("pid")
+    ppids = snapshot.columna("ppid")
+    n = len(pids)
+    if not n:
+        return [np.zeros(0) for _ in columnas]
+
+    # posición del padre de cada fila (-1 si no está en la foto)
+    orden = np.argsort(pids, kind="stable")
+    k = np.minimum(np.searchsorted(pids[orden], ppids), n - 1)
+    padre = np.where((pids[orden][k] == ppids) & (ppids != pids), orden[k], -1)
+
+    propios = [snapshot.columna(c).astype(np.float64) for c in columnas]
+    totales = [v.copy() for v in propios]
+    ancestro = padre
+    for _ in range(MAX_NIVELES):
+        vivos = ancestro >= 0
+        if not vivos.any():
+            return totales
+        destino = ancestro[vivos]
+        for total, valores in zip(totales, propios):
+            total += np.bincount(destino, weights=valores[vivos], minlength=n)
+        ancestro = np.where(vivos, padre[np.maximum(ancestro, 0)], -1)
+    return None
+
+# --------------------------------------------------
+# Filtros sobre el árbol
+# --------------------------------------------------
+
+def visibles_con_ancestros(indice, pids):
+    """
+    Los PIDs que pasan un filtro más sus ancestros, para que el árbol
+    muestre dónde cuelga cada uno.
+    """
+    visibles = set()
+    for pid in pids:
+        if pid in visibles:
+            continue
+        visibles.add(pid)
+        for ancestro in indice.ancestros(pid):
+            if ancestro in visibles:
+                break
+            visibles.add(ancestro)
+    return visibles
@@ -0,0 +1,717 @@
+"""
+Mediciones de rendimiento reproducibles del administrador de tareas.
+
+Uso:
+    python benchmark.py tabla [--ticks 10]
+    python benchmark.py orden [--ticks 10]
+    python benchmark.py memoria [--procesos 10000]
+    python benchmark.py backends [--ticks 3]
+    python benchmark.py grabador [--procesos 10000] [--marcos 300]
+    python benchmark.py filtro [--procesos 10000] [--ticks 20]
+    python benchmark.py arbol [--procesos 10000] [--ticks 20]
+    python benchmark.py vistas [--procesos 1000,5000,10000,50000] [--churn 0.01,0.05]
+                               [--ticks 20] [--tk] [--json salida.json] [--comparar base.json]
+"""
+import argparse, json, os, platform, random, shutil, sys, tempfile, time, tracemalloc
+from collections import namedtuple
+
+import psutil
+
+from arbol import IndiceArbol
+from busqueda import compilar_filtro, filtrar
+from colector import BackendPsutil, obtener_procesos_snapshot
+from contabilidad import TasasIO
+from grabador import Grabador, Reproductor
+from procfs import BackendProcfs
+from snapshot import ConstructorSnapshot, np
+from tabla import Tabla, TablaArbol
+from vistas import (
+    COLUMNAS_ARBOL, COLUMNAS_DETALLES, COLUMNAS_PROCESOS, COLUMNAS_USUARIOS,
+    NUMERICAS_ARBOL, NUMERICAS_DETALLES, NUMERICAS_PROCESOS, NUMERICAS_USUARIOS, TopN,
+    filas_detalles, filas_procesos, filas_usuarios, nodos_arbol,
+)
+
+# --------------------------------------------------
+# Treeview simulado (cuenta llamadas a Tk)
+# --------------------------------------------------
+
+class TreeviewContador:
+    """
+    Imitación mínima de ttk.Treeview que guarda las filas en memoria
+    y cuenta cuántas llamadas a Tk se habrían hecho. No respeta la
+    posición de insert/move: solo importa el conteo.
+    """
+
+    def __init__(self):
+        self.filas = {}  # iid -> valores, en orden de inserción
+        self.llamadas = 0
+        self._siguiente = 0
+
+    def insert(self, parent, index, values=(), **kw):
+        self.llamadas += 1
+        self._siguiente += 1
+        iid = f"I{self._siguiente:06X}"
+        self.filas[iid] = tuple(values)
+        return iid
+
+    def item(self, iid, **kw):
+        self.llamadas += 1
+        if "values" in kw:
+            self.filas[iid] = tuple(kw["values"])
+        return {"values": list(self.filas[iid])}
+
+    def delete(self, *iids):
+        self.llamadas += 1
+        for iid in iids:
+            del self.filas[iid]
+
+    def move(self, iid, parent, index):
+        self.llamadas += 1
+
+    def detach(self, *iids):
+        self.llamadas += 1
+
+    def get_children(self, item=""):
+        self.llamadas += 1
+        return tuple(self.filas)
+
+    def selection(self):
+        return ()
+
+    def selection_add(self, *iids):
+        self.llamadas += 1
+
+    def bind(self, *args, **kw):
+        pass
+
+    def unbind(self, *args):
+        pass
+
+    def configure(self, **kw):
+        pass
+
+    def heading(self, col, **kw):
+        self.llamadas += 1
+
+    def set(self, iid, col):
+        # lectura de una celda como texto, igual que hace Tk
+        self.llamadas += 1
+        return str(self.filas[iid][COLUMNAS.index(col)])
+
+# --------------------------------------------------
+# Datos sintéticos
+# --------------------------------------------------
+
+COLUMNAS = ("PID", "Nombre", "CPU %", "RAM %")
+
+def filas_sinteticas(n, semilla=1):
+    rnd = random.Random(semilla)
+    return {pid: (pid, f"proc{pid % 97}", round(rnd.random() * 5, 1), round(rnd.random(), 2))
+            for pid in range(1, n + 1)}
+
+def aplicar_churn(filas, rnd, siguiente_pid, cambios=0.2, churn=0.02):
+    """
+    Simula un tick: una fracción de procesos cambia de CPU/RAM,
+    otra termina y aparecen procesos nuevos.
+    """
+    pids = list(filas)
+    for pid in rnd.sample(pids, int(len(pids) * churn)):
+        del filas[pid]
+    for _ in range(int(len(pids) * churn)):
+        filas[siguiente_pid] = (siguiente_pid, "nuevo", 0.0, 0.0)
+        siguiente_pid += 1
+    for pid in rnd.sample(list(filas), int(len(filas) * cambios)):
+        p = filas[pid]
+        filas[pid] = (p[0], p[1], round(rnd.random() * 5, 1), p[3])
+    return siguiente_pid
+
+# --------------------------------------------------
+# Benchmarks
+# --------------------------------------------------
+
+def refresco_completo(tree, filas):
+    # estrategia anterior: borrar fila por fila y volver a insertar todo
+    for row in tree.get_children():
+        tree.delete(row)
+    for vals in filas.values():
+        tree.insert("", "end", values=vals)
+
+def bench_tabla(args):
+    print(f"{'procesos':>9} {'estrategia':>12} {'llamadas/tick':>14} {'ms/tick':>9}")
+    for n in (500, 2000, 10000):
+        for nombre in ("completo", "diferencial", "virtual"):
+            rnd = random.Random(7)
+            filas = filas_sinteticas(n)
+            siguiente = n + 1
+            tree = TreeviewContador()
+            tabla = Tabla(tree, COLUMNAS, virtual=(nombre == "virtual"))
+
+            def refrescar():
+                if nombre == "completo":
+                    refresco_completo(tree, filas)
+                else:
+                    tabla.actualizar(filas.items())
+
+            refrescar()  # carga inicial, no se mide
+            llamadas = 0
+            tiempo = 0.0
+            for _ in range(args.ticks):
+                siguiente = aplicar_churn(filas, rnd, siguiente)
+                tree.llamadas = 0
+                inicio = time.perf_counter()
+                refrescar()
+                tiempo += time.perf_counter() - inicio
+                llamadas += tree.llamadas
+            print(f"{n:>9} {nombre:>12} {llamadas // args.ticks:>14} "
+                  f"{tiempo / args.ticks * 1000:>9.2f}")
+
+def _to_number(val):
+    try:
+        return float(str(val).replace("%", "").replace(",", ".").strip())
+    except Exception:
+        return 0.0
+
+def orden_desde_widget(tree, col):
+    # estrategia anterior (sort_treeview): leer cada celda, parsear y mover
+    data = [(tree.set(k, col), k) for k in tree.get_children("")]
+    data.sort(key=lambda t: _to_number(t[0]), reverse=True)
+    for index, (_, k) in enumerate(data):
+        tree.move(k, "", index)
+
+def bench_orden(args):
+    print(f"{'procesos':>9} {'cambios':>8} {'estrategia':>12} {'llamadas/tick':>14} {'ms/tick':>9}")
+    for n in (2000, 10000):
+        for cambios in (0.01, 0.2):
+            for nombre in ("widget", "modelo"):
+                rnd = random.Random(7)
+                filas = filas_sinteticas(n)
+                siguiente = n + 1
+                tree = TreeviewContador()
+                tabla = Tabla(tree, COLUMNAS, numericas=("PID", "CPU %", "RAM %"))
+                tabla.actualizar(filas.items())
+                if nombre == "modelo":
+                    tabla.ordenar_por("CPU %", desc=True)
+
+                llamadas = 0
+                tiempo = 0.0
+                for _ in range(args.ticks):
+                    siguiente = aplicar_churn(filas, rnd, siguiente,
+                                              cambios=cambios, churn=cambios / 10)
+                    tree.llamadas = 0
+                    inicio = time.perf_counter()
+                    tabla.actualizar(filas.items())
+                    if nombre == "widget":
+                        # antes el orden se perdía en cada refresco y había que repetirlo
+                        orden_desde_widget(tree, "CPU %")
+                    tiempo += time.perf_counter() - inicio
+                    llamadas += tree.llamadas
+                print(f"{n:>9} {cambios:>8.0%} {nombre:>12} {llamadas // args.ticks:>14} "
+                      f"{tiempo / args.ticks * 1000:>9.2f}")
+
+# misma forma que psutil.Process.memory_info() en Linux
+pmem = namedtuple("pmem", "rss vms shared text lib data dirty")
+
+ESTADOS = ("running", "sleeping", "idle", "disk-sleep", "zombie")
+
+def info_sintetica(rnd, pid):
+    return {
+        "pid": pid,
+        # un quinto cuelga de init; el resto de algún proceso reciente
+        "ppid": 1 if pid < 200 or rnd.random() < 0.2 else rnd.randrange(max(pid - 300, 2), pid),
+        "name": f"proceso-{pid % 300}",
+        "cpu_percent": round(rnd.random() * 10, 1),
+        "memory_percent": rnd.random(),
+        "status": rnd.choice(ESTADOS),
+        "username": f"usuario{pid % 20}",
+        "memory_info": pmem(*(rnd.randrange(1 << 20, 1 << 30) for _ in range(7))),
+    }
+
+def medir_memoria(construir):
+    tracemalloc.start()
+    objeto = construir()
+    usada, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objeto, usada
+
+def bench_memoria(args):
+    n = args.procesos
+    # se generan antes las filas para que solo se mida la estructura final
+    infos = [info_sintetica(random.Random(pid), pid) for pid in range(1, n + 1)]
+
+    def lista_de_dicts():
+        # copia con valores nuevos, como hace process_iter en cada tick
+        return [{k: (v._replace() if k == "memory_info" else v) for k, v in info.items()}
+                for info in infos]
+
+    def columnar():
+        constructor = ConstructorSnapshot()
+        for info in infos:
+            constructor.agregar(info["pid"], info["name"], info["username"], info["status"],
+                                info["cpu_percent"], info["memory_percent"],
+                                info["memory_info"].rss)
+        return constructor.terminar()
+
+    _, antes = medir_memoria(lista_de_dicts)
+    snap, despues = medir_memoria(columnar)
+    print(f"procesos: {n}")
+    print(f"{'lista de dicts':>16}: {antes / 1024:10.1f} KiB")
+    print(f"{'ProcessSnapshot':>16}: {despues / 1024:10.1f} KiB "
+          f"(columnas {snap.bytes_usados() / 1024:.1f} KiB + tablas de cadenas)")
+
+# --------------------------------------------------
+# /proc falso
+# --------------------------------------------------
+
+def crear_proc_falso(raiz, n, semilla=1):
+    """
+    Crea en 'raiz' un árbol con la forma de /proc para n procesos:
+    stat, statm, status e io por PID, más /proc/stat y /proc/meminfo.
+    Alcanza tanto para BackendProcfs como para psutil (vía PROCFS_PATH).
+    """
+    rnd = random.Random(semilla)
+    uid = os.getuid()
+    with open(os.path.join(raiz, "stat"), "w") as f:
+        f.write("cpu  1000 0 1000 100000 0 0 0 0 0 0\n"
+                "cpu0 1000 0 1000 100000 0 0 0 0 0 0\n"
+                "btime 1700000000\n")
+    with open(os.path.join(raiz, "meminfo"), "w") as f:
+        f.write("MemTotal:       16384000 kB\nMemFree:         8192000 kB\n"
+                "MemAvailable:   12000000 kB\nBuffers:          100000 kB\n"
+                "Cached:          2000000 kB\nShmem:             50000 kB\n"
+                "Active:          4000000 kB\nInactive:        2000000 kB\n"
+                "SReclaimable:     100000 kB\n")
+    os.makedirs(os.path.join(raiz, "self"), exist_ok=True)
+    with open(os.path.join(raiz, "self", "stat"), "w") as f:
+        f.write("1 (init) S 0\n")
+
+    for pid in range(1, n + 1):
+        d = os.path.join(raiz, str(pid))
+        os.mkdir(d)
+        nombre = f"proceso-{pid % 300}"
+        estado = rnd.choice("RSSSSID")
+        rss = rnd.randrange(100, 100000)
+        utime, stime = rnd.randrange(10000), rnd.randrange(1000)
+        campos = [estado, "1", str(pid), str(pid), "0", "-1", "4194560", "0", "0", "0", "0",
+                  str(utime), str(stime), "0", "0", "20", "0", "1", "0",
+                  str(rnd.randrange(100000)), str(rss * 40960), str(rss)] + ["0"] * 30
+        with open(os.path.join(d, "stat"), "w") as f:
+            f.write(f"{pid} ({nombre}) {' '.join(campos)}\n")
+        with open(os.path.join(d, "statm"), "w") as f:
+            f.write(f"{rss * 10} {rss} 100 10 0 {rss} 0\n")
+        with open(os.path.join(d, "status"), "w") as f:
+            f.write(f"Name:\t{nombre}\nState:\t{estado}\nPPid:\t1\n"
+                    f"Uid:\t{uid}\t{uid}\t{uid}\t{uid}\n"
+                    f"Gid:\t{uid}\t{uid}\t{uid}\t{uid}\n"
+                    f"voluntary_ctxt_switches:\t1\nnonvoluntary_ctxt_switches:\t1\n")
+        with open(os.path.join(d, "io"), "w") as f:
+            f.write(f"rchar: 0\nwchar: 0\nsyscr: 0\nsyscw: 0\n"
+                    f"read_bytes: {rnd.randrange(1 << 30)}\nwrite_bytes: {rnd.randrange(1 << 30)}\n"
+                    f"cancelled_write_bytes: 0\n")
+
+def bench_backends(args):
+    print(f"{'procesos':>9} {'backend':>8} {'ms/foto':>9}")
+    for n in (1000, 5000, 20000):
+        raiz = tempfile.mkdtemp(prefix="proc-falso-")
+        procfs_original = psutil.PROCFS_PATH
+        try:
+            crear_proc_falso(raiz, n)
+            psutil.PROCFS_PATH = raiz
+            for backend in (BackendPsutil(), BackendProcfs(raiz)):
+                constructor, tasas_io = ConstructorSnapshot(), TasasIO()
+                obtener_procesos_snapshot(constructor, tasas_io, backend)  # calentar cachés
+                inicio = time.perf_counter()
+                for _ in range(args.ticks):
+                    snap = obtener_procesos_snapshot(constructor, tasas_io, backend)
+                tiempo = (time.perf_counter() - inicio) / args.ticks
+                assert len(snap) == n, (backend.nombre, len(snap))
+                print(f"{n:>9} {backend.nombre:>8} {tiempo * 1000:>9.1f}")
+        finally:
+            psutil.PROCFS_PATH = procfs_original
+            shutil.rmtree(raiz)
+
+# --------------------------------------------------
+# Fuente sintética de procesos (colector falso)
+# --------------------------------------------------
+
+class FuenteSintetica:
+    """
+    Colector falso y reproducible: cada llamada devuelve una ProcessSnapshot
+    de n procesos en la que una fracción 'cambios' varió su CPU/RSS y una
+    fracción 'churn' terminó y fue reemplazada por procesos nuevos.
+
+    Sirve como 'muestrear' de Colector (Colector(muestrear=FuenteSintetica(...)))
+    y para alimentar vistas y tablas en los benchmarks sin depender de lo que
+    esté corriendo en la máquina.
+    """
+
+    def __init__(self, n, cambios=0.2, churn=0.002, semilla=3):
+        self.n = n
+        self.cambios = cambios
+        self.churn = churn
+        self.rnd = random.Random(semilla)
+        self.procesos = {pid: info_sintetica(self.rnd, pid) for pid in range(1, n + 1)}
+        for info in self.procesos.values():
+            info["cpu_percent"] = 0.0  # la mayoría de los procesos está quieta
+        self.siguiente = n + 1
+        self.constructor = ConstructorSnapshot()
+
+    def __call__(self):
+        rnd, procesos = self.rnd, self.procesos
+        for pid in rnd.sample(list(procesos), int(self.n * self.churn)):
+            del procesos[pid]
+            procesos[self.siguiente] = info_sintetica(rnd, self.siguiente)
+            self.siguiente += 1
+        for pid in rnd.sample(list(procesos), int(self.n * self.cambios)):
+            info = procesos[pid]
+            info["cpu_percent"] = round(rnd.random() * 10, 1)
+            info["memory_info"] = info["memory_info"]._replace(rss=rnd.randrange(1 << 20, 1 << 30))
+        constructor = self.constructor
+        for info in procesos.values():
+            constructor.agregar(info["pid"], info["name"], info["username"], info["status"],
+                                info["cpu_percent"], info["memory_percent"],
+                                info["memory_info"].rss, ppid=info["ppid"])
+        return constructor.terminar()
+
+
+def fotos_sinteticas(n, marcos, cambios, churn=0.002, semilla=3):
+    """
+    Genera 'marcos' fotos seguidas de una FuenteSintetica.
+    """
+    fuente = FuenteSintetica(n, cambios, churn, semilla)
+    for _ in range(marcos):
+        yield fuente()
+
+# --------------------------------------------------
+# Grabación en disco
+# --------------------------------------------------
+
+def bench_grabador(args):
+    n, marcos = args.procesos, args.marcos
+    print(f"procesos: {n}, marcos: {marcos}")
+    print(f"{'cambios':>8} {'ms/marco':>9} {'B/marco':>9} {'GiB/24h a 1 Hz':>15} "
+          f"{'abrir ms':>9} {'saltar ms':>10} {'avanzar ms':>11}")
+    for cambios in (0.01, 0.05, 0.2):
+        directorio = tempfile.mkdtemp(prefix="grabacion-")
+        ruta = os.path.join(directorio, "bench.tmrec")
+        try:
+            fotos = list(fotos_sinteticas(n, marcos, cambios))
+            with Grabador(ruta, intervalo=1.0) as grabador:
+                inicio = time.perf_counter()
+                for foto in fotos:
+                    grabador.grabar(foto)
+                grabar = (time.perf_counter() - inicio) / marcos
+            tam = os.path.getsize(ruta)
+
+            inicio = time.perf_counter()
+            rep = Reproductor(ruta)
+            abrir = time.perf_counter() - inicio
+            rnd = random.Random(1)
+            inicio = time.perf_counter()
+            for _ in range(10):
+                rep.foto(rnd.randrange(len(rep)))
+            saltar = (time.perf_counter() - inicio) / 10
+            inicio = time.perf_counter()
+            for k in range(len(rep)):
+                foto = rep.foto(k)
+            avanzar = (time.perf_counter() - inicio) / len(rep)
+            assert len(foto) == len(fotos[-1])
+            rep.cerrar()
+
+            por_marco = tam / marcos
+            print(f"{cambios:>8.0%} {grabar * 1000:>9.1f} {por_marco:>9.0f} "
+                  f"{por_marco * 86400 / 2 ** 30:>15.2f} {abrir * 1000:>9.1f} "
+                  f"{saltar * 1000:>10.1f} {avanzar * 1000:>11.1f}")
+        finally:
+            shutil.rmtree(directorio)
+
+# --------------------------------------------------
+# Filtro de búsqueda
+# --------------------------------------------------
+
+CONSULTAS = (
+    ("Nombre", "proceso-1"),
+    ("PID", "12"),
+    ("Nombre", "user:usuario1 cpu>5"),
+    ("Nombre", "user:usuario1 cpu>5 rss>500M status:running"),
+    ("Nombre", "not user:usuario1 (cpu>=8 or rss>900M) -estado:zombie"),
+)
+
+def bench_filtro(args):
+    fotos = list(fotos_sinteticas(args.procesos, args.ticks, cambios=0.2))
+    print(f"procesos: {args.procesos}, numpy: {'sí' if np is not None else 'no'}")
+    print(f"{'consulta':>58} {'compilar ms':>12} {'ms/tick':>8} {'filas':>6}")
+    for modo, consulta in CONSULTAS:
+        compilar_filtro.cache_clear()
+        inicio = time.perf_counter()
+        compilar_filtro(modo, consulta)
+        compilar = time.perf_counter() - inicio
+
+        filtrar(fotos[0], modo, consulta)  # primera pasada por las tablas de cadenas
+        inicio = time.perf_counter()
+        for foto in fotos:
+            filas = filtrar(foto, modo, consulta)
+        tick = (time.perf_counter() - inicio) / len(fotos)
+        print(f"{modo + ': ' + consulta:>58} {compilar * 1000:>12.3f} {tick * 1000:>8.2f} "
+              f"{len(filas):>6}")
+
+
+def bench_arbol(args):
+    fotos = list(fotos_sinteticas(args.procesos, args.ticks + 1, cambios=0.2, churn=0.01))
+    print(f"procesos: {args.procesos}, numpy: {'sí' if np is not None else 'no'}")
+
+    inicio = time.perf_counter()
+    for foto in fotos[1:]:
+        IndiceArbol().actualizar(foto)
+    desde_cero = (time.perf_counter() - inicio) / args.ticks
+
+    indice = IndiceArbol()
+    indice.actualizar(fotos[0])
+    inicio = time.perf_counter()
+    cambios = 0
+    for foto in fotos[1:]:
+        indice.actualizar(foto)
+        cambios += indice.cambios
+    incremental = (time.perf_counter() - inicio) / args.ticks
+
+    inicio = time.perf_counter()
+    for foto in fotos[1:]:
+        indice.sumas(foto, ("cpu", "rss"))
+    sumas = (time.perf_counter() - inicio) / args.ticks
+
+    # render con init desplegado (lo que se ve al abrir la vista)
+    tree = TreeviewContador()
+    tabla = TablaArbol(tree, COLUMNAS_ARBOL, numericas=NUMERICAS_ARBOL)
+    tabla.abiertos.add(1)
+    indice = IndiceArbol()
+    indice.actualizar(fotos[0])
+    tabla.actualizar(*nodos_arbol(fotos[0], indice))
+    tree.llamadas = 0
+    inicio = time.perf_counter()
+    for foto in fotos[1:]:
+        indice.actualizar(foto)
+        tabla.actualizar(*nodos_arbol(foto, indice))
+    render = (time.perf_counter() - inicio) / args.ticks
+
+    print(f"índice desde cero:   {desde_cero * 1000:8.2f} ms/tick")
+    print(f"índice incremental:  {incremental * 1000:8.2f} ms/tick "
+          f"({cambios / args.ticks:.0f} PIDs tocados por tick)")
+    print(f"sumas por subárbol:  {sumas * 1000:8.2f} ms/tick")
+    print(f"tick completo:       {render * 1000:8.2f} ms/tick, {len(tabla.iids)} nodos a la vista, "
+          f"{tree.llamadas / args.ticks:.0f} llamadas a Tk por tick")
+
+
+# --------------------------------------------------
+# Suite de vistas (lo que hace cada tick de la interfaz)
+# --------------------------------------------------
+
+CONSULTA_SUITE = "cpu>1 and user:usuario1"
+
+
+def crear_tree(raiz_tk, columnas, arbol=False):
+    """
+    Treeview real si hay Tk (raiz_tk), si no el simulado que cuenta llamadas.
+    """
+    if raiz_tk is None:
+        return TreeviewContador()
+    from tkinter import ttk
+    return ttk.Treeview(raiz_tk, columns=columnas, show="tree headings" if arbol else "headings")
+
+
+def etapas_suite(raiz_tk, virtual):
+    """
+    Las etapas que mide la suite, armadas como en main.py: cada una recibe
+    la foto del tick. Devuelve [(nombre, función, tree)].
+    """
+    tabla_proc = Tabla(crear_tree(raiz_tk, COLUMNAS_PROCESOS), COLUMNAS_PROCESOS,
+                       numericas=NUMERICAS_PROCESOS, virtual=virtual)
+    tabla_orden = Tabla(crear_tree(raiz_tk, COLUMNAS_PROCESOS), COLUMNAS_PROCESOS,
+                        numericas=NUMERICAS_PROCESOS, virtual=virtual)
+    tabla_orden.ordenar_por("CPU %", desc=True)
+    tabla_top = Tabla(crear_tree(raiz_tk, COLUMNAS_PROCESOS), COLUMNAS_PROCESOS,
+                      numericas=NUMERICAS_PROCESOS, virtual=virtual)
+    tabla_top.ordenar_por("CPU %", desc=True)
+    top = TopN(50, "CPU %", desc=True)
+    tabla_filtro = Tabla(crear_tree(raiz_tk, COLUMNAS_PROCESOS), COLUMNAS_PROCESOS,
+                         numericas=NUMERICAS_PROCESOS, virtual=virtual)
+    tabla_user = Tabla(crear_tree(raiz_tk, COLUMNAS_USUARIOS), COLUMNAS_USUARIOS,
+                       numericas=NUMERICAS_USUARIOS)
+    tabla_det = Tabla(crear_tree(raiz_tk, COLUMNAS_DETALLES), COLUMNAS_DETALLES,
+                      numericas=NUMERICAS_DETALLES, virtual=virtual)
+    tabla_arbol = TablaArbol(crear_tree(raiz_tk, COLUMNAS_ARBOL, arbol=True), COLUMNAS_ARBOL,
+                             numericas=NUMERICAS_ARBOL)
+    tabla_arbol.abiertos.add(1)
+    indice = IndiceArbol()
+
+    def arbol(foto):
+        indice.actualizar(foto)
+        tabla_arbol.actualizar(*nodos_arbol(foto, indice))
+
+    return [
+        ("procesos", lambda foto: tabla_proc.actualizar(filas_procesos(foto)), tabla_proc.tree),
+        ("procesos ordenados", lambda foto: tabla_orden.actualizar(filas_procesos(foto)),
+         tabla_orden.tree),
+        ("procesos top 50", lambda foto: tabla_top.actualizar(filas_procesos(foto, top=top)),
+         tabla_top.tree),
+        ("procesos filtrados", lambda foto: tabla_filtro.actualizar(
+            filas_procesos(foto, None, CONSULTA_SUITE)), tabla_filtro.tree),
+        ("usuarios", lambda foto: tabla_user.actualizar(filas_usuarios(foto)), tabla_user.tree),
+        ("detalles", lambda foto: tabla_det.actualizar(filas_detalles(foto)), tabla_det.tree),
+        ("filtro", lambda foto: filtrar(foto, None, CONSULTA_SUITE), None),
+        ("arbol", arbol, tabla_arbol.tree),
+    ]
+
+
+def percentil(tiempos, p):
+    # exacto sobre las mediciones (pocas): la comparación entre corridas no
+    # debe depender del ancho de cubeta de un histograma
+    ordenados = sorted(tiempos)
+    return ordenados[min(int(p / 100 * len(ordenados)), len(ordenados) - 1)]
+
+
+def bench_vistas(args):
+    raiz_tk = None
+    if args.tk:
+        import tkinter as tk
+        raiz_tk = tk.Tk()  # con DISPLAY (p. ej. xvfb-run python benchmark.py vistas --tk)
+        raiz_tk.withdraw()
+
+    resultados = []
+    print(f"numpy: {'sí' if np is not None else 'no'}, "
+          f"widget: {'ttk.Treeview' if raiz_tk is not None else 'simulado'}, "
+          f"lista {'virtual' if args.virtual else 'completa'}, consulta: {CONSULTA_SUITE!r}")
+    print(f"{'procesos':>9} {'churn':>6} {'etapa':>20} {'p50 ms':>9} {'p99 ms':>9} {'llamadas/tick':>14}")
+    for n in args.procesos:
+        for churn in args.churn:
+            fuente = FuenteSintetica(n, cambios=0.2, churn=churn)
+            etapas = etapas_suite(raiz_tk, args.virtual)
+            primera = fuente()
+            for _, etapa, _ in etapas:
+                etapa(primera)  # carga inicial, no se mide
+            tiempos = {nombre: [] for nombre, _, _ in etapas}
+            llamadas = dict.fromkeys(tiempos, 0)
+            for _ in range(args.ticks):
+                foto = fuente()
+                for nombre, etapa, tree in etapas:
+                    if isinstance(tree, TreeviewContador):
+                        tree.llamadas = 0
+                    inicio = time.perf_counter()
+                    etapa(foto)
+                    tiempos[nombre].append(time.perf_counter() - inicio)
+                    if isinstance(tree, TreeviewContador):
+                        llamadas[nombre] += tree.llamadas
+            for nombre, medidos in tiempos.items():
+                fila = {
+                    "procesos": n, "churn": churn, "etapa": nombre,
+                    "p50_ms": round(percentil(medidos, 50) * 1000, 3),
+                    "p99_ms": round(percentil(medidos, 99) * 1000, 3),
+                    "llamadas": llamadas[nombre] // args.ticks if raiz_tk is None else None,
+                }
+                resultados.append(fila)
+                print(f"{n:>9} {churn:>6.1%} {nombre:>20} {fila['p50_ms']:>9.2f} "
+                      f"{fila['p99_ms']:>9.2f} {'-' if fila['llamadas'] is None else fila['llamadas']:>14}")
+
+    if raiz_tk is not None:
+        raiz_tk.destroy()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "numpy": np is not None,
+                "widget": "tk" if args.tk else "simulado",
+                "virtual": args.virtual,
+                "ticks": args.ticks,
+                "resultados": resultados,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"resultados guardados en {args.json}")
+    if args.comparar:
+        sys.exit(comparar_resultados(args.comparar, resultados, args.tolerancia))
+
+
+def comparar_resultados(ruta_base, resultados, tolerancia):
+    """
+    Compara los p50 contra una corrida anterior (--json). Devuelve 1 si
+    alguna etapa empeoró más que 'tolerancia' (0.2 = 20 %), para usarlo
+    como código de salida.
+    """
+    with open(ruta_base, encoding="utf-8") as f:
+        base = {(r["procesos"], r["churn"], r["etapa"]): r for r in json.load(f)["resultados"]}
+    print(f"\ncomparación con {ruta_base} (tolerancia {tolerancia:.0%}):")
+    print(f"{'procesos':>9} {'churn':>6} {'etapa':>20} {'antes ms':>9} {'ahora ms':>9} {'cambio':>8}")
+    regresiones = 0
+    for r in resultados:
+        anterior = base.get((r["procesos"], r["churn"], r["etapa"]))
+        if anterior is None or not anterior["p50_ms"]:
+            continue
+        cambio = r["p50_ms"] / anterior["p50_ms"] - 1
+        marca = ""
+        if cambio > tolerancia:
+            marca = "  REGRESIÓN"
+            regresiones += 1
+        print(f"{r['procesos']:>9} {r['churn']:>6.1%} {r['etapa']:>20} {anterior['p50_ms']:>9.2f} "
+              f"{r['p50_ms']:>9.2f} {cambio:>+8.0%}{marca}")
+    print(f"{regresiones} regresiones")
+    return 1 if regresiones else 0
+
+
+def _lista(tipo):
+    return lambda texto: [tipo(x) for x in texto.split(",") if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("tabla", help="Refresco completo vs. diferencial del Treeview")
+    p.add_argument("--ticks", type=int, default=10)
+    p.set_defaults(func=bench_tabla)
+
+    p = sub.add_parser("orden", help="Orden leyendo el widget vs. orden en el modelo")
+    p.add_argument("--ticks", type=int, default=10)
+    p.set_defaults(func=bench_orden)
+
+    p = sub.add_parser("memoria", help="Memoria de la lista de dicts vs. ProcessSnapshot")
+    p.add_argument("--procesos", type=int, default=10000)
+    p.set_defaults(func=bench_memoria)
+
+    p = sub.add_parser("backends", help="psutil vs. lectura directa de /proc sobre un /proc falso")
+    p.add_argument("--ticks", type=int, default=3)
+    p.set_defaults(func=bench_backends)
+
+    p = sub.add_parser("grabador", help="Tamaño y velocidad de la grabación en disco")
+    p.add_argument("--procesos", type=int, default=10000)
+    p.add_argument("--marcos", type=int, default=300)
+    p.set_defaults(func=bench_grabador)
+
+    p = sub.add_parser("filtro", help="Costo por tick del filtro de búsqueda compilado")
+    p.add_argument("--procesos", type=int, default=10000)
+    p.add_argument("--ticks", type=int, default=20)
+    p.set_defaults(func=bench_filtro)
+
+    p = sub.add_parser("arbol", help="Índice padre -> hijos, sumas por subárbol y render del árbol")
+    p.add_argument("--procesos", type=int, default=10000)
+    p.add_argument("--ticks", type=int, default=20)
+    p.set_defaults(func=bench_arbol)
+
+    p = sub.add_parser("vistas", help="Suite por tick: vistas, orden, filtro y árbol sobre la fuente sintética")
+    p.add_argument("--procesos", type=_lista(int), default=[1000, 5000, 10000, 50000],
+                   help="tamaños separados por comas")
+    p.add_argument("--churn", type=_lista(float), default=[0.01, 0.05],
+                   help="fracción de procesos que se reemplaza por tick, separadas por comas")
+    p.add_argument("--ticks", type=int, default=20)
+    p.add_argument("--completa", dest="virtual", action="store_false",
+                   help="materializar todas las filas en vez de la ventana virtual")
+    p.add_argument("--tk", action="store_true", help="usar ttk.Treeview real (requiere DISPLAY, p. ej. Xvfb)")
+    p.add_argument("--json", help="guardar los resultados en este archivo")
+    p.add_argument("--comparar", help="comparar los p50 con un --json anterior")
+    p.add_argument("--tolerancia", type=float, default=0.2,
+                   help="empeoramiento del p50 que cuenta como regresión (0.2 = 20 %%)")
+    p.set_defaults(func=bench_vistas)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
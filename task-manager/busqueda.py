@@ -0,0 +1,444 @@
+"""
+Búsqueda de procesos para las pestañas Procesos y Detalles (y consola.py).
+
+Además de una palabra suelta (que se busca en el campo del combobox), se
+aceptan consultas:
+
+    user:postgres cpu>20 rss>500M status:running
+    nombre:"Google Chrome" or nombre:firefox
+    not user:root (cpu>=5 or disco>1M)
+    -estado:sleeping pid:12
+
+    campo:texto     contiene (sin distinguir mayúsculas); pid:12 = PID que empieza con 12
+    campo=texto     igual (sin distinguir mayúsculas)
+    campo>n, >=, <, <=, =, !=   comparación numérica; rss y disco aceptan K, M, G, T
+    a b, a and b    y;   a or b, a | b    o;   not a, -a    no;   ( ... )
+
+Cada consulta se compila una vez (compilar_filtro está cacheado) a un
+árbol de nodos que calculan una máscara sobre las columnas de la foto:
+con numpy son operaciones vectorizadas, sin numpy una lista por nodo.
+"""
+import operator, re
+from bisect import bisect_left
+from functools import lru_cache
+
+from perfil import perfil
+from snapshot import TABLAS, np
+
+
+class ErrorConsulta(ValueError):
+    """
+    La consulta de búsqueda no se pudo interpretar.
+    """
+
+# --------------------------------------------------
+# Minúsculas por cadena internada
+# --------------------------------------------------
+
+# id de la tabla de cadenas -> (tabla, versiones en minúsculas)
+_minusculas = {}
+
+def minusculas(tabla):
+    """
+    Versión en minúsculas de cada cadena de una tabla internada (nombres,
+    usuarios, estados), en el mismo orden. Las tablas solo crecen, así que
+    cada cadena se pasa a minúsculas una sola vez aunque aparezca en miles
+    de procesos y en todas las fotos.
+    """
+    entrada = _minusculas.get(id(tabla))
+    if entrada is None or entrada[0] is not tabla:
+        if len(_minusculas) >= 16:
+            _minusculas.clear()  # tablas de fotos viejas (colector en subproceso)
+        entrada = _minusculas[id(tabla)] = (tabla, [])
+    lista = entrada[1]
+    if len(lista) < len(tabla):
+        lista.extend(c.lower() for c in tabla[len(lista):])
+    return lista
+
+# --------------------------------------------------
+# Máscaras (ndarray de bool con numpy, lista sin numpy)
+# --------------------------------------------------
+
+def _y(a, b):
+    return a & b if np is not None else [x and y for x, y in zip(a, b)]
+
+def _o(a, b):
+    return a | b if np is not None else [x or y for x, y in zip(a, b)]
+
+def _no(a):
+    return ~a if np is not None else [not x for x in a]
+
+def _mascara_de_posiciones(n, posiciones):
+    if np is not None:
+        mascara = np.zeros(n, dtype=bool)
+        mascara[posiciones] = True
+        return mascara
+    mascara = [False] * n
+    for i in posiciones:
+        mascara[i] = True
+    return mascara
+
+# --------------------------------------------------
+# Nodos compilados
+# --------------------------------------------------
+
+class Filtro:
+    """
+    Nodo de una consulta compilada: mascara(foto) dice qué filas pasan;
+    llamarlo devuelve directamente las posiciones, en el orden de la foto.
+    """
+
+    def __call__(self, snapshot):
+        return snapshot.indices(self.mascara(snapshot))
+
+
+class FiltroTexto(Filtro):
+    """
+    Subcadena (o igualdad, con exacto=True) sin distinguir mayúsculas sobre
+    una columna internada.
+
+    La comparación se hace contra la tabla de cadenas, no contra cada
+    proceso: se arma el conjunto de ids que coinciden (revisando solo las
+    cadenas nuevas desde la última foto) y las filas salen de una máscara
+    sobre la columna de ids.
+    """
+
+    def __init__(self, columna, texto, exacto=False):
+        self.columna = columna
+        self.texto = texto.lower()
+        self.exacto = exacto
+        self._tabla = None
+        self._revisadas = 0
+        self._ids = set()
+
+    def ids(self, tabla):
+        if tabla is not self._tabla:
+            self._tabla, self._revisadas, self._ids = tabla, 0, set()
+        cadenas = minusculas(tabla)
+        texto = self.texto
+        for i in range(self._revisadas, len(cadenas)):
+            if (cadenas[i] == texto) if self.exacto else (texto in cadenas[i]):
+                self._ids.add(i)
+        self._revisadas = len(cadenas)
+        return self._ids
+
+    def mascara(self, snapshot):
+        ids = self.ids(getattr(snapshot, TABLAS[self.columna]))
+        return snapshot.mascara_id(self.columna, ids)
+
+    def __call__(self, snapshot):
+        if not self.ids(getattr(snapshot, TABLAS[self.columna])):
+            return []
+        return super().__call__(snapshot)
+
+
+class FiltroPid(Filtro):
+    """
+    PIDs que empiezan con un prefijo. Los PID que empiezan con "12" son los
+    rangos [12, 13), [120, 130), [1200, 1300), ...: cada rango es un par de
+    bisect sobre los PID ordenados de la foto.
+    """
+
+    def __init__(self, prefijo):
+        self.prefijo = prefijo
+
+    def __call__(self, snapshot):
+        prefijo = self.prefijo
+        if not prefijo.isdigit() or (prefijo[0] == "0" and len(prefijo) > 1):
+            return []
+        claves, posiciones = snapshot.pids_ordenados()
+        if not claves:
+            return []
+
+        encontradas = []
+        desde = int(prefijo)
+        hasta = desde + 1
+        while desde <= claves[-1]:
+            a = bisect_left(claves, desde)
+            b = bisect_left(claves, hasta, a)
+            encontradas.extend(posiciones[a:b])
+            if desde == 0:
+                break  # "0" solo coincide con el PID 0
+            desde *= 10
+            hasta *= 10
+        encontradas.sort()  # mismo orden que la foto
+        return encontradas
+
+    def mascara(self, snapshot):
+        return _mascara_de_posiciones(len(snapshot), self(snapshot))
+
+
+class FiltroNumero(Filtro):
+    """
+    Comparación de una columna numérica (o la suma de varias) con un valor.
+    """
+
+    def __init__(self, columnas, comparar, valor):
+        self.columnas = columnas
+        self.comparar = comparar
+        self.valor = valor
+
+    def _valores(self, snapshot):
+        if np is not None:
+            valores = snapshot.columna(self.columnas[0])
+            for c in self.columnas[1:]:
+                valores = valores + snapshot.columna(c)
+            return valores
+        valores = snapshot.lista(self.columnas[0])
+        for c in self.columnas[1:]:
+            valores = [a + b for a, b in zip(valores, snapshot.lista(c))]
+        return valores
+
+    def mascara(self, snapshot):
+        valores = self._valores(snapshot)
+        if np is not None:
+            return self.comparar(valores, self.valor)
+        comparar, valor = self.comparar, self.valor
+        return [comparar(v, valor) for v in valores]
+
+
+class FiltroY(Filtro):
+    def __init__(self, partes):
+        self.partes = partes
+
+    def mascara(self, snapshot):
+        mascara = self.partes[0].mascara(snapshot)
+        for parte in self.partes[1:]:
+            mascara = _y(mascara, parte.mascara(snapshot))
+        return mascara
+
+
+class FiltroO(FiltroY):
+    def mascara(self, snapshot):
+        mascara = self.partes[0].mascara(snapshot)
+        for parte in self.partes[1:]:
+            mascara = _o(mascara, parte.mascara(snapshot))
+        return mascara
+
+
+class FiltroNo(Filtro):
+    def __init__(self, parte):
+        self.parte = parte
+
+    def mascara(self, snapshot):
+        return _no(self.parte.mascara(snapshot))
+
+# --------------------------------------------------
+# Campos y valores
+# --------------------------------------------------
+
+# nombre en la consulta -> (tipo, columnas)
+CAMPOS = {
+    "nombre": ("texto", "nombre"), "name": ("texto", "nombre"),
+    "usuario": ("texto", "usuario"), "user": ("texto", "usuario"),
+    "estado": ("texto", "estado"), "status": ("texto", "estado"), "state": ("texto", "estado"),
+    "pid": ("pid", ("pid",)),
+    "cpu": ("porcentaje", ("cpu",)),
+    "mem": ("porcentaje", ("mem_pct",)), "ram": ("porcentaje", ("mem_pct",)),
+    "rss": ("bytes", ("rss",)),
+    "disco": ("bytes", ("io_lectura", "io_escritura")), "io": ("bytes", ("io_lectura", "io_escritura")),
+    "lectura": ("bytes", ("io_lectura",)), "read": ("bytes", ("io_lectura",)),
+    "escritura": ("bytes", ("io_escritura",)), "write": ("bytes", ("io_escritura",)),
+}
+
+# modo del combobox -> campo para las palabras sueltas
+CAMPO_POR_MODO = {"nombre": "nombre", "pid": "pid", "estado": "estado", "usuario": "usuario"}
+
+COMPARACIONES = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+    "=": operator.eq, "==": operator.eq, "!=": operator.ne,
+}
+
+UNIDADES = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+_NUMERO = re.compile(r"(-?\d+(?:\.\d*)?|-?\.\d+)\s*([kmgt]?)(?:i?b)?(%?)", re.IGNORECASE)
+
+
+def _numero(texto, tipo, campo):
+    m = _NUMERO.fullmatch(texto)
+    if m is None:
+        raise ErrorConsulta(f"'{texto}' no es un número válido para {campo}")
+    numero, unidad, porciento = m.groups()
+    if unidad and tipo != "bytes":
+        raise ErrorConsulta(f"{campo} no acepta unidades ({texto})")
+    if porciento and tipo != "porcentaje":
+        raise ErrorConsulta(f"{campo} no es un porcentaje ({texto})")
+    return float(numero) * UNIDADES[unidad.lower()]
+
+
+def _termino(campo, op, valor):
+    definicion = CAMPOS.get(campo.lower())
+    if definicion is None:
+        raise ErrorConsulta(f"campo desconocido: {campo}")
+    tipo, columnas = definicion
+
+    if tipo == "texto":
+        if op == ":":
+            return FiltroTexto(columnas, valor)
+        if op in ("=", "=="):
+            return FiltroTexto(columnas, valor, exacto=True)
+        if op == "!=":
+            return FiltroNo(FiltroTexto(columnas, valor, exacto=True))
+        raise ErrorConsulta(f"{campo} es texto: use {campo}:valor o {campo}=valor")
+
+    if tipo == "pid" and op == ":":
+        return FiltroPid(valor)
+    comparar = COMPARACIONES.get("=" if op == ":" else op)
+    return FiltroNumero(columnas, comparar, _numero(valor, tipo, campo))
+
+# --------------------------------------------------
+# Parser
+# --------------------------------------------------
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<abre>\() | (?P<cierra>\)) | (?P<barra>\|)
+      | "(?P<cadena>(?:[^"\\]|\\.)*)"
+      | (?P<op>>=|<=|!=|==|=|>|<|:)
+      | (?P<palabra>[^\s()|"<>=!:]+)
+    )""", re.VERBOSE)
+
+
+def _tokens(texto):
+    tokens = []
+    pos = 0
+    texto = texto.strip()
+    while pos < len(texto):
+        m = _TOKEN.match(texto, pos)
+        if m is None or m.end() == pos:
+            raise ErrorConsulta(f"no se entiende '{texto[pos:]}'")
+        tipo = m.lastgroup
+        valor = m.group(tipo)
+        if tipo == "cadena":
+            valor = re.sub(r"\\(.)", r"\1", valor)
+        tokens.append((tipo, valor))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    """
+    consulta := o
+    o        := y (("or" | "|") y)*
+    y        := no (["and"] no)*
+    no       := ("not" | "-") no | "(" o ")" | término
+    término  := valor [op valor]
+    """
+
+    def __init__(self, tokens, campo_suelto):
+        self.tokens = tokens
+        self.pos = 0
+        self.campo_suelto = campo_suelto
+
+    def _ver(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _es_palabra(self, *palabras):
+        tipo, valor = self._ver()
+        return tipo == "palabra" and valor.lower() in palabras
+
+    def _tomar(self):
+        token = self._ver()
+        self.pos += 1
+        return token
+
+    def consulta(self):
+        nodo = self._o()
+        if self.pos < len(self.tokens):
+            raise ErrorConsulta(f"sobra '{self._ver()[1]}'")
+        return nodo
+
+    def _o(self):
+        partes = [self._y()]
+        while self._ver()[0] == "barra" or self._es_palabra("or"):
+            self._tomar()
+            partes.append(self._y())
+        return partes[0] if len(partes) == 1 else FiltroO(partes)
+
+    def _y(self):
+        partes = [self._no()]
+        while True:
+            tipo, _ = self._ver()
+            if tipo is None or tipo in ("cierra", "barra") or self._es_palabra("or"):
+                break
+            if self._es_palabra("and"):
+                self._tomar()
+            partes.append(self._no())
+        return partes[0] if len(partes) == 1 else FiltroY(partes)
+
+    def _no(self):
+        tipo, valor = self._ver()
+        if self._es_palabra("not"):
+            self._tomar()
+            return FiltroNo(self._no())
+        if tipo == "palabra" and valor.startswith("-") and len(valor) > 1 \
+                and not valor[1].isdigit():
+            self.tokens[self.pos] = ("palabra", valor[1:])
+            return FiltroNo(self._no())
+        if tipo == "abre":
+            self._tomar()
+            nodo = self._o()
+            if self._tomar()[0] != "cierra":
+                raise ErrorConsulta("falta ')'")
+            return nodo
+        return self._termino()
+
+    def _termino(self):
+        tipo, valor = self._tomar()
+        if tipo not in ("palabra", "cadena"):
+            raise ErrorConsulta("falta un valor" if tipo is None else f"no se esperaba '{valor}'")
+        if self._ver()[0] == "op":
+            _, op = self._tomar()
+            tipo_valor, dato = self._tomar()
+            if tipo_valor not in ("palabra", "cadena"):
+                raise ErrorConsulta(f"falta el valor después de '{valor}{op}'")
+            if op == ":" and valor.lower() not in CAMPOS:
+                # no es un campo: se busca el texto tal cual (p. ej. "kworker/0:1")
+                return _termino(self.campo_suelto, ":", f"{valor}:{dato}")
+            return _termino(valor, op, dato)
+        return _termino(self.campo_suelto, ":", valor)
+
+# --------------------------------------------------
+# Entrada
+# --------------------------------------------------
+
+@lru_cache(maxsize=64)
+def compilar_filtro(modo, query):
+    """
+    Compila (modo, consulta) a un Filtro: función foto -> posiciones que
+    pasan. Devuelve None si no hay nada que filtrar; lanza ErrorConsulta si
+    la consulta está mal escrita. Cacheado: escribir y borrar una letra
+    reutiliza el filtro (y los ids de cadenas ya revisados).
+    """
+    q = (query or "").strip()
+    if not q:
+        return None  # sin filtro
+
+    campo = CAMPO_POR_MODO.get((modo or "Nombre").lower(), "nombre")
+    return _Parser(_tokens(q), campo).consulta()
+
+
+def filtrar(snapshot, modo, query):
+    """
+    Posiciones de los procesos que pasan el filtro de búsqueda, en el orden
+    de la foto. Una consulta mal escrita no deja pasar ningún proceso (el
+    error se puede mostrar con error_de_consulta).
+    """
+    try:
+        filtro = compilar_filtro(modo, query)
+    except ErrorConsulta:
+        return []
+    if filtro is None:
+        return range(len(snapshot))
+    with perfil.medir("filtro"):
+        return filtro(snapshot)
+
+
+def error_de_consulta(modo, query):
+    """
+    Mensaje de error de la consulta, o None si se puede usar.
+    """
+    try:
+        compilar_filtro(modo, query)
+    except ErrorConsulta as e:
+        return str(e)
+    return None
@@ -0,0 +1,208 @@
+"""
+cgroups de cada proceso y lectura directa de cgroupfs (solo Linux).
+
+El cgroup de un proceso sale de /proc/<pid>/cgroup y se cachea por
+(pid, create_time): el colector lo lee una vez por proceso nuevo y lo
+guarda en la columna 'cgroup' de la foto. Con eso la vista de grupos suma
+CPU, memoria y disco por cgroup (contenedor, slice, servicio) igual que la
+de usuarios.
+
+LectorCgroupfs lee memory.current y cpu.stat del propio cgroup, que
+además cuentan la caché de páginas y los procesos que ya terminaron; por
+eso la vista los muestra en columnas aparte de las sumas por proceso.
+MonitorCgroupfs hace esas lecturas desde el colector, no desde Tk.
+"""
+import os, threading, time
+
+from contabilidad import EstadoPorProceso
+
+# --------------------------------------------------
+# cgroup por proceso
+# --------------------------------------------------
+
+def leer_cgroup(raiz, pid):
+    """
+    Ruta del cgroup del proceso ('/system.slice/ssh.service'), o None si no
+    se pudo leer. Con cgroups v2 es la línea '0::'; en v1 se usa la
+    jerarquía de systemd (name=systemd) o, si no está, la primera.
+    """
+    try:
+        with open(f"{raiz}/{pid}/cgroup", "rb") as f:
+            texto = f.read().decode("utf-8", "replace")
+    except OSError:
+        return None
+    primera = None
+    for linea in texto.splitlines():
+        partes = linea.split(":", 2)
+        if len(partes) != 3:
+            continue
+        jerarquia, controladores, ruta = partes
+        if jerarquia == "0" and not controladores:
+            return ruta
+        if controladores == "name=systemd":
+            return ruta
+        if primera is None:
+            primera = ruta
+    return primera
+
+
+class CacheCgroups(EstadoPorProceso):
+    """
+    cgroup de cada proceso por (pid, create_time). Un proceso que se mueve
+    de cgroup mientras vive (raro) sigue con el que tenía al aparecer.
+    """
+
+    def __init__(self, raiz="/proc"):
+        super().__init__()
+        self.raiz = raiz
+        self.lecturas = 0  # lecturas de /proc/<pid>/cgroup (procesos nuevos)
+
+    @staticmethod
+    def disponible(raiz="/proc"):
+        return os.path.exists(f"{raiz}/self/cgroup")
+
+    def cgroup(self, pid, create_time):
+        ruta = self.obtener(pid, create_time)
+        if ruta is None:
+            ruta = leer_cgroup(self.raiz, pid) or ""
+            self.lecturas += 1
+            self.guardar(pid, create_time, ruta)
+        else:
+            self.tocar(pid, create_time)
+        return ruta
+
+
+def recortar(ruta, niveles):
+    """
+    Los primeros 'niveles' componentes de la ruta ('/user.slice/user-1000.slice/...'
+    con 2 niveles -> '/user.slice/user-1000.slice'). None = la ruta completa.
+    """
+    if niveles is None or not ruta:
+        return ruta
+    partes = ruta.strip("/").split("/")
+    return "/" + "/".join(partes[:niveles]) if partes[0] else "/"
+
+# --------------------------------------------------
+# Lectura directa de cgroupfs
+# --------------------------------------------------
+
+class LectorCgroupfs:
+    """
+    Memoria (bytes) y CPU (% de un núcleo) de un cgroup leídos de cgroupfs.
+    v2: memory.current y usage_usec de cpu.stat. v1: memory.usage_in_bytes
+    y cpuacct.usage bajo sus controladores. None si el grupo no se puede
+    leer (sin cgroupfs montado, grupo que ya no existe).
+
+    La CPU es la diferencia de usage_usec contra la lectura anterior del
+    mismo grupo; la primera vez da None.
+    """
+
+    def __init__(self, base="/sys/fs/cgroup"):
+        self.base = base
+        self.v2 = os.path.exists(f"{base}/cgroup.controllers")
+        self._previos = {}  # ruta -> (usec, instante)
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def memoria(self, ruta):
+        if self.v2:
+            datos = self._leer(f"{self.base}{ruta}/memory.current")
+        else:
+            datos = self._leer(f"{self.base}/memory{ruta}/memory.usage_in_bytes")
+        if not datos:
+            return None
+        try:
+            return int(datos)
+        except ValueError:
+            return None  # "max" u otra cosa inesperada
+
+    def _usec(self, ruta):
+        if self.v2:
+            datos = self._leer(f"{self.base}{ruta}/cpu.stat")
+            if datos:
+                for linea in datos.splitlines():
+                    if linea.startswith(b"usage_usec "):
+                        return int(linea.split()[1])
+            return None
+        datos = self._leer(f"{self.base}/cpuacct{ruta}/cpuacct.usage")
+        return int(datos) // 1000 if datos else None  # nanosegundos
+
+    def cpu(self, ruta, ahora):
+        usec = self._usec(ruta)
+        if usec is None:
+            self._previos.pop(ruta, None)
+            return None
+        previo = self._previos.get(ruta)
+        self._previos[ruta] = (usec, ahora)
+        if previo is None or ahora <= previo[1]:
+            return None
+        return max(usec - previo[0], 0) / 1e6 / (ahora - previo[1]) * 100
+
+    def olvidar_excepto(self, rutas):
+        """
+        Descarta las lecturas anteriores de los grupos que ya no se muestran.
+        """
+        for ruta in [r for r in self._previos if r not in rutas]:
+            del self._previos[ruta]
+
+
+def grupos_de(snapshot, niveles=None):
+    """
+    Grupos (rutas recortadas a 'niveles') que tienen procesos en la foto.
+    """
+    if not snapshot.tiene("cgroup"):
+        return set()
+    cuenta = snapshot.contar_por("cgroup", minlength=snapshot.total_ids("cgroup"))
+    return {recortar(ruta, niveles) for ruta, n in zip(snapshot.cgroups, cuenta) if n}
+
+
+def leer_grupos(lector, grupos, ahora):
+    """
+    {grupo: (cpu % de un núcleo, memoria en bytes)} leídos de cgroupfs,
+    None donde no se pudo. La raíz '/' queda afuera: cuenta a toda la
+    máquina, no solo a sus procesos.
+    """
+    valores = {}
+    for grupo in grupos:
+        if grupo and grupo.startswith("/") and grupo != "/":
+            valores[grupo] = (lector.cpu(grupo, ahora), lector.memoria(grupo))
+    lector.olvidar_excepto(valores)
+    return valores
+
+
+class MonitorCgroupfs:
+    """
+    Lee cgroupfs para los grupos de cada foto nueva. al_publicar() va en
+    Colector.al_publicar, así las lecturas corren en el hilo del colector;
+    la interfaz fija 'niveles' y toma el resultado con valores(), sin
+    bloquear. Los valores son de la última foto leída, que puede ir un
+    tick detrás de la que está en pantalla.
+    """
+
+    def __init__(self, lector=None):
+        self.lector = LectorCgroupfs() if lector is None else lector
+        self.niveles = None
+        self._lock = threading.Lock()
+        self._publicado = (None, {})  # (niveles, valores) de la última lectura
+
+    def al_publicar(self, snapshot):
+        niveles = self.niveles
+        if not snapshot.tiene("cgroup"):
+            return
+        valores = leer_grupos(self.lector, grupos_de(snapshot, niveles), time.monotonic())
+        with self._lock:
+            self._publicado = (niveles, valores)
+
+    def valores(self, niveles):
+        """
+        Los valores de la última lectura si se hizo con estos niveles; si
+        no (se acaba de cambiar el agrupamiento), un dict vacío.
+        """
+        with self._lock:
+            leidos, valores = self._publicado
+        return valores if leidos == niveles else {}
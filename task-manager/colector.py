@@ -0,0 +1,346 @@
+import multiprocessing, queue, threading, time
+
+import psutil
+
+from cgroups import CacheCgroups
+from contabilidad import CacheMetadatos, ContadorCPU, Metadatos, TasasIO
+from procfs import BackendProcfs
+from red import ContabilidadRed
+from snapshot import ConstructorSnapshot, ProcessSnapshot
+
+# --------------------------------------------------
+# Snapshot de procesos
+# --------------------------------------------------
+
+def _leer(funcion, defecto=None):
+    # como ad_value de process_iter: sin permiso, valor por defecto
+    try:
+        return funcion()
+    except psutil.AccessDenied:
+        return defecto
+
+
+class BackendPsutil:
+    """
+    Backend de muestreo portable basado en psutil.process_iter.
+
+    Cada proceso se lee dentro de un oneshot(), así que io_counters y
+    create_time salen de los mismos archivos de /proc que ya se abren para
+    el resto. Nombre y usuario se buscan en una CacheMetadatos por
+    (pid, create_time) y solo se piden a psutil para procesos nuevos.
+    """
+
+    nombre = "psutil"
+
+    def __init__(self):
+        self.metadatos = CacheMetadatos()
+
+    def procesos(self):
+        """
+        Genera un registro por proceso:
+        (pid, create_time, ppid, nombre, usuario, estado, cpu_seg, mem %, rss, io_lectura, io_escritura)
+        cpu_seg es el tiempo de CPU acumulado (user + system) en segundos; los
+        contadores de disco son acumulados (bytes) o None si no se pudieron leer.
+        """
+        metadatos = self.metadatos
+        for proc in psutil.process_iter():
+            try:
+                with proc.oneshot():
+                    pid = proc.pid
+                    create_time = proc.create_time()
+                    meta = metadatos.buscar(pid, create_time)
+                    if meta is None:
+                        meta = Metadatos(_leer(proc.name, ""), _leer(proc.username))
+                        metadatos.guardar(pid, create_time, meta)
+
+                    meminfo = _leer(proc.memory_info)
+                    tiempos = _leer(proc.cpu_times)
+                    io = _leer(getattr(proc, "io_counters", lambda: None))
+                    registro = (
+                        pid, create_time, _leer(proc.ppid, 0), meta.nombre, meta.usuario,
+                        _leer(proc.status, ""),
+                        tiempos.user + tiempos.system if tiempos else 0.0,
+                        _leer(proc.memory_percent, 0.0),
+                        meminfo.rss if meminfo else 0,
+                        io.read_bytes if io else None,
+                        io.write_bytes if io else None,
+                    )
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            yield registro
+        metadatos.barrer()
+
+
+def backend_por_defecto():
+    """
+    En Linux se lee /proc directamente; en el resto (o si /proc no está
+    montado) se usa psutil.
+    """
+    if BackendProcfs.disponible():
+        return BackendProcfs()
+    return BackendPsutil()
+
+# los ids de nombres/usuarios y los contadores entre fotos viven aquí
+_constructor = ConstructorSnapshot()
+_tasas_io = TasasIO()
+_contador_cpu = ContadorCPU()
+_backend = None
+_red = None  # ContabilidadRed, o False si no hay sock_diag (fuera de Linux)
+_cgroups = CacheCgroups() if CacheCgroups.disponible() else None
+
+def configurar_cpu(suavizado=None, por_nucleo=None):
+    """
+    Ajusta el contador de CPU por defecto (media exponencial y escala).
+    """
+    if suavizado is not None:
+        _contador_cpu.suavizado = suavizado
+    if por_nucleo is not None:
+        _contador_cpu.por_nucleo = por_nucleo
+
+def estadisticas_cache():
+    """
+    Aciertos/fallos de la cache de metadatos del backend por defecto.
+    """
+    if _backend is None:
+        return None
+    return _backend.metadatos.estadisticas()
+
+def red_por_defecto():
+    """
+    ContabilidadRed compartida, o None si el sistema no permite medir la
+    red por proceso.
+    """
+    global _red
+    if _red is None:
+        _red = ContabilidadRed() if ContabilidadRed.disponible() else False
+    return _red if _red is not False else None
+
+def obtener_procesos_snapshot(constructor=None, tasas_io=None, backend=None, contador_cpu=None,
+                              red=None, cgroups=None):
+    """
+    Toma una 'foto' de todos los procesos con todos los datos que necesitamos.
+    Así evitamos recorrer la lista de procesos varias veces.
+    Devuelve una ProcessSnapshot (columnas tipadas, no un dict por proceso).
+    Con una ContabilidadRed (por defecto en Linux) la foto trae además las
+    columnas red_rx y red_tx; red=False las omite. Lo mismo con una
+    CacheCgroups (por defecto en Linux) y la columna cgroup.
+    """
+    global _backend
+    if constructor is None:
+        constructor = _constructor
+    if tasas_io is None:
+        tasas_io = _tasas_io
+    if contador_cpu is None:
+        contador_cpu = _contador_cpu
+    if backend is None:
+        if _backend is None:
+            _backend = backend_por_defecto()
+        backend = _backend
+    if red is None:
+        red = red_por_defecto()
+    elif red is False:
+        red = None
+    if cgroups is None:
+        cgroups = _cgroups
+    elif cgroups is False:
+        cgroups = None
+
+    ahora = time.monotonic()
+    ahora_reloj = time.time()
+    agregar = constructor.agregar
+    calcular_cpu = contador_cpu.calcular
+    if red is not None:
+        try:
+            red.muestrear(ahora)
+            tasas_red = red.tasas
+        except OSError:
+            red = None  # sock_diag falló en este tick: foto sin columnas de red
+    red_rx = red_tx = cgroup = None
+    for (pid, create_time, ppid, nombre, usuario, estado,
+         cpu_seg, mem_pct, rss, io_lectura, io_escritura) in backend.procesos():
+        cpu = calcular_cpu(pid, create_time, cpu_seg, ahora, ahora_reloj)
+        if io_lectura is not None:
+            lectura, escritura = tasas_io.calcular(
+                pid, create_time, io_lectura, io_escritura or 0, ahora)
+        else:
+            lectura = escritura = 0.0  # sin permiso para leer /proc/<pid>/io
+        if red is not None:
+            red_rx, red_tx = tasas_red(pid, create_time)
+        if cgroups is not None:
+            cgroup = cgroups.cgroup(pid, create_time)
+        agregar(pid, nombre, usuario, estado, cpu, mem_pct, rss, lectura, escritura, ppid,
+                red_rx, red_tx, cgroup)
+    tasas_io.barrer()
+    contador_cpu.barrer()
+    if red is not None:
+        red.barrer()
+    if cgroups is not None:
+        cgroups.barrer()
+    return constructor.terminar()
+
+# --------------------------------------------------
+# Colector en segundo plano
+# --------------------------------------------------
+
+def _bucle_subproceso(muestrear, cola, activo, pausado, intervalo):
+    # corre dentro del subproceso: muestrea y manda la foto al proceso padre
+    while activo.is_set():
+        inicio = time.monotonic()
+        if not pausado.is_set():
+            try:
+                snapshot = muestrear()
+            except Exception:
+                snapshot = ProcessSnapshot.vacio()
+            cola.put((time.monotonic() - inicio, snapshot))
+        espera = intervalo.value - (time.monotonic() - inicio)
+        time.sleep(max(espera, 0.05))
+
+
+class Colector:
+    """
+    Muestrea los procesos en un hilo (o subproceso) aparte y publica solo la
+    última foto terminada. El hilo de Tk nunca espera a psutil: únicamente
+    consulta ultimo() desde un root.after.
+
+    modo="hilo" usa un threading.Thread; modo="proceso" usa un subproceso de
+    multiprocessing, útil cuando el muestreo compite por el GIL con la interfaz.
+    """
+
+    def __init__(self, muestrear=obtener_procesos_snapshot, intervalo=2.0, modo="hilo"):
+        if modo not in ("hilo", "proceso"):
+            raise ValueError(f"Modo de colector desconocido: {modo}")
+        self.muestrear = muestrear
+        self.modo = modo
+        self._intervalo = intervalo
+
+        # doble buffer: (versión, snapshot) se reemplaza completo al publicar
+        self._lock = threading.Lock()
+        self._publicado = (0, ProcessSnapshot.vacio())
+        self.costo = 0.0  # segundos que tardó el último muestreo
+        # funciones llamadas con cada foto publicada, desde el hilo del
+        # colector (p. ej. Grabador.grabar); no deben tocar Tk
+        self.al_publicar = []
+
+        self._activo = threading.Event()
+        self._pausado = threading.Event()
+        self._despertar = threading.Event()
+        self._hilo = None
+        self._proceso = None
+        self._mp = None
+
+    # ---- control ----
+
+    def iniciar(self):
+        if self._activo.is_set():
+            return
+        self._activo.set()
+        if self.modo == "hilo":
+            self._hilo = threading.Thread(target=self._bucle_hilo, name="colector", daemon=True)
+        else:
+            self._iniciar_subproceso()
+            self._hilo = threading.Thread(target=self._bucle_receptor, name="colector-rx", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._activo.clear()
+        self._despertar.set()
+        if self._mp is not None:
+            self._mp["activo"].clear()
+        if self._proceso is not None:
+            self._proceso.join(timeout=1)
+            if self._proceso.is_alive():
+                self._proceso.terminate()
+            self._proceso = None
+        if self._hilo is not None:
+            self._hilo.join(timeout=1)
+            self._hilo = None
+
+    def pausar(self, pausado=True):
+        if pausado:
+            self._pausado.set()
+        else:
+            self._pausado.clear()
+            self._despertar.set()
+        if self._mp is not None:
+            if pausado:
+                self._mp["pausado"].set()
+            else:
+                self._mp["pausado"].clear()
+
+    @property
+    def intervalo(self):
+        return self._intervalo
+
+    @intervalo.setter
+    def intervalo(self, segundos):
+        self._intervalo = segundos
+        if self._mp is not None:
+            self._mp["intervalo"].value = segundos
+        self._despertar.set()
+
+    def ultimo(self):
+        """
+        Devuelve (versión, snapshot) de la última foto terminada.
+        La versión sube en cada publicación, así la interfaz sabe si hay algo nuevo.
+        """
+        with self._lock:
+            return self._publicado
+
+    # ---- internos ----
+
+    def _publicar(self, snapshot, costo):
+        # la ProcessSnapshot no se modifica después de terminar(), se publica tal cual
+        with self._lock:
+            version = self._publicado[0] + 1
+            self._publicado = (version, snapshot)
+            self.costo = costo
+        for funcion in list(self.al_publicar):
+            try:
+                funcion(snapshot)
+            except Exception:
+                pass  # un suscriptor roto no debe frenar el muestreo
+
+    def _bucle_hilo(self):
+        while self._activo.is_set():
+            inicio = time.monotonic()
+            if not self._pausado.is_set():
+                try:
+                    snapshot = self.muestrear()
+                except Exception:
+                    snapshot = ProcessSnapshot.vacio()
+                self._publicar(snapshot, time.monotonic() - inicio)
+            espera = self._intervalo - (time.monotonic() - inicio)
+            self._despertar.wait(max(espera, 0.05))
+            self._despertar.clear()
+
+    def _iniciar_subproceso(self):
+        ctx = multiprocessing.get_context()
+        self._mp = {
+            "cola": ctx.Queue(maxsize=2),
+            "activo": ctx.Event(),
+            "pausado": ctx.Event(),
+            "intervalo": ctx.Value("d", self._intervalo),
+        }
+        self._mp["activo"].set()
+        if self._pausado.is_set():
+            self._mp["pausado"].set()
+        self._proceso = ctx.Process(
+            target=_bucle_subproceso,
+            args=(self.muestrear, self._mp["cola"], self._mp["activo"],
+                  self._mp["pausado"], self._mp["intervalo"]),
+            name="colector",
+            daemon=True,
+        )
+        self._proceso.start()
+
+    def _bucle_receptor(self):
+        # hilo del proceso padre que recibe las fotos del subproceso
+        cola = self._mp["cola"]
+        while self._activo.is_set():
+            try:
+                costo, snapshot = cola.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self._publicar(snapshot, costo)
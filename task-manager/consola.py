@@ -0,0 +1,219 @@
+"""
+Modo consola (sin Tk) del administrador de tareas.
+
+Usa el mismo motor de fotos que main.py (colector + vistas), así que se
+puede dejar corriendo como proceso de fondo sin abrir ventana ni importar
+tkinter:
+
+    python consola.py procesos --interval 2 --count 0 --format json
+    python consola.py usuarios --count 1
+    python consola.py cgroups --niveles 2
+    python consola.py detalles --buscar postgres --modo Usuario --format csv
+    python consola.py sistema --count 5
+    python consola.py sesiones
+"""
+import argparse, csv, json, os, sys, time
+
+import psutil
+
+from busqueda import error_de_consulta
+from cgroups import LectorCgroupfs, grupos_de, leer_grupos
+from colector import obtener_procesos_snapshot
+from vistas import (
+    COLUMNAS_CGROUPS, COLUMNAS_DETALLES, COLUMNAS_PROCESOS, COLUMNAS_USUARIOS,
+    filas_cgroups, filas_detalles, filas_procesos, filas_usuarios,
+)
+
+FORMATOS = ("table", "json", "csv")
+MODOS_BUSQUEDA = ("Nombre", "PID", "Estado", "Usuario")
+
+# --------------------------------------------------
+# Fuentes: cada muestra devuelve (timestamp, columnas, filas) por tick
+# --------------------------------------------------
+
+def fuente_procesos(args):
+    def muestra():
+        snap = obtener_procesos_snapshot()
+        filas = filas_procesos(snap, args.modo, args.buscar)
+        return snap.timestamp, COLUMNAS_PROCESOS, [valores for _, valores in filas]
+    return muestra
+
+
+def fuente_detalles(args):
+    def muestra():
+        snap = obtener_procesos_snapshot()
+        filas = filas_detalles(snap, args.modo, args.buscar)
+        return snap.timestamp, COLUMNAS_DETALLES, [valores for _, valores in filas]
+    return muestra
+
+
+def fuente_usuarios(args):
+    def muestra():
+        snap = obtener_procesos_snapshot()
+        return snap.timestamp, COLUMNAS_USUARIOS, [valores for _, valores in filas_usuarios(snap)]
+    return muestra
+
+
+def fuente_cgroups(args):
+    lector = LectorCgroupfs()
+
+    def muestra():
+        snap = obtener_procesos_snapshot()
+        cgroupfs = leer_grupos(lector, grupos_de(snap, args.niveles), time.monotonic())
+        filas = filas_cgroups(snap, args.niveles, cgroupfs)
+        return snap.timestamp, COLUMNAS_CGROUPS, [valores for _, valores in filas]
+    return muestra
+
+
+COLUMNAS_SISTEMA = ("CPU %", "Memoria RAM %", "Disco %",
+                    "Red enviados (B/s)", "Red recibidos (B/s)")
+
+def fuente_sistema(args):
+    """
+    Resumen de la máquina. El CPU % es el del intervalo entre ticks
+    (cpu_percent sin bloquear) y la red sale de un solo net_io_counters
+    por tick, restado al anterior. Son tasas, así que ejecutar() espera un
+    intervalo antes del primer tick (ver CON_REFERENCIA).
+    """
+    psutil.cpu_percent(interval=None)  # primera llamada: fija la referencia
+    previo = [psutil.net_io_counters(), time.monotonic()]
+
+    def muestra():
+        red, ahora = psutil.net_io_counters(), time.monotonic()
+        red_prev, t_prev = previo
+        dt = (ahora - t_prev) or 1.0
+        previo[0], previo[1] = red, ahora
+        fila = (
+            psutil.cpu_percent(interval=None),
+            psutil.virtual_memory().percent,
+            psutil.disk_usage('/').percent,
+            round((red.bytes_sent - red_prev.bytes_sent) / dt),
+            round((red.bytes_recv - red_prev.bytes_recv) / dt),
+        )
+        return time.time(), COLUMNAS_SISTEMA, [fila]
+    return muestra
+
+
+COLUMNAS_SESIONES = ("Usuario", "Host", "Terminal", "Inicio")
+
+def fuente_sesiones(args):
+    def muestra():
+        filas = [(u.name, u.host, u.terminal, u.started) for u in psutil.users()]
+        return time.time(), COLUMNAS_SESIONES, filas
+    return muestra
+
+
+# fuentes que miden tasas desde que se crean: el primer tick va un intervalo después
+CON_REFERENCIA = {"sistema"}
+
+FUENTES = {
+    "procesos": fuente_procesos,
+    "detalles": fuente_detalles,
+    "usuarios": fuente_usuarios,
+    "cgroups": fuente_cgroups,
+    "sistema": fuente_sistema,
+    "sesiones": fuente_sesiones,
+}
+
+# --------------------------------------------------
+# Salida
+# --------------------------------------------------
+
+class Salida:
+    """
+    Escribe un tick en el formato pedido. En csv el encabezado se escribe
+    una sola vez y cada fila lleva el timestamp del tick; en json cada tick
+    es una línea (JSON Lines), así la salida se puede seguir con tail -f.
+    """
+
+    def __init__(self, formato, flujo=None):
+        self.formato = formato
+        self.flujo = flujo or sys.stdout
+        self._csv = None
+
+    def escribir(self, timestamp, columnas, filas):
+        if self.formato == "json":
+            tick = {"timestamp": timestamp, "filas": [dict(zip(columnas, f)) for f in filas]}
+            self.flujo.write(json.dumps(tick, ensure_ascii=False) + "\n")
+
+        elif self.formato == "csv":
+            if self._csv is None:
+                self._csv = csv.writer(self.flujo)
+                self._csv.writerow(("timestamp",) + tuple(columnas))
+            self._csv.writerows((timestamp,) + tuple(f) for f in filas)
+
+        else:
+            from tabulate import tabulate  # solo hace falta para este formato
+            hora = time.strftime("%H:%M:%S", time.localtime(timestamp))
+            self.flujo.write(f"--- {hora} ---\n")
+            self.flujo.write(tabulate(filas, headers=columnas, tablefmt="fancy_grid") + "\n")
+
+        self.flujo.flush()
+
+# --------------------------------------------------
+# Bucle
+# --------------------------------------------------
+
+def ejecutar(vista, intervalo=2.0, cantidad=1, formato="table", modo=None, buscar="", flujo=None,
+             niveles=None):
+    """
+    Muestra 'cantidad' ticks de la vista (0 = sin fin), uno cada 'intervalo'
+    segundos. El intervalo se cuenta desde el inicio de cada tick, así el
+    costo de muestrear no lo va estirando. Las vistas de CON_REFERENCIA
+    esperan un intervalo antes del primero, para que sus tasas no salgan
+    en cero.
+    """
+    args = argparse.Namespace(modo=modo, buscar=buscar, niveles=niveles)
+    muestra = FUENTES[vista](args)
+    salida = Salida(formato, flujo)
+
+    n = 0
+    proximo = time.monotonic() + (intervalo if vista in CON_REFERENCIA else 0)
+    while True:
+        espera = proximo - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        else:
+            proximo = time.monotonic()  # muestreo más lento que el intervalo
+        salida.escribir(*muestra())
+        n += 1
+        if cantidad and n >= cantidad:
+            return
+        proximo += intervalo
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Administrador de tareas en modo consola")
+    parser.add_argument("vista", choices=sorted(FUENTES))
+    parser.add_argument("--interval", type=float, default=2.0,
+                        help="segundos entre ticks (default 2)")
+    parser.add_argument("--count", type=int, default=1,
+                        help="cantidad de ticks; 0 = sin fin (default 1)")
+    parser.add_argument("--format", choices=FORMATOS, default="table")
+    parser.add_argument("--buscar", default="",
+                        help='filtro de procesos/detalles, p. ej. "user:postgres cpu>20 rss>500M"')
+    parser.add_argument("--modo", choices=MODOS_BUSQUEDA, default="Nombre",
+                        help="campo sobre el que se aplica --buscar")
+    parser.add_argument("--niveles", type=int, default=None,
+                        help="cgroups: agrupar por los primeros N niveles de la ruta")
+    return parser
+
+
+def main(argv=None):
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    error = error_de_consulta(args.modo, args.buscar)
+    if error:
+        parser.error(f"--buscar: {error}")
+    try:
+        ejecutar(args.vista, args.interval, args.count, args.format, args.modo, args.buscar,
+                 niveles=args.niveles)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:  # p. ej. | head: que el flush al salir no vuelva a fallar
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
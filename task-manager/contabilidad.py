@@ -0,0 +1,190 @@
+import os, time
+
+# núcleos lógicos: el % de CPU por proceso es de un núcleo (100 = 1 núcleo)
+# y se divide por esto para llevarlo a la escala 0-100 de toda la máquina
+NUM_CPUS = os.cpu_count() or 1
+
+# --------------------------------------------------
+# Estado por proceso entre fotos
+# --------------------------------------------------
+
+class EstadoPorProceso:
+    """
+    Guarda un valor por proceso entre una foto y la siguiente, con clave
+    (pid, create_time): si el PID se reutiliza, el create_time cambia y el
+    proceso nuevo no hereda los datos del viejo.
+
+    Cada tick se marca lo que se vio con tocar(); al terminar el tick,
+    barrer() descarta lo que no apareció (procesos que terminaron).
+    """
+
+    def __init__(self):
+        self._datos = {}
+        self._vistos = set()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def obtener(self, pid, create_time):
+        return self._datos.get((pid, create_time))
+
+    def guardar(self, pid, create_time, valor):
+        clave = (pid, create_time)
+        self._datos[clave] = valor
+        self._vistos.add(clave)
+
+    def tocar(self, pid, create_time):
+        self._vistos.add((pid, create_time))
+
+    def barrer(self):
+        """
+        Descarta las entradas que no se vieron en este tick. Devuelve cuántas.
+        """
+        muertas = [clave for clave in self._datos if clave not in self._vistos]
+        for clave in muertas:
+            del self._datos[clave]
+        self._vistos = set()
+        return len(muertas)
+
+# --------------------------------------------------
+# Tasas de disco (io_counters)
+# --------------------------------------------------
+
+class TasasIO(EstadoPorProceso):
+    """
+    Convierte los contadores acumulados de /proc/<pid>/io (read_bytes,
+    write_bytes) en bytes por segundo, restando la lectura anterior del
+    mismo proceso. La primera vez que se ve un proceso su tasa es 0.
+    """
+
+    def calcular(self, pid, create_time, lectura, escritura, ahora):
+        """
+        Devuelve (lectura B/s, escritura B/s) y recuerda los contadores.
+        """
+        previo = self.obtener(pid, create_time)
+        self.guardar(pid, create_time, (lectura, escritura, ahora))
+        if previo is None:
+            return 0.0, 0.0
+        lectura_prev, escritura_prev, t_prev = previo
+        dt = ahora - t_prev
+        if dt <= 0:
+            return 0.0, 0.0
+        # un contador que baja (no debería) se trata como reinicio
+        return (max(lectura - lectura_prev, 0) / dt,
+                max(escritura - escritura_prev, 0) / dt)
+
+# --------------------------------------------------
+# CPU (cpu_times)
+# --------------------------------------------------
+
+class ContadorCPU(EstadoPorProceso):
+    """
+    Calcula el % de CPU de cada proceso a partir de su tiempo de CPU
+    acumulado (user + system), sin depender de que psutil reutilice sus
+    objetos Process.
+
+    Por proceso se guarda [segundos, instante monotónico, valor suavizado].
+    La primera vez que aparece un proceso se usa su promedio desde que
+    arrancó (segundos / edad), así ni el primer tick ni los procesos recién
+    creados salen en 0. Los procesos que no gastaron CPU y ya están en 0 no
+    se reescriben: el delta de la próxima muestra abarca todo el intervalo.
+
+    suavizado: peso del valor anterior en la media exponencial (0 = sin suavizar).
+    por_nucleo: si es False, el resultado se divide por num_cpus (0-100 de la máquina).
+    """
+
+    def __init__(self, suavizado=0.0, por_nucleo=True, num_cpus=NUM_CPUS):
+        super().__init__()
+        self.suavizado = suavizado
+        self.por_nucleo = por_nucleo
+        self.num_cpus = num_cpus
+
+    def calcular(self, pid, create_time, segundos, ahora, ahora_reloj=None):
+        """
+        segundos: tiempo de CPU acumulado; ahora: time.monotonic() del tick;
+        ahora_reloj: time.time() del tick (para la edad del proceso nuevo).
+        """
+        entrada = self.obtener(pid, create_time)
+        if entrada is None:
+            edad = (ahora_reloj or time.time()) - create_time
+            pct = segundos / edad * 100 if edad > 0 else 0.0
+            self.guardar(pid, create_time, [segundos, ahora, pct])
+            return self._escala(pct)
+
+        self.tocar(pid, create_time)
+        segundos_prev, t_prev, valor_prev = entrada
+        if segundos == segundos_prev and valor_prev == 0.0:
+            return 0.0  # sin cambios: no se toca la entrada
+
+        dt = ahora - t_prev
+        if dt <= 0:
+            return self._escala(valor_prev)
+        pct = max(segundos - segundos_prev, 0.0) / dt * 100
+        if self.suavizado:
+            pct = self.suavizado * valor_prev + (1 - self.suavizado) * pct
+            if pct < 0.05:
+                pct = 0.0  # que la cola exponencial llegue a 0 y deje de escribirse
+        entrada[0] = segundos
+        entrada[1] = ahora
+        entrada[2] = pct
+        return self._escala(pct)
+
+    def _escala(self, pct):
+        return pct if self.por_nucleo else pct / self.num_cpus
+
+# --------------------------------------------------
+# Metadatos estables (nombre, usuario)
+# --------------------------------------------------
+
+class Metadatos:
+    """
+    Atributos de un proceso que no cambian mientras vive.
+    """
+
+    __slots__ = ("nombre", "usuario")
+
+    def __init__(self, nombre, usuario):
+        self.nombre = nombre
+        self.usuario = usuario
+
+
+class CacheMetadatos(EstadoPorProceso):
+    """
+    Cache de Metadatos por (pid, create_time). En un tick estable solo se
+    leen los campos volátiles (CPU, RSS, estado); nombre y usuario se
+    buscan aquí. Lleva la cuenta de aciertos, fallos y expulsiones para
+    ver el ahorro.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsados = 0
+
+    def buscar(self, pid, create_time):
+        """
+        Devuelve los Metadatos cacheados (y los marca como vistos) o None.
+        """
+        meta = self.obtener(pid, create_time)
+        if meta is None:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+            self.tocar(pid, create_time)
+        return meta
+
+    def barrer(self):
+        muertos = super().barrer()
+        self.expulsados += muertos
+        return muertos
+
+    def estadisticas(self):
+        total = self.aciertos + self.fallos
+        return {
+            "entradas": len(self),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "expulsados": self.expulsados,
+            "tasa_aciertos": self.aciertos / total if total else 0.0,
+        }
@@ -1,14 +1,12 @@
-import psutil, platform
+import platform
 
-def mostrar_detalles():
+from consola import ejecutar
+
+def mostrar_detalles(intervalo=1.0, cantidad=1, formato="table"):
     print("\n--- Información del Sistema ---")
     print("Sistema:", platform.system())
     print("Versión:", platform.version())
     print("Arquitectura:", platform.machine())
-    print("CPU %:", psutil.cpu_percent(interval=1))
-    print("Memoria RAM %:", psutil.virtual_memory().percent)
-    print("Disco %:", psutil.disk_usage('/').percent)
-    print("Red (bytes enviados/recibidos):", psutil.net_io_counters().bytes_sent, "/", psutil.net_io_counters().bytes_recv)
+    # CPU y red son tasas: la vista sistema mide durante 'intervalo' antes de la fila
+    ejecutar("sistema", intervalo, cantidad, formato)
     print("-------------------------------\n")
-    
-    
\ No newline at end of file
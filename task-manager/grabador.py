@@ -0,0 +1,511 @@
+"""
+Grabación de fotos de procesos en disco y reproducción con mmap.
+
+Formato (little-endian, solo se agrega al final):
+
+    cabecera  "TMREC\\0" | versión H | intervalo d | cada_clave I | compresión B
+    marcos    tipo 4s | largo I | timestamp d | contenido (zlib si compresión)
+
+Tipos de marco:
+
+    STRS  cadenas nuevas de una tabla: tabla B | primer id I | cantidad I |
+          (largo H + utf-8) por cadena. Los ids son los del archivo, no los
+          del Internador que armó la foto.
+    KEYF  foto completa: n I | una columna tras otra (COLUMNAS_DISCO)
+    DELT  cambios contra el marco anterior: quitados I | pids quitados |
+          n I | columnas de las filas nuevas o que cambiaron
+
+Las columnas se guardan con ancho fijo y cuantizadas (CPU en décimas de %,
+RSS en KiB, disco en KiB/s), así un proceso quieto no cambia y no entra en
+el delta. Cada cada_clave marcos se escribe un KEYF, así reproducir
+cualquier instante cuesta a lo sumo un KEYF y cada_clave - 1 deltas.
+
+Los mismos marcos (Codificador / Decodificador) viajan por red entre el
+agente de remoto.py y sus clientes.
+
+Uso sin ventana:
+
+    python grabador.py grabar historial.tmrec --interval 1
+    python grabador.py info historial.tmrec
+"""
+import argparse, mmap, os, struct, sys, threading, time, zlib
+from array import array
+from bisect import bisect_right
+
+from snapshot import COLUMNAS, TABLAS, ProcessSnapshot
+
+MAGICO = b"TMREC\x00"
+VERSION = 2
+CABECERA = struct.Struct("<6sHdIB")
+MARCO = struct.Struct("<4sId")
+ENTERO = struct.Struct("<I")
+CADENAS_CAB = struct.Struct("<BII")
+LARGO_CADENA = struct.Struct("<H")
+
+CLAVE, DELTA, CADENAS = b"KEYF", b"DELT", b"STRS"
+
+ORDEN_TABLAS = ("nombre", "usuario", "estado")
+
+# (columna de la foto, typecode en disco, factor de cuantización)
+COLUMNAS_DISCO = (
+    ("pid", "i", None),
+    ("cpu", "H", 10),                # décimas de %
+    ("mem_pct", "H", 100),           # centésimas de %
+    ("rss", "I", 1 / 1024),          # KiB
+    ("estado", "B", None),
+    ("nombre", "I", None),
+    ("usuario", "I", None),
+    ("io_lectura", "I", 1 / 1024),   # KiB/s
+    ("io_escritura", "I", 1 / 1024),
+    ("ppid", "i", None),             # desde la versión 2
+)
+
+# columnas que trae cada versión del formato (se siguen leyendo las viejas)
+COLUMNAS_POR_VERSION = {1: COLUMNAS_DISCO[:9], 2: COLUMNAS_DISCO}
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def _a_bytes(tipo, valores):
+    arr = array(tipo, valores)
+    if _BIG_ENDIAN:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _de_bytes(tipo, datos, inicio, n):
+    arr = array(tipo)
+    fin = inicio + n * arr.itemsize
+    arr.frombytes(datos[inicio:fin])
+    if _BIG_ENDIAN:
+        arr.byteswap()
+    return arr, fin
+
+
+def _codificar_filas(filas, columnas):
+    """
+    Filas (tuplas cuantizadas) -> n + columnas de ancho fijo.
+    """
+    partes = [ENTERO.pack(len(filas))]
+    if filas:
+        for (_, tipo, _), columna in zip(columnas, zip(*filas)):
+            partes.append(_a_bytes(tipo, columna))
+    return b"".join(partes)
+
+
+def _decodificar_filas(datos, pos, columnas):
+    (n,) = ENTERO.unpack_from(datos, pos)
+    pos += ENTERO.size
+    valores = []
+    for _, tipo, _ in columnas:
+        arr, pos = _de_bytes(tipo, datos, pos, n)
+        valores.append(arr)
+    return list(zip(*valores)), pos
+
+# --------------------------------------------------
+# Codificación de fotos en marcos
+# --------------------------------------------------
+
+class Codificador:
+    """
+    Convierte fotos sucesivas en marcos del formato (STRS con las cadenas
+    nuevas, y un KEYF o un DELT contra la foto anterior). Guarda los ids de
+    cadenas ya enviados y la última foto, así que cada destino (un archivo,
+    una conexión del agente remoto) necesita su propio Codificador.
+    """
+
+    def __init__(self, columnas=COLUMNAS_DISCO, cada_clave=60, comprimir=True, ids=None):
+        self.columnas = columnas
+        self.cada_clave = cada_clave
+        self.comprimir = comprimir
+        self._ids = ids if ids is not None else {t: {} for t in ORDEN_TABLAS}  # cadena -> id
+        self._traduccion = {t: ([], None) for t in ORDEN_TABLAS}  # ids de la foto -> marcos
+        self._previo = None      # pid -> fila del último marco
+        self._desde_clave = 0
+
+    def _marco(self, tipo, timestamp, contenido):
+        if self.comprimir:
+            contenido = zlib.compress(contenido, 1)
+        return MARCO.pack(tipo, len(contenido), timestamp) + contenido
+
+    def _traducir(self, tabla, cadenas, timestamp, marcos):
+        """
+        Lista id de la foto -> id de los marcos para una tabla de cadenas,
+        agregando antes a 'marcos' un STRS con las cadenas que faltan.
+        """
+        traduccion, fuente = self._traduccion[tabla]
+        if fuente is not cadenas or len(traduccion) > len(cadenas):
+            traduccion = []  # otra tabla de cadenas (otro colector, subproceso)
+        ids = self._ids[tabla]
+        primer_id = len(ids)
+        nuevas = []
+        for cadena in cadenas[len(traduccion):]:
+            i = ids.get(cadena)
+            if i is None:
+                i = ids[cadena] = len(ids)
+                nuevas.append(cadena)
+            traduccion.append(i)
+        self._traduccion[tabla] = (traduccion, cadenas)
+
+        if nuevas:
+            partes = [CADENAS_CAB.pack(ORDEN_TABLAS.index(tabla), primer_id, len(nuevas))]
+            for cadena in nuevas:
+                codificada = cadena.encode("utf-8")[:0xFFFF]
+                partes.append(LARGO_CADENA.pack(len(codificada)) + codificada)
+            marcos.append(self._marco(CADENAS, timestamp, b"".join(partes)))
+        return traduccion
+
+    def _filas(self, snapshot, timestamp, marcos):
+        columnas = []
+        for nombre, tipo, factor in self.columnas:
+            valores = snapshot.lista(nombre)
+            if nombre in TABLAS:
+                traduccion = self._traducir(nombre, getattr(snapshot, TABLAS[nombre]),
+                                            timestamp, marcos)
+                valores = [traduccion[v] for v in valores]
+            elif factor is not None:
+                tope = (1 << (8 * array(tipo).itemsize)) - 1
+                valores = [min(int(v * factor + 0.5), tope) for v in valores]
+            columnas.append(valores)
+        return list(zip(*columnas))
+
+    def codificar(self, snapshot):
+        """
+        Bytes de todos los marcos de una foto, listos para escribir de una vez.
+        """
+        marcos = []
+        timestamp = snapshot.timestamp or time.time()
+        filas = self._filas(snapshot, timestamp, marcos)
+        actual = {fila[0]: fila for fila in filas}
+
+        previo = self._previo
+        cambiadas = quitados = None
+        if previo is not None and self._desde_clave < self.cada_clave:
+            cambiadas = [f for f in filas if previo.get(f[0]) != f]
+            quitados = [pid for pid in previo if pid not in actual]
+            if len(cambiadas) > len(filas) // 2:
+                cambiadas = None  # el delta no ahorra: mejor un marco completo
+
+        if cambiadas is None:
+            marcos.append(self._marco(CLAVE, timestamp, _codificar_filas(filas, self.columnas)))
+            self._desde_clave = 1
+        else:
+            contenido = (ENTERO.pack(len(quitados)) + _a_bytes("i", quitados)
+                         + _codificar_filas(cambiadas, self.columnas))
+            marcos.append(self._marco(DELTA, timestamp, contenido))
+            self._desde_clave += 1
+        self._previo = actual
+        return b"".join(marcos)
+
+
+def _leer_cadenas(cadenas_por_tabla, datos):
+    tabla, primer_id, cantidad = CADENAS_CAB.unpack_from(datos, 0)
+    cadenas = cadenas_por_tabla[ORDEN_TABLAS[tabla]]
+    del cadenas[primer_id:]  # por si una grabación retomada repite ids
+    pos = CADENAS_CAB.size
+    for _ in range(cantidad):
+        (largo,) = LARGO_CADENA.unpack_from(datos, pos)
+        pos += LARGO_CADENA.size
+        cadenas.append(bytes(datos[pos:pos + largo]).decode("utf-8", "replace"))
+        pos += largo
+
+
+def _aplicar(datos, clave, estado, columnas):
+    # un KEYF reemplaza el estado {pid: fila}; un DELT lo modifica
+    if clave:
+        filas, _ = _decodificar_filas(datos, 0, columnas)
+        return {f[0]: f for f in filas}
+    (n_quitados,) = ENTERO.unpack_from(datos, 0)
+    quitados, pos = _de_bytes("i", datos, ENTERO.size, n_quitados)
+    for pid in quitados:
+        estado.pop(pid, None)
+    filas, _ = _decodificar_filas(datos, pos, columnas)
+    for f in filas:
+        estado[f[0]] = f
+    return estado
+
+
+def _armar(timestamp, filas, columnas_disco, cadenas):
+    columnas = list(zip(*filas)) or [()] * len(columnas_disco)
+    cols = {}
+    for (nombre, _, factor), valores in zip(columnas_disco, columnas):
+        tipo = COLUMNAS[nombre]
+        if factor is not None:
+            if tipo in "dfF":
+                valores = [v / factor for v in valores]
+            else:
+                valores = [round(v / factor) for v in valores]
+        cols[nombre] = array(tipo, valores)
+    for nombre, tipo in COLUMNAS.items():
+        if nombre not in cols:
+            cols[nombre] = array(tipo, bytes(array(tipo).itemsize * len(cols["pid"])))
+    return ProcessSnapshot(timestamp, cols, cadenas["nombre"], cadenas["usuario"],
+                           cadenas["estado"])
+
+
+class Decodificador:
+    """
+    Lo inverso del Codificador para un flujo leído en orden (una conexión
+    remota): aplicar() recibe cada marco y devuelve la foto armada con los
+    KEYF y DELT, o None con los STRS.
+    """
+
+    def __init__(self, columnas=COLUMNAS_DISCO, comprimir=True):
+        self.columnas = columnas
+        self.comprimir = comprimir
+        self.cadenas = {t: [] for t in ORDEN_TABLAS}
+        self._estado = None
+
+    def aplicar(self, tipo, timestamp, contenido):
+        if self.comprimir:
+            contenido = zlib.decompress(contenido)
+        if tipo == CADENAS:
+            _leer_cadenas(self.cadenas, contenido)
+            return None
+        if tipo == DELTA and self._estado is None:
+            raise ValueError("DELT sin un KEYF anterior")
+        if tipo not in (CLAVE, DELTA):
+            raise ValueError(f"marco desconocido {tipo!r}")
+        self._estado = _aplicar(contenido, tipo == CLAVE, self._estado, self.columnas)
+        return _armar(timestamp, self._estado.values(), self.columnas, self.cadenas)
+
+# --------------------------------------------------
+# Grabación
+# --------------------------------------------------
+
+class Grabador:
+    """
+    Agrega cada foto que recibe grabar() al archivo. Si el archivo ya
+    existe se sigue grabando al final (se recuperan sus tablas de cadenas
+    y se descarta un marco cortado a medias).
+
+    grabar() se puede llamar desde el hilo del colector: solo toma un lock
+    propio y hace una escritura por foto.
+    """
+
+    def __init__(self, ruta, intervalo=1.0, cada_clave=60, comprimir=True):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self.marcos = 0
+        self.bytes_escritos = 0
+
+        if os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+            with Reproductor(ruta) as existente:
+                # se sigue en la versión y con los ids de cadenas del archivo
+                ids = {t: {c: i for i, c in enumerate(existente.cadenas[t])} for t in ORDEN_TABLAS}
+                self.codificador = Codificador(existente.columnas, existente.cada_clave,
+                                               existente.comprimir, ids)
+                fin = existente.fin
+            os.truncate(ruta, fin)
+            self._archivo = open(ruta, "ab")
+        else:
+            self.codificador = Codificador(COLUMNAS_DISCO, cada_clave, comprimir)
+            self._archivo = open(ruta, "wb")
+            self._escribir(CABECERA.pack(MAGICO, VERSION, intervalo, cada_clave, int(comprimir)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        with self._lock:
+            if not self._archivo.closed:
+                self._archivo.close()
+
+    def _escribir(self, datos):
+        self._archivo.write(datos)
+        self.bytes_escritos += len(datos)
+
+    def grabar(self, snapshot):
+        with self._lock:
+            if self._archivo.closed:
+                return
+            self._escribir(self.codificador.codificar(snapshot))
+            self._archivo.flush()  # que un Reproductor abierto vea el marco
+            self.marcos += 1
+
+# --------------------------------------------------
+# Reproducción
+# --------------------------------------------------
+
+class Reproductor:
+    """
+    Lee una grabación con mmap: al abrir solo se recorren las cabeceras de
+    los marcos (índice de tiempos y posiciones) y las tablas de cadenas; el
+    contenido de cada marco se lee y descomprime recién cuando se pide una
+    foto de ese instante.
+
+    foto(k) reconstruye desde el KEYF anterior, o desde la última foto
+    pedida si está entre ese KEYF y k, así avanzar de a un marco cuesta un
+    solo delta.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = open(ruta, "rb")
+        self._mm = None
+        self.cadenas = {t: [] for t in ORDEN_TABLAS}
+        self.tiempos = array("d")
+        self._posiciones = array("Q")   # inicio de cada marco de fotos
+        self._claves = array("I")       # índice del KEYF del que depende cada marco
+        self._estado = None             # (k, {pid: fila}) de la última foto
+        self.fin = CABECERA.size        # fin del último marco completo
+
+        self._mapear()
+        if len(self._mm) < CABECERA.size:
+            raise ValueError(f"{ruta}: no es una grabación")
+        magico, version, self.intervalo, self.cada_clave, comprimir = CABECERA.unpack_from(self._mm, 0)
+        if magico != MAGICO or version not in COLUMNAS_POR_VERSION:
+            raise ValueError(f"{ruta}: no es una grabación (o es de otra versión)")
+        self.columnas = COLUMNAS_POR_VERSION[version]
+        self.comprimir = bool(comprimir)
+        self._indexar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def __len__(self):
+        return len(self.tiempos)
+
+    def cerrar(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._mm = None
+        self._archivo.close()
+
+    def _mapear(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        tam = os.fstat(self._archivo.fileno()).st_size
+        self._mm = mmap.mmap(self._archivo.fileno(), tam, access=mmap.ACCESS_READ) if tam else b""
+
+    def recargar(self):
+        """
+        Vuelve a mapear el archivo e indexa los marcos agregados desde la
+        última vez (para seguir una grabación en curso). Devuelve cuántos.
+        """
+        antes = len(self)
+        self._mapear()
+        self._indexar()
+        return len(self) - antes
+
+    def _contenido(self, pos):
+        _, largo, _ = MARCO.unpack_from(self._mm, pos)
+        inicio = pos + MARCO.size
+        datos = self._mm[inicio:inicio + largo]
+        return zlib.decompress(datos) if self.comprimir else datos
+
+    def _indexar(self):
+        mm = self._mm
+        pos = self.fin
+        while pos + MARCO.size <= len(mm):
+            tipo, largo, timestamp = MARCO.unpack_from(mm, pos)
+            if pos + MARCO.size + largo > len(mm):
+                break  # marco a medio escribir
+            if tipo == CADENAS:
+                _leer_cadenas(self.cadenas, self._contenido(pos))
+            elif tipo in (CLAVE, DELTA):
+                if tipo == CLAVE or not self._claves:
+                    clave = len(self.tiempos)
+                else:
+                    clave = self._claves[-1]
+                self.tiempos.append(timestamp)
+                self._posiciones.append(pos)
+                self._claves.append(clave)
+            else:
+                raise ValueError(f"{self.ruta}: marco desconocido {tipo!r} en {pos}")
+            pos += MARCO.size + largo
+        self.fin = pos
+
+    def _aplicar(self, k, estado):
+        return _aplicar(self._contenido(self._posiciones[k]), self._claves[k] == k, estado,
+                        self.columnas)
+
+    def indice_en(self, timestamp):
+        """
+        Índice del último marco con tiempo <= timestamp (0 si es anterior a todos).
+        """
+        return max(bisect_right(self.tiempos, timestamp) - 1, 0)
+
+    def foto(self, k):
+        """
+        ProcessSnapshot del marco k.
+        """
+        if not 0 <= k < len(self):
+            raise IndexError(k)
+        clave = self._claves[k]
+        if self._estado is not None and clave <= self._estado[0] <= k:
+            desde, estado = self._estado[0] + 1, self._estado[1]
+        else:
+            desde, estado = clave, {}
+        for j in range(desde, k + 1):
+            estado = self._aplicar(j, estado)
+        self._estado = (k, estado)
+        return self._armar(self.tiempos[k], estado.values())
+
+    def _armar(self, timestamp, filas):
+        return _armar(timestamp, filas, self.columnas, self.cadenas)
+
+# --------------------------------------------------
+# Línea de comandos
+# --------------------------------------------------
+
+def _grabar(args):
+    from colector import obtener_procesos_snapshot
+
+    with Grabador(args.archivo, args.interval, args.cada_clave, not args.sin_compresion) as grabador:
+        n = 0
+        proximo = time.monotonic()
+        try:
+            while not args.count or n < args.count:
+                grabador.grabar(obtener_procesos_snapshot())
+                n += 1
+                proximo += args.interval
+                time.sleep(max(proximo - time.monotonic(), 0))
+        except KeyboardInterrupt:
+            pass
+        print(f"{grabador.marcos} marcos, {grabador.bytes_escritos / 1024:.1f} KiB escritos")
+
+
+def _info(args):
+    with Reproductor(args.archivo) as rep:
+        claves = sum(1 for k, c in enumerate(rep._claves) if k == c)
+        tam = os.path.getsize(args.archivo)
+        print(f"marcos: {len(rep)} ({claves} completos), intervalo {rep.intervalo} s")
+        if len(rep):
+            inicio = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(rep.tiempos[0]))
+            fin = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(rep.tiempos[-1]))
+            print(f"desde {inicio} hasta {fin}")
+            print(f"procesos en el último marco: {len(rep.foto(len(rep) - 1))}")
+        print(f"tamaño: {tam / 1024:.1f} KiB ({tam / max(len(rep), 1):.0f} B por marco)")
+        print(f"cadenas: " + ", ".join(f"{t} {len(c)}" for t, c in rep.cadenas.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grabación de procesos en disco")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("grabar", help="graba fotos de procesos en un archivo")
+    p.add_argument("archivo")
+    p.add_argument("--interval", type=float, default=1.0)
+    p.add_argument("--count", type=int, default=0, help="0 = sin fin")
+    p.add_argument("--cada-clave", type=int, default=60, help="marcos entre fotos completas")
+    p.add_argument("--sin-compresion", action="store_true")
+    p.set_defaults(funcion=_grabar)
+
+    p = sub.add_parser("info", help="resumen de una grabación")
+    p.add_argument("archivo")
+    p.set_defaults(funcion=_info)
+
+    args = parser.parse_args(argv)
+    args.funcion(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
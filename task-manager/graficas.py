@@ -0,0 +1,172 @@
+from collections import deque
+
+# --------------------------------------------------
+# Gráfica de línea incremental sobre un Canvas
+# --------------------------------------------------
+
+COLORES = {
+    "light": {"fondo": "#ffffff", "rejilla": "#e0e0e0", "texto": "#000000"},
+    "dark": {"fondo": "#252526", "rejilla": "#3c3c3c", "texto": "#f0f0f0"},
+}
+
+MARGEN = 4
+ALTO_TITULO = 18
+
+
+def formato_porcentaje(valor):
+    return f"{valor:.1f} %"
+
+
+def formato_tasa(valor):
+    for unidad in ("B/s", "KB/s", "MB/s"):
+        if valor < 1024:
+            return f"{valor:.1f} {unidad}"
+        valor /= 1024
+    return f"{valor:.1f} GB/s"
+
+
+class Grafica:
+    """
+    Dibuja un Anillo (historial.py) como una línea sobre un tk.Canvas.
+
+    La línea es un item por segmento. En cada tick normal solo cambia el
+    extremo derecho: se corre toda la serie un paso a la izquierda con un
+    solo canvas.move (por tag), se crea el segmento nuevo y se borra el que
+    salió por la izquierda; son tres llamadas a Tk sin importar cuántas
+    muestras haya. Todo se redibuja solo al cambiar de serie, tamaño, tema
+    o escala, o si se saltó más de una muestra.
+
+    escala: valor del borde superior (100 para porcentajes). Con
+    adaptable=True la escala sigue al máximo de la serie (para tasas).
+    """
+
+    def __init__(self, canvas, titulo, color="#0078d7", escala=100.0,
+                 adaptable=False, formato=formato_porcentaje, tema="light"):
+        self.canvas = canvas
+        self.titulo = titulo
+        self.color = color
+        self.escala_base = escala
+        self.escala = escala
+        self.adaptable = adaptable
+        self.formato = formato
+        self.tema = tema
+        self.anillo = None
+        self._segmentos = deque()
+        self._dibujadas = 0   # anillo.total al último dibujo
+        self._ancho = self._alto = 0
+        self._etiqueta = None
+        canvas.bind("<Configure>", self._al_redimensionar, add="+")
+
+    # ---- configuración ----
+
+    def mostrar(self, anillo, titulo=None):
+        """
+        Cambia la serie que se dibuja (None = vacía).
+        """
+        self.anillo = anillo
+        if titulo is not None:
+            self.titulo = titulo
+        self.escala = self.escala_base
+        self.redibujar()
+
+    def set_tema(self, tema):
+        self.tema = tema
+        self.redibujar()
+
+    def _al_redimensionar(self, event):
+        if (event.width, event.height) != (self._ancho, self._alto):
+            self._ancho, self._alto = event.width, event.height
+            self.redibujar()
+
+    # ---- geometría ----
+
+    def _paso(self):
+        capacidad = self.anillo.capacidad if self.anillo is not None else 2
+        return (self._ancho - 2 * MARGEN) / max(capacidad - 1, 1)
+
+    def _y(self, valor):
+        alto_util = self._alto - ALTO_TITULO - MARGEN
+        fraccion = min(max(valor / self.escala, 0.0), 1.0) if self.escala else 0.0
+        return self._alto - MARGEN - fraccion * alto_util
+
+    def _ajustar_escala(self):
+        """
+        Para series adaptables: sube la escala si el último valor no entra y
+        la baja si el máximo quedó muy por debajo. Devuelve True si cambió.
+        """
+        if not self.adaptable or self.anillo is None:
+            return False
+        ultimo = self.anillo.ultimo() or 0.0
+        if ultimo <= self.escala and self.anillo.total % 16:
+            return False  # el máximo solo se recalcula cada 16 muestras
+        maximo = max(self.anillo.maximo(), ultimo)
+        escala = self.escala_base
+        while escala < maximo:
+            escala *= 2
+        if escala != self.escala:
+            self.escala = escala
+            return True
+        return False
+
+    # ---- dibujo ----
+
+    def redibujar(self):
+        c = self.canvas
+        colores = COLORES[self.tema]
+        c.delete("all")
+        self._segmentos.clear()
+        c.configure(bg=colores["fondo"])
+
+        if self._ancho <= 1 or self._alto <= 1:
+            self._dibujadas = self.anillo.total if self.anillo is not None else 0
+            return  # todavía no tiene tamaño
+
+        for k in range(1, 4):
+            y = self._y(self.escala * k / 4)
+            c.create_line(MARGEN, y, self._ancho - MARGEN, y, fill=colores["rejilla"])
+        c.create_text(MARGEN, 2, anchor="nw", text=self.titulo, fill=colores["texto"])
+        self._etiqueta = c.create_text(self._ancho - MARGEN, 2, anchor="ne", fill=colores["texto"])
+
+        if self.anillo is None:
+            self._dibujadas = 0
+            return
+        self._ajustar_escala()
+        valores = self.anillo.valores()
+        paso = self._paso()
+        x0 = self._ancho - MARGEN - (len(valores) - 1) * paso
+        for k in range(1, len(valores)):
+            self._segmentos.append(c.create_line(
+                x0 + (k - 1) * paso, self._y(valores[k - 1]),
+                x0 + k * paso, self._y(valores[k]),
+                fill=self.color, width=2, tags=("serie",)))
+        self._rotular()
+        self._dibujadas = self.anillo.total
+
+    def avanzar(self):
+        """
+        Dibuja las muestras agregadas desde la última llamada.
+        """
+        a = self.anillo
+        if a is None or a.total == self._dibujadas:
+            return
+        if a.total - self._dibujadas > 1 or self._ancho <= 1 or self._ajustar_escala():
+            self.redibujar()
+            return
+
+        c = self.canvas
+        if len(a) >= 2:
+            paso = self._paso()
+            x = self._ancho - MARGEN
+            c.move("serie", -paso, 0)
+            self._segmentos.append(c.create_line(
+                x - paso, self._y(a.ultimo(1)), x, self._y(a.ultimo()),
+                fill=self.color, width=2, tags=("serie",)))
+            while len(self._segmentos) > a.capacidad - 1:
+                c.delete(self._segmentos.popleft())
+        self._rotular()
+        self._dibujadas = a.total
+
+    def _rotular(self):
+        ultimo = self.anillo.ultimo()
+        if self._etiqueta is not None and ultimo is not None:
+            self.canvas.itemconfigure(self._etiqueta, text=self.formato(ultimo))
@@ -0,0 +1,196 @@
+from array import array
+import time
+
+import psutil
+
+# --------------------------------------------------
+# Buffer circular de tamaño fijo
+# --------------------------------------------------
+
+class Anillo:
+    """
+    Últimas 'capacidad' muestras de una serie, en un array reservado de
+    una vez ('f' por defecto, 'd' para tiempos): agregar no reserva memoria
+    y lo más viejo se pisa.
+
+    total cuenta todas las muestras agregadas desde el principio, así una
+    gráfica sabe cuántas le faltan dibujar.
+    """
+
+    def __init__(self, capacidad, tipo="f"):
+        self.capacidad = capacidad
+        self._datos = array(tipo, bytes(array(tipo).itemsize * capacidad))
+        self._pos = 0   # próxima posición a escribir
+        self._n = 0
+        self.total = 0
+
+    def __len__(self):
+        return self._n
+
+    def agregar(self, valor):
+        self._datos[self._pos] = valor
+        self._pos = (self._pos + 1) % self.capacidad
+        if self._n < self.capacidad:
+            self._n += 1
+        self.total += 1
+
+    def ultimo(self, atras=0):
+        """
+        Muestra más nueva (atras=0), la anterior (atras=1), ... o None.
+        """
+        if atras >= self._n:
+            return None
+        return self._datos[(self._pos - 1 - atras) % self.capacidad]
+
+    def valores(self):
+        """
+        Muestras de la más vieja a la más nueva.
+        """
+        if self._n < self.capacidad:
+            return self._datos[:self._n].tolist()
+        return (self._datos[self._pos:] + self._datos[:self._pos]).tolist()
+
+    def maximo(self):
+        return max(self._datos[:self._n]) if self._n else 0.0
+
+    def bytes_usados(self):
+        return self._datos.buffer_info()[1] * self._datos.itemsize
+
+    def redimensionar(self, capacidad):
+        """
+        Cambia la retención conservando las muestras más nuevas que entren.
+        """
+        viejos = self.valores()[-capacidad:]
+        self.capacidad = capacidad
+        tipo = self._datos.typecode
+        self._datos = array(tipo, bytes(array(tipo).itemsize * capacidad))
+        self._datos[:len(viejos)] = array(tipo, viejos)
+        self._n = len(viejos)
+        self._pos = self._n % capacidad
+
+# --------------------------------------------------
+# Muestras del sistema
+# --------------------------------------------------
+
+class MuestreadorSistema:
+    """
+    CPU y RAM de toda la máquina, y tasas de disco y red calculadas contra
+    la muestra anterior (un solo disk_io_counters y net_io_counters por
+    llamada). cpu_percent no bloquea: mide desde la llamada anterior.
+    """
+
+    def __init__(self):
+        psutil.cpu_percent(interval=None)  # fija la referencia del primer delta
+        self._disco = self._leer_disco()
+        self._red = psutil.net_io_counters()
+        self._t = time.monotonic()
+
+    @staticmethod
+    def _leer_disco():
+        try:
+            return psutil.disk_io_counters()
+        except Exception:
+            return None  # sin discos visibles (contenedores)
+
+    def muestrear(self):
+        """
+        Devuelve {"cpu", "ram"} en % y {"disco", "red_tx", "red_rx"} en B/s.
+        """
+        ahora = time.monotonic()
+        disco, red = self._leer_disco(), psutil.net_io_counters()
+        dt = (ahora - self._t) or 1.0
+
+        if disco is not None and self._disco is not None:
+            bytes_disco = (disco.read_bytes - self._disco.read_bytes
+                           + disco.write_bytes - self._disco.write_bytes)
+        else:
+            bytes_disco = 0
+        muestra = {
+            "cpu": psutil.cpu_percent(interval=None),
+            "ram": psutil.virtual_memory().percent,
+            "disco": max(bytes_disco, 0) / dt,
+            "red_tx": max(red.bytes_sent - self._red.bytes_sent, 0) / dt,
+            "red_rx": max(red.bytes_recv - self._red.bytes_recv, 0) / dt,
+        }
+        self._disco, self._red, self._t = disco, red, ahora
+        return muestra
+
+# --------------------------------------------------
+# Historial de sistema y de procesos seguidos
+# --------------------------------------------------
+
+SERIES_SISTEMA = ("cpu", "ram", "disco", "red")
+SERIES_PROCESO = ("cpu", "mem_pct", "disco", "red")
+
+
+class Historial:
+    """
+    Series de tiempo en memoria fija: una por métrica de sistema y, para
+    los procesos que se siguen (seguir), una por métrica de proceso.
+
+    Cada registrar() agrega una muestra a todas las series, así todas
+    comparten el mismo eje de tiempo. Un proceso seguido que desaparece de
+    la foto deja de seguirse. Los procesos seguidos se limitan a
+    max_procesos para que la memoria no dependa de la cantidad de procesos.
+    """
+
+    def __init__(self, capacidad=300, max_procesos=8):
+        self.capacidad = capacidad
+        self.max_procesos = max_procesos
+        self.tiempos = Anillo(capacidad, "d")
+        self.sistema = {s: Anillo(capacidad) for s in SERIES_SISTEMA}
+        self.procesos = {}  # pid -> {serie: Anillo}
+
+    def seguir(self, pid):
+        if pid in self.procesos:
+            return
+        if len(self.procesos) >= self.max_procesos:
+            del self.procesos[next(iter(self.procesos))]  # el más viejo
+        self.procesos[pid] = {s: Anillo(self.capacidad) for s in SERIES_PROCESO}
+
+    def dejar(self, pid):
+        self.procesos.pop(pid, None)
+
+    def registrar(self, snapshot, sistema):
+        """
+        Agrega una muestra: 'sistema' es lo que devuelve
+        MuestreadorSistema.muestrear(), y de la foto se toman los procesos
+        seguidos.
+        """
+        self.tiempos.agregar(snapshot.timestamp or time.time())
+        self.sistema["cpu"].agregar(sistema["cpu"])
+        self.sistema["ram"].agregar(sistema["ram"])
+        self.sistema["disco"].agregar(sistema["disco"])
+        self.sistema["red"].agregar(sistema["red_tx"] + sistema["red_rx"])
+
+        if not self.procesos:
+            return
+        tiene_red = snapshot.tiene("red_rx")
+        for pid in list(self.procesos):
+            i = snapshot.indice_de(pid)
+            if i is None:
+                del self.procesos[pid]  # terminó
+                continue
+            series = self.procesos[pid]
+            series["cpu"].agregar(snapshot.valor("cpu", i))
+            series["mem_pct"].agregar(snapshot.valor("mem_pct", i))
+            series["disco"].agregar(snapshot.valor("io_lectura", i) + snapshot.valor("io_escritura", i))
+            series["red"].agregar(snapshot.valor("red_rx", i) + snapshot.valor("red_tx", i)
+                                  if tiene_red else 0.0)
+
+    def redimensionar(self, capacidad):
+        """
+        Cambia la retención de todas las series.
+        """
+        self.capacidad = capacidad
+        self.tiempos.redimensionar(capacidad)
+        for a in self.sistema.values():
+            a.redimensionar(capacidad)
+        for series in self.procesos.values():
+            for a in series.values():
+                a.redimensionar(capacidad)
+
+    def bytes_usados(self):
+        anillos = [self.tiempos, *self.sistema.values(),
+                   *(a for series in self.procesos.values() for a in series.values())]
+        return sum(a.bytes_usados() for a in anillos)
@@ -1,326 +1,238 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import psutil, sys
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import psutil, time
+
+from arbol import IndiceArbol
+from busqueda import error_de_consulta
+from cgroups import MonitorCgroupfs
+from colector import Colector, estadisticas_cache
+from contabilidad import NUM_CPUS
+from grabador import Grabador, Reproductor
+from graficas import Grafica, formato_tasa
+from historial import Historial, MuestreadorSistema
+from perfil import perfil
+from planificador import Planificador
+from remoto import ClienteRemoto
+from snapshot import ProcessSnapshot
+from tabla import Tabla, TablaArbol
+from terminador import Terminador
+from unidades import ES_WINDOWS, MonitorServicios, accion_servicio
+from vistas import (
+    COLUMNAS_ARBOL, COLUMNAS_CGROUPS, COLUMNAS_DETALLES, COLUMNAS_PROCESOS, COLUMNAS_SERVICIOS,
+    COLUMNAS_USUARIOS, NUMERICAS_ARBOL, NUMERICAS_CGROUPS, NUMERICAS_DETALLES, NUMERICAS_PROCESOS,
+    NUMERICAS_SERVICIOS, NUMERICAS_USUARIOS, TopN, filas_cgroups, filas_detalles, filas_procesos,
+    filas_servicios, filas_usuarios, nodos_arbol,
+)
 
 # --------------------------------------------------
 # Utilidades
 # --------------------------------------------------
 
-def limpiar_tree(tree):
-    for row in tree.get_children():
-        tree.delete(row)
-
-NUM_CPUS = psutil.cpu_count(logical=True) or 1
-
 # control de actualización automática y último snapshot
 auto_update = True
-last_snapshot = []
-
-def obtener_procesos_snapshot():
+last_snapshot = ProcessSnapshot.vacio()
+snapshot_version = 0  # versión ya recogida del origen mostrado (colector o agente)
+historial_version = 0  # versión del colector ya registrada en el historial
+vista_version = 0     # sube cada vez que cambia last_snapshot (en vivo o grabación) o el historial
+
+# el muestreo de procesos corre fuera del hilo de Tk
+INTERVALO_MUESTREO = 2.0  # segundos entre fotos
+POLL_MS = 200  # cada cuánto la interfaz revisa si hay una foto nueva
+DEBOUNCE_MS = 150  # pausa de tecleo antes de re-filtrar
+colector = Colector(intervalo=INTERVALO_MUESTREO)
+
+# qué pestaña se redibuja y cada cuánto; el intervalo del colector se ajusta
+# para que muestrear no use más de PRESUPUESTO_CPU de un núcleo
+PRESUPUESTOS_CPU = {"2 %": 0.02, "5 %": 0.05, "10 %": 0.10, "25 %": 0.25}
+PRESUPUESTO_INICIAL = "5 %"
+INTERVALOS_PESTANA = {"Automático": None, "1 s": 1.0, "2 s": 2.0, "5 s": 5.0,
+                      "10 s": 10.0, "30 s": 30.0}
+planificador = Planificador(presupuesto_cpu=PRESUPUESTOS_CPU[PRESUPUESTO_INICIAL],
+                            intervalo_minimo=INTERVALO_MUESTREO)
+
+# historial para la pestaña Rendimiento: memoria fija según la retención
+RETENCIONES = {"1 min": 60, "5 min": 300, "15 min": 900, "1 h": 3600}
+RETENCION_INICIAL = "5 min"
+historial = Historial(capacidad=int(RETENCIONES[RETENCION_INICIAL] / colector.intervalo))
+muestreador_sistema = MuestreadorSistema()
+pid_seguido = None  # proceso graficado en Rendimiento
+
+# relación padre -> hijos para la vista de árbol (se mantiene entre fotos)
+indice_arbol = IndiceArbol()
+
+# finalizar procesos sin bloquear la interfaz: los lotes corren en otro hilo
+terminador = Terminador()
+
+# agentes remotos (remoto.py): la vista puede mostrar las fotos de otro equipo
+ORIGEN_LOCAL = "Local"
+remotos = ClienteRemoto()
+
+def origen_remoto():
     """
-    Toma una 'foto' de todos los procesos con todos los datos que necesitamos.
-    Así evitamos recorrer la lista de procesos varias veces.
+    Dirección del agente que se está mostrando, o None si es este equipo.
     """
-    snapshot = []
-    for proc in psutil.process_iter(
-        ['pid', 'name', 'cpu_percent', 'memory_percent',
-         'status', 'username', 'memory_info']
-    ):
-        try:
-            snapshot.append(proc.info)
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            continue
-    return snapshot
+    origen = origen_var.get()
+    return None if origen == ORIGEN_LOCAL else origen
+
+# Top N en Procesos y Detalles: solo las primeras filas según la columna de orden
+top_n_proc = TopN()
+top_n_det = TopN()
 
-def pasa_filtro(info, modo, query):
+def top_de(tabla, top):
     """
-    Aplica filtro por Nombre / PID / Estado / Usuario a un diccionario info de proceso.
-    Se usa en pestañas Procesos y Detalles.
+    El TopN de la tabla con su orden actual, o None si el modo está apagado.
+    Sin orden activo, el Top N es por CPU % de mayor a menor.
     """
-    if not query:
-        return True  # sin filtro
-
-    q = query.strip()
-    if not q:
-        return True
-
-    modo = (modo or "Nombre").lower()
-
-    if modo == "nombre":
-        nombre = str(info.get("name", "")).lower()
-        return q.lower() in nombre
-
-    elif modo == "pid":
-        pid_str = str(info.get("pid", ""))
-        return pid_str.startswith(q)
-
-    elif modo == "estado":
-        estado = str(info.get("status", "")).lower()
-        return q.lower() in estado
-
-    elif modo == "usuario":
-        usuario = str(info.get("username", "")).lower()
-        return q.lower() in usuario
-
-    return True
-
-# ---- Ordenar columnas ----
-
-def _to_number(val):
-    try:
-        s = str(val).replace("%", "").replace(",", ".").strip()
-        return float(s)
-    except Exception:
-        return 0.0
-
-def sort_treeview(tree, col, reverse, numeric=False):
-    # obtener pares (valor, item_id)
-    data = [(tree.set(k, col), k) for k in tree.get_children("")]
-    if numeric:
-        data.sort(key=lambda t: _to_number(t[0]), reverse=reverse)
-    else:
-        data.sort(key=lambda t: str(t[0]).lower(), reverse=reverse)
-
-    for index, (_, k) in enumerate(data):
-        tree.move(k, "", index)
-
-    # toggle al siguiente click
-    tree.heading(col, command=lambda: sort_treeview(tree, col, not reverse, numeric))
+    if not top_activo.get():
+        return None
+    if tabla.orden_col is None:
+        tabla.ordenar_por("CPU %", desc=True)
+    top.n = int(top_n_var.get())
+    top.columna = tabla.columnas[tabla.orden_col]
+    top.desc = tabla.orden_desc
+    return top
+
+def texto_top(top):
+    if top is None:
+        return ""
+    return f"Top {top.n}: {top.ocultos} de {top.total} procesos ocultos"
 
 # --------------------------------------------------
 # PROCESOS (pestaña Procesos)
 # --------------------------------------------------
 
-def mostrar_procesos(tree, snapshot, search_mode_var, search_query_var):
-    # Guardar selección actual (PID) para no perderla al refrescar
-    sel = tree.selection()
-    selected_pid = None
-    if sel:
-        try:
-            selected_pid = int(tree.item(sel[0])["values"][0])
-        except Exception:
-            selected_pid = None
-
-    limpiar_tree(tree)
-    item_to_select = None
-
-    modo = search_mode_var.get()
-    query = search_query_var.get()
+@perfil.cronometrar("mostrar_procesos")
+def mostrar_procesos(tabla, snapshot, search_mode_var, search_query_var):
+    # La Tabla conserva los iid por PID, así la selección no se pierde al refrescar
+    top = top_de(tabla, top_n_proc)
+    tabla.actualizar(filas_procesos(snapshot, search_mode_var.get(), search_query_var.get(), top))
+    lbl_top_proc.config(text=texto_top(top))
 
-    for info in snapshot:
-        try:
-            if not pasa_filtro(info, modo, query):
-                continue
-
-            pid = info['pid']
-            nombre = info['name']
-            cpu = info.get('cpu_percent') or 0.0
-            mem_pct = info.get('memory_percent') or 0.0
-
-            iid = tree.insert(
-                "",
-                "end",
-                values=(
-                    pid,
-                    nombre,
-                    round(cpu, 1),
-                    round(mem_pct, 2)
-                )
-            )
-            if selected_pid is not None and pid == selected_pid:
-                item_to_select = iid
-        except Exception:
-            continue
 
-    # Reseleccionar el proceso que estaba marcado antes del refresh
-    if item_to_select:
-        tree.selection_set(item_to_select)
+@perfil.cronometrar("mostrar_arbol")
+def mostrar_arbol(tabla, indice, snapshot, search_mode_var, search_query_var):
+    # solo se tocan los PIDs que nacieron, murieron o cambiaron de padre
+    indice.actualizar(snapshot)
+    tabla.actualizar(*nodos_arbol(snapshot, indice, search_mode_var.get(), search_query_var.get()))
 
 
-def terminar_proceso(tree, pid_col_index=0):
-    sel = tree.selection()
-    if not sel:
-        messagebox.showinfo("Información", "Seleccione un proceso para finalizar.")
+def finalizar_seleccion(tabla, arbol=False):
+    """
+    Finaliza los procesos seleccionados en la tabla (varios a la vez; en
+    modo virtual también los seleccionados fuera de la ventana visible) y,
+    con arbol=True, todos sus descendientes. Tras confirmar, el lote pasa al
+    Terminador y el resultado aparece luego en la barra de estado.
+    """
+    if origen_remoto() is not None:
+        messagebox.showinfo("Información", "Solo se pueden finalizar procesos de este equipo.")
         return
-
-    try:
-        values = tree.item(sel[0])["values"]
-        pid = int(values[pid_col_index])  # PID en la columna indicada
-    except Exception:
-        messagebox.showerror("Error", "No se pudo obtener el PID del proceso seleccionado.")
+    if reproductor is not None:
+        # los PIDs son de la grabación: hoy pueden ser otros procesos
+        messagebox.showinfo("Información", "No se pueden finalizar procesos de una grabación.")
+        return
+    pids = sorted(tabla.seleccion)
+    if not pids:
+        messagebox.showinfo("Información", "Seleccione uno o más procesos para finalizar.")
         return
 
-    if not messagebox.askyesno("Confirmar", f"¿Finalizar proceso con PID {pid}?"):
+    if len(pids) == 1:
+        i = last_snapshot.indice_de(pids[0])
+        nombre = f"{last_snapshot.nombre(i)} (PID {pids[0]})" if i is not None else f"PID {pids[0]}"
+    else:
+        nombre = f"{len(pids)} procesos"
+    if arbol:
+        indice_arbol.actualizar(last_snapshot)
+        descendientes = set()
+        for pid in pids:
+            descendientes.update(indice_arbol.descendientes(pid))
+        descendientes.difference_update(pids)
+        pregunta = f"¿Finalizar {nombre} y sus {len(descendientes)} procesos descendientes?"
+    else:
+        pregunta = f"¿Finalizar {nombre}?"
+    if not messagebox.askyesno("Confirmar", pregunta):
         return
 
-    try:
-        p = psutil.Process(pid)
-        p.terminate()
-        try:
-            p.wait(timeout=3)
-        except psutil.TimeoutExpired:
-            p.kill()
-        messagebox.showinfo("Hecho", f"Se finalizó el proceso {pid}.")
-    except psutil.NoSuchProcess:
-        messagebox.showinfo("Información", "El proceso ya no existe.")
-    except psutil.AccessDenied:
-        messagebox.showerror(
-            "Acceso denegado",
-            "No se tienen permisos para finalizar este proceso.\n"
-            "Ejecuta el programa como Administrador si es necesario."
-        )
-    except Exception as e:
-        messagebox.showerror("Error", f"Error al finalizar el proceso:\n{e}")
+    terminador.pedir(pids, arbol=arbol)
+    lbl_acciones.config(text=f"Finalizando {nombre}...")
+
+
+def revisar_terminador():
+    for resultado in terminador.resultados():
+        lbl_acciones.config(text=resultado.texto())
 
 # --------------------------------------------------
 # USUARIOS (tipo pestaña Users de Windows)
 # --------------------------------------------------
 
-def mostrar_usuarios(tree, snapshot):
+@perfil.cronometrar("mostrar_usuarios")
+def mostrar_usuarios(tabla, snapshot):
     """
-    Usuarios tipo Task Manager:
-    Usuario | Estado | CPU % | Memoria (MB) | Disco | Red
-    Agrupa por nombre de usuario de los procesos (username) y
-    normaliza el CPU % para que esté entre 0 y 100 aprox.
+    Usuarios tipo Task Manager: agrupa por nombre de usuario de los procesos
+    (username) y normaliza el CPU % para que esté entre 0 y 100 aprox.
     """
-    limpiar_tree(tree)
-
-    stats = {}  # {username: {"cpu_raw": float, "mem": int_bytes}}
+    tabla.actualizar(filas_usuarios(snapshot, NUM_CPUS))
 
-    for info in snapshot:
-        try:
-            user = info.get('username') or "Desconocido"
-            cpu_raw = info.get('cpu_percent') or 0.0
-            meminfo = info.get('memory_info')
-            mem = meminfo.rss if meminfo else 0
 
-            if user not in stats:
-                stats[user] = {"cpu_raw": 0.0, "mem": 0}
+# GRUPOS (cgroups: contenedores, slices, servicios)
+NIVELES_CGROUP = {"Ruta completa": None, "Slices (1 nivel)": 1,
+                  "Servicios y contenedores (2 niveles)": 2}
+# memory.current y cpu.stat se leen en el hilo del colector, no aquí
+monitor_cgroupfs = MonitorCgroupfs()
+colector.al_publicar.append(monitor_cgroupfs.al_publicar)
 
-            stats[user]["cpu_raw"] += cpu_raw
-            stats[user]["mem"] += mem
-        except Exception:
-            continue
-
-    for user, data in stats.items():
-        cpu_raw = data["cpu_raw"]
-        cpu_percent = cpu_raw / NUM_CPUS
-        cpu_percent = round(cpu_percent, 1)
-        if cpu_percent > 100:
-            cpu_percent = 100.0  # opcional
-
-        mem_mb = round(data["mem"] / (1024 * 1024), 1)
-        estado = "Activo"
-        disco = "-"
-        red = "-"
-        tree.insert(
-            "",
-            "end",
-            values=(user, estado, cpu_percent, mem_mb, disco, red)
-        )
+@perfil.cronometrar("mostrar_cgroups")
+def mostrar_cgroups(tabla, snapshot, niveles_var):
+    """
+    Agrupa los procesos por cgroup: sumas de sus procesos y, aparte, lo
+    que dice cgroupfs del grupo (con la caché de páginas).
+    """
+    if not snapshot.tiene("cgroup"):
+        tabla.actualizar([("N/A", ("La foto no trae cgroups (solo Linux, en vivo)",
+                                   "", "", "", "", "", "", ""))])
+        return
+    niveles = NIVELES_CGROUP[niveles_var.get()]
+    monitor_cgroupfs.niveles = niveles  # el colector lee estos grupos desde la próxima foto
+    tabla.actualizar(filas_cgroups(snapshot, niveles, monitor_cgroupfs.valores(niveles), NUM_CPUS))
 
 # --------------------------------------------------
 # DETALLES (tipo pestaña Details de Windows)
 # --------------------------------------------------
 
-def mostrar_detalles(tree, snapshot, search_mode_var, search_query_var):
+@perfil.cronometrar("mostrar_detalles")
+def mostrar_detalles(tabla, snapshot, search_mode_var, search_query_var):
     """
     Muestra procesos con columnas:
-    Nombre | PID | Estado | Usuario | CPU % | Memoria MB
+    Nombre | PID | Estado | Usuario | CPU % | Memoria MB | Disco MB/s
     """
-    # Guardar selección actual por PID
-    sel = tree.selection()
-    selected_pid = None
-    if sel:
-        try:
-            selected_pid = int(tree.item(sel[0])["values"][1])  # PID está en columna 2
-        except Exception:
-            selected_pid = None
-
-    limpiar_tree(tree)
-    item_to_select = None
-
-    modo = search_mode_var.get()
-    query = search_query_var.get()
-
-    for info in snapshot:
-        try:
-            if not pasa_filtro(info, modo, query):
-                continue
-
-            pid = info['pid']
-            nombre = info['name']
-            estado = info.get('status', '')
-            usuario = info.get('username', '')
-            cpu = info.get('cpu_percent') or 0.0
-            meminfo = info.get('memory_info')
-            mem_mb = meminfo.rss / (1024 * 1024) if meminfo else 0.0
-
-            iid = tree.insert(
-                "",
-                "end",
-                values=(
-                    nombre,
-                    pid,
-                    estado,
-                    usuario,
-                    round(cpu, 1),
-                    round(mem_mb, 1)
-                )
-            )
-
-            if selected_pid is not None and pid == selected_pid:
-                item_to_select = iid
-
-        except Exception:
-            continue
-
-    if item_to_select:
-        tree.selection_set(item_to_select)
+    top = top_de(tabla, top_n_det)
+    tabla.actualizar(filas_detalles(snapshot, search_mode_var.get(), search_query_var.get(), top))
+    lbl_top_det.config(text=texto_top(top))
 
 # --------------------------------------------------
-# SERVICIOS (solo Windows)
+# SERVICIOS (systemd en Linux, servicios de Windows)
 # --------------------------------------------------
 
-ES_WINDOWS = sys.platform.startswith("win")
-
-def mostrar_servicios(tree):
-    # Guardar selección actual por nombre
-    sel = tree.selection()
-    selected_name = None
-    if sel:
-        try:
-            selected_name = tree.item(sel[0])["values"][0]
-        except Exception:
-            selected_name = None
+# la lista de servicios se arma en otro hilo; aquí solo se cruza con la foto
+monitor_servicios = MonitorServicios()
 
-    limpiar_tree(tree)
-
-    if not ES_WINDOWS:
-        tree.insert("", "end", values=("N/A", "N/A", "Servicios solo disponibles en Windows"))
+@perfil.cronometrar("mostrar_servicios")
+def mostrar_servicios(tabla, snapshot):
+    if not monitor_servicios.disponible:
+        tabla.actualizar([("N/A", ("N/A", "N/A", "", "", "", "",
+                                   "Servicios no disponibles en este sistema"))])
+        return
+    if origen_remoto() is not None:
+        tabla.actualizar([("N/A", ("N/A", "N/A", "", "", "", "",
+                                   "Los servicios se muestran solo para este equipo"))])
         return
 
-    item_to_select = None
-
-    try:
-        for s in psutil.win_service_iter():
-            try:
-                info = s.as_dict()
-                name = info["name"]
-                iid = tree.insert(
-                    "",
-                    "end",
-                    values=(name, info["status"], info["display_name"])
-                )
-                if selected_name is not None and name == selected_name:
-                    item_to_select = iid
-            except Exception:
-                continue
-    except Exception as e:
-        messagebox.showerror("Error", f"No se pudieron obtener los servicios:\n{e}")
-
-    if item_to_select:
-        tree.selection_set(item_to_select)
+    monitor_servicios.pedir()  # no bloquea: la lista nueva llega en un próximo tick
+    version, unidades, miembros = monitor_servicios.ultimo()
+    if monitor_servicios.error is not None and not unidades:
+        tabla.actualizar([("N/A", ("N/A", "Error", "", "", "", "",
+                                   f"No se pudieron obtener los servicios: {monitor_servicios.error}"))])
+        return
+    tabla.actualizar(filas_servicios(snapshot, unidades, miembros))
 
 
 def obtener_nombre_servicio_seleccionado(tree):
@@ -338,80 +250,43 @@ def obtener_nombre_servicio_seleccionado(tree):
         return None
 
 
-def iniciar_servicio(tree):
-    if not ES_WINDOWS:
-        messagebox.showinfo("Información", "Gestión de servicios solo disponible en Windows.")
-        return
-
-    nombre = obtener_nombre_servicio_seleccionado(tree)
-    if not nombre:
-        return
-
-    try:
-        srv = psutil.win_service_get(nombre)
-        srv.start()
-        messagebox.showinfo("Hecho", f"Servicio '{nombre}' iniciado.")
-    except psutil.AccessDenied:
-        messagebox.showerror(
-            "Acceso denegado",
-            "No se tienen permisos para iniciar este servicio.\n"
-            "Ejecuta el programa como Administrador."
-        )
-    except Exception as e:
-        messagebox.showerror("Error", f"No se pudo iniciar el servicio:\n{e}")
-
-
-def detener_servicio(tree):
-    if not ES_WINDOWS:
-        messagebox.showinfo("Información", "Gestión de servicios solo disponible en Windows.")
+def ejecutar_accion_servicio(tree, accion, verbo, participio, confirmar=True):
+    if not monitor_servicios.disponible:
+        messagebox.showinfo("Información", "Gestión de servicios no disponible en este sistema.")
         return
 
     nombre = obtener_nombre_servicio_seleccionado(tree)
-    if not nombre:
+    if not nombre or nombre == "N/A":
         return
 
-    if not messagebox.askyesno("Confirmar", f"¿Detener servicio '{nombre}'?"):
+    if confirmar and not messagebox.askyesno("Confirmar", f"¿{verbo.capitalize()} servicio '{nombre}'?"):
         return
 
     try:
-        srv = psutil.win_service_get(nombre)
-        srv.stop()
-        messagebox.showinfo("Hecho", f"Servicio '{nombre}' detenido.")
-    except psutil.AccessDenied:
+        accion_servicio(nombre, accion)
+        messagebox.showinfo("Hecho", f"Servicio '{nombre}' {participio}.")
+    except (psutil.AccessDenied, PermissionError):
         messagebox.showerror(
             "Acceso denegado",
-            "No se tienen permisos para detener este servicio.\n"
-            "Ejecuta el programa como Administrador."
+            f"No se tienen permisos para {verbo} este servicio.\n"
+            + ("Ejecuta el programa como Administrador." if ES_WINDOWS
+               else "Ejecuta el programa como root.")
         )
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo detener el servicio:\n{e}")
+        messagebox.showerror("Error", f"No se pudo {verbo} el servicio:\n{e}")
+    monitor_servicios.invalidar()
 
 
-def reiniciar_servicio(tree):
-    if not ES_WINDOWS:
-        messagebox.showinfo("Información", "Gestión de servicios solo disponible en Windows.")
-        return
+def iniciar_servicio(tree):
+    ejecutar_accion_servicio(tree, "start", "iniciar", "iniciado", confirmar=False)
 
-    nombre = obtener_nombre_servicio_seleccionado(tree)
-    if not nombre:
-        return
 
-    if not messagebox.askyesno("Confirmar", f"¿Reiniciar servicio '{nombre}'?"):
-        return
+def detener_servicio(tree):
+    ejecutar_accion_servicio(tree, "stop", "detener", "detenido")
 
-    try:
-        srv = psutil.win_service_get(nombre)
-        srv.stop()
-        srv.start()
-        messagebox.showinfo("Hecho", f"Servicio '{nombre}' reiniciado.")
-    except psutil.AccessDenied:
-        messagebox.showerror(
-            "Acceso denegado",
-            "No se tienen permisos para reiniciar este servicio.\n"
-            "Ejecuta el programa como Administrador."
-        )
-    except Exception as e:
-        messagebox.showerror("Error", f"No se pudo reiniciar el servicio:\n{e}")
+
+def reiniciar_servicio(tree):
+    ejecutar_accion_servicio(tree, "restart", "reiniciar", "reiniciado")
 
 # --------------------------------------------------
 # THEME / MODO CLARO–OSCURO
@@ -488,6 +363,8 @@ def toggle_theme():
     else:
         aplicar_tema(style, root, "light")
         theme_btn_text.set("🌙 Modo oscuro")
+    for g in graficas:
+        g.set_tema(current_theme)
 
 btn_theme = ttk.Button(settings_frame, textvariable=theme_btn_text, command=toggle_theme)
 btn_theme.pack(side="left", padx=5)
@@ -497,7 +374,11 @@ update_btn_text = tk.StringVar(value="⏸ Pausar actualización")
 
 def toggle_auto_update():
     global auto_update
+    if reproductor is not None and not auto_update:
+        salir_reproduccion()  # reanudar desde una grabación vuelve a vivo
+        return
     auto_update = not auto_update
+    colector.pausar(not auto_update)
     if auto_update:
         update_btn_text.set("⏸ Pausar actualización")
     else:
@@ -506,6 +387,184 @@ def toggle_auto_update():
 btn_update = ttk.Button(settings_frame, textvariable=update_btn_text, command=toggle_auto_update)
 btn_update.pack(side="left", padx=5)
 
+# lista virtual: en Procesos y Detalles solo se dibujan las filas visibles
+lista_virtual = tk.BooleanVar(value=True)
+
+def toggle_lista_virtual():
+    tabla_proc.set_virtual(lista_virtual.get())
+    tabla_detalles.set_virtual(lista_virtual.get())
+
+ttk.Checkbutton(settings_frame, text="Lista virtual", variable=lista_virtual,
+                command=toggle_lista_virtual).pack(side="left", padx=5)
+
+# Top N: Procesos y Detalles eligen sus N primeras filas sin ordenar todos los procesos
+TAMANOS_TOP = ("25", "50", "100", "200", "500")
+top_activo = tk.BooleanVar(value=False)
+top_n_var = tk.StringVar(value="50")
+
+def refrescar_top(event=None):
+    mostrar_pestana_procesos(last_snapshot)
+    mostrar_detalles(tabla_detalles, last_snapshot, search_det_mode, search_det_query)
+
+def ordenar_con_top(tabla, columna, refrescar):
+    # en modo Top N otra columna de orden es otro conjunto de filas
+    tabla.ordenar_por(columna)
+    if top_activo.get():
+        refrescar()
+
+ttk.Checkbutton(settings_frame, text="Top", variable=top_activo,
+                command=refrescar_top).pack(side="left", padx=(5, 0))
+cb_top = ttk.Combobox(settings_frame, textvariable=top_n_var, values=TAMANOS_TOP,
+                      state="readonly", width=5)
+cb_top.pack(side="left", padx=5)
+cb_top.bind("<<ComboboxSelected>>", refrescar_top)
+
+# retención del historial de Rendimiento
+retencion_var = tk.StringVar(value=RETENCION_INICIAL)
+
+def ajustar_historial():
+    """
+    Dimensiona el historial para que cubra la retención elegida al
+    intervalo actual del colector (se llama también cuando ese intervalo
+    cambia: una muestra por foto).
+    """
+    capacidad = max(int(RETENCIONES[retencion_var.get()] / colector.intervalo), 2)
+    if capacidad != historial.capacidad:
+        historial.redimensionar(capacidad)
+        for g in graficas:
+            g.redibujar()
+
+def cambiar_retencion(event=None):
+    ajustar_historial()
+
+ttk.Label(settings_frame, text="Historial:").pack(side="left", padx=(5, 0))
+cb_retencion = ttk.Combobox(settings_frame, textvariable=retencion_var,
+                            values=tuple(RETENCIONES), state="readonly", width=7)
+cb_retencion.pack(side="left", padx=5)
+cb_retencion.bind("<<ComboboxSelected>>", cambiar_retencion)
+
+# refresco de la pestaña visible (cada pestaña recuerda el suyo)
+intervalo_pestana_var = tk.StringVar(value="Automático")
+
+def cambiar_intervalo_pestana(event=None):
+    planificador.configurar(notebook.select(), INTERVALOS_PESTANA[intervalo_pestana_var.get()])
+
+ttk.Label(settings_frame, text="Refresco de la pestaña:").pack(side="left", padx=(5, 0))
+cb_intervalo_pestana = ttk.Combobox(settings_frame, textvariable=intervalo_pestana_var,
+                                    values=tuple(INTERVALOS_PESTANA), state="readonly", width=10)
+cb_intervalo_pestana.pack(side="left", padx=5)
+cb_intervalo_pestana.bind("<<ComboboxSelected>>", cambiar_intervalo_pestana)
+
+# tope de CPU del muestreo: de ahí sale el intervalo del colector
+presupuesto_var = tk.StringVar(value=PRESUPUESTO_INICIAL)
+
+def cambiar_presupuesto(event=None):
+    planificador.presupuesto_cpu = PRESUPUESTOS_CPU[presupuesto_var.get()]
+    ajustar_intervalo_colector()
+
+ttk.Label(settings_frame, text="CPU del muestreo:").pack(side="left", padx=(5, 0))
+cb_presupuesto = ttk.Combobox(settings_frame, textvariable=presupuesto_var,
+                              values=tuple(PRESUPUESTOS_CPU), state="readonly", width=5)
+cb_presupuesto.pack(side="left", padx=5)
+cb_presupuesto.bind("<<ComboboxSelected>>", cambiar_presupuesto)
+
+# ---- Grabación en disco y reproducción ----
+grabador = None     # Grabador activo (graba desde el hilo del colector)
+reproductor = None  # Reproductor abierto: la vista muestra la grabación
+grabar_btn_text = tk.StringVar(value="⏺ Grabar")
+
+def toggle_grabacion():
+    global grabador
+    if grabador is None:
+        ruta = filedialog.asksaveasfilename(title="Grabar procesos en", defaultextension=".tmrec",
+                                            filetypes=[("Grabaciones", "*.tmrec")])
+        if not ruta:
+            return
+        try:
+            grabador = Grabador(ruta, intervalo=colector.intervalo)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"No se pudo abrir la grabación:\n{e}")
+            return
+        colector.al_publicar.append(grabador.grabar)
+        grabar_btn_text.set("⏹ Detener grabación")
+    else:
+        colector.al_publicar.remove(grabador.grabar)
+        grabador.cerrar()
+        grabador = None
+        grabar_btn_text.set("⏺ Grabar")
+
+def permitir_finalizar(activo):
+    """
+    Habilita o deshabilita los botones y entradas de menú de Finalizar
+    (se deshabilitan mientras se reproduce una grabación).
+    """
+    estado = "normal" if activo else "disabled"
+    for boton in (btn_proc, btn_proc_arbol):
+        boton.config(state=estado)
+    for menu in (proc_menu, det_menu):
+        for k in range(2):  # "Finalizar tarea" y "Finalizar árbol de procesos"
+            menu.entryconfig(k, state=estado)
+
+def abrir_grabacion():
+    global reproductor
+    ruta = filedialog.askopenfilename(title="Abrir grabación",
+                                      filetypes=[("Grabaciones", "*.tmrec"), ("Todos", "*")])
+    if not ruta:
+        return
+    try:
+        nuevo = Reproductor(ruta)
+    except (OSError, ValueError) as e:
+        messagebox.showerror("Error", f"No se pudo abrir la grabación:\n{e}")
+        return
+    if not len(nuevo):
+        nuevo.cerrar()
+        messagebox.showinfo("Información", "La grabación no tiene fotos.")
+        return
+    if reproductor is not None:
+        reproductor.cerrar()
+    reproductor = nuevo
+    permitir_finalizar(False)
+
+    if auto_update:
+        toggle_auto_update()  # congela la vista en vivo mientras se reproduce
+    ultimo = len(reproductor) - 1
+    escala_reproduccion.configure(to=ultimo)
+    barra_reproduccion.pack(fill="x", padx=5, before=notebook)
+    escala_reproduccion.set(ultimo)
+    al_mover_escala(ultimo)
+
+ttk.Button(settings_frame, textvariable=grabar_btn_text, command=toggle_grabacion).pack(side="left", padx=5)
+ttk.Button(settings_frame, text="📂 Abrir grabación", command=abrir_grabacion).pack(side="left", padx=5)
+
+# ---- Equipos remotos ----
+origen_var = tk.StringVar(value=ORIGEN_LOCAL)
+
+def conectar_agentes():
+    texto = simpledialog.askstring(
+        "Conectar a agentes",
+        "Direcciones separadas por comas (host:puerto o unix:/ruta):", parent=root)
+    if not texto:
+        return
+    for direccion in (d.strip() for d in texto.split(",")):
+        if not direccion:
+            continue
+        try:
+            remotos.conectar(direccion)
+        except ValueError:
+            messagebox.showerror("Error", f"Dirección inválida: {direccion}")
+    cb_origen.configure(values=(ORIGEN_LOCAL, *remotos.equipos))
+
+def cambiar_origen(event=None):
+    global snapshot_version
+    snapshot_version = -1  # cada origen numera sus fotos: tomar la última del nuevo
+
+ttk.Button(settings_frame, text="🌐 Agentes", command=conectar_agentes).pack(side="left", padx=5)
+ttk.Label(settings_frame, text="Equipo:").pack(side="left", padx=(5, 0))
+cb_origen = ttk.Combobox(settings_frame, textvariable=origen_var, values=(ORIGEN_LOCAL,),
+                         state="readonly", width=18)
+cb_origen.pack(side="left", padx=5)
+cb_origen.bind("<<ComboboxSelected>>", cambiar_origen)
+
 # ---- About us ----
 def show_about():
     about = tk.Toplevel(root)
@@ -535,6 +594,21 @@ def show_about():
 
     ttk.Button(frame, text="Cerrar", command=about.destroy).pack(pady=(0, 5))
 
+# panel de perfil: tiempos por etapa (p50/p99) sobre la ventana
+perfil_var = tk.BooleanVar(value=False)
+
+def toggle_perfil():
+    perfil.activo = perfil_var.get()
+    if perfil.activo:
+        panel_perfil.place(relx=1.0, rely=1.0, x=-8, y=-28, anchor="se")
+        panel_perfil.lift()
+        actualizar_perfil()
+    else:
+        panel_perfil.place_forget()
+
+ttk.Checkbutton(settings_frame, text="Perfil", variable=perfil_var,
+                command=toggle_perfil).pack(side="left", padx=5)
+
 btn_about = ttk.Button(settings_frame, text="👥 About us", command=show_about)
 btn_about.pack(side="left", padx=5)
 
@@ -555,6 +629,79 @@ status_bar.pack(fill="x", padx=5, pady=(0, 3))
 lbl_status = ttk.Label(status_bar, text="CPU: -- % | RAM: -- %")
 lbl_status.pack(side="right")
 
+# resultado de la última acción en segundo plano (p. ej. finalizar procesos)
+lbl_acciones = ttk.Label(status_bar, text="")
+lbl_acciones.pack(side="left")
+
+# ---- Panel de perfil (se superpone a las pestañas) ----
+panel_perfil = ttk.Frame(root, relief="solid", borderwidth=1, padding=6)
+lbl_perfil = ttk.Label(panel_perfil, text="", font=("Courier", 9), justify="left")
+lbl_perfil.pack(anchor="w")
+botones_perfil = ttk.Frame(panel_perfil)
+botones_perfil.pack(fill="x", pady=(4, 0))
+
+def exportar_perfil():
+    ruta = filedialog.asksaveasfilename(title="Exportar perfil", defaultextension=".json",
+                                        filetypes=[("JSON", "*.json")])
+    if not ruta:
+        return
+    try:
+        perfil.exportar(ruta)
+    except OSError as e:
+        messagebox.showerror("Error", f"No se pudo exportar el perfil:\n{e}")
+
+def reiniciar_perfil():
+    perfil.reiniciar()
+    lbl_perfil.config(text=perfil.texto())
+
+def actualizar_perfil():
+    if not perfil.activo:
+        return
+    lbl_perfil.config(text=perfil.texto())
+    root.after(1000, actualizar_perfil)
+
+ttk.Button(botones_perfil, text="Exportar JSON", command=exportar_perfil).pack(side="left")
+ttk.Button(botones_perfil, text="Reiniciar", command=reiniciar_perfil).pack(side="left", padx=5)
+
+# ---- Barra de reproducción (solo con una grabación abierta) ----
+barra_reproduccion = ttk.Frame(root)
+marco_pendiente = None  # último marco pedido por la barra, se dibuja en after_idle
+
+def al_mover_escala(valor):
+    # la barra dispara muchos eventos al arrastrar: solo se dibuja el último
+    global marco_pendiente
+    if marco_pendiente is None:
+        root.after_idle(mostrar_marco)
+    marco_pendiente = int(float(valor))
+
+def mostrar_marco():
+    global marco_pendiente, last_snapshot, vista_version
+    k, marco_pendiente = marco_pendiente, None
+    if reproductor is None or k is None:
+        return
+    last_snapshot = reproductor.foto(k)
+    hora = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_snapshot.timestamp))
+    lbl_reproduccion.config(text=f"⏪ Grabación: {hora}  ({k + 1}/{len(reproductor)})")
+    vista_version += 1
+    planificador.tick(vista_version)
+
+def salir_reproduccion():
+    global reproductor, snapshot_version
+    barra_reproduccion.pack_forget()
+    reproductor.cerrar()
+    reproductor = None
+    permitir_finalizar(True)
+    snapshot_version = -1  # que revisar_colector tome enseguida la última foto en vivo
+    if not auto_update:
+        toggle_auto_update()
+
+lbl_reproduccion = ttk.Label(barra_reproduccion, text="")
+lbl_reproduccion.pack(side="left")
+ttk.Button(barra_reproduccion, text="Volver a vivo", command=salir_reproduccion).pack(side="right")
+escala_reproduccion = ttk.Scale(barra_reproduccion, orient="horizontal", from_=0, to=0,
+                                command=al_mover_escala)
+escala_reproduccion.pack(side="left", fill="x", expand=True, padx=10)
+
 # Notebook principal
 notebook = ttk.Notebook(root)
 notebook.pack(fill="both", expand=True)
@@ -587,7 +734,7 @@ cb_proc = ttk.Combobox(
 )
 cb_proc.pack(side="left")
 
-entry_proc = ttk.Entry(left_proc, textvariable=search_proc_query, width=30)
+entry_proc = ttk.Entry(left_proc, textvariable=search_proc_query, width=40)
 entry_proc.pack(side="left", padx=5)
 
 def limpiar_busqueda_proc():
@@ -595,48 +742,135 @@ def limpiar_busqueda_proc():
 
 ttk.Button(left_proc, text="Limpiar", command=limpiar_busqueda_proc).pack(side="left", padx=5)
 
-# botón a la derecha, misma altura
+# error de la consulta (p. ej. "cpu>" a medio escribir)
+lbl_error_proc = ttk.Label(left_proc, text="", foreground="#c0392b")
+lbl_error_proc.pack(side="left", padx=5)
+
+lbl_top_proc = ttk.Label(left_proc, text="")
+lbl_top_proc.pack(side="left", padx=5)
+
+# botones a la derecha, misma altura
 btn_proc = ttk.Button(
     top_proc,
     text="Finalizar tarea seleccionada",
-    command=lambda: terminar_proceso(tree_proc, pid_col_index=0)
+    command=lambda: finalizar_seleccion(tabla_procesos_activa())
 )
 btn_proc.pack(side="right", padx=10)
 
-cols_proc = ("PID", "Nombre", "CPU %", "RAM %")
-tree_proc = ttk.Treeview(frame_procesos, columns=cols_proc, show="headings")
+btn_proc_arbol = ttk.Button(
+    top_proc,
+    text="Finalizar árbol de procesos",
+    command=lambda: finalizar_seleccion(tabla_procesos_activa(), arbol=True)
+)
+btn_proc_arbol.pack(side="right")
+
+# vista de árbol: los procesos colgando de su padre, con totales por subárbol
+vista_arbol = tk.BooleanVar(value=False)
+
+def toggle_vista_arbol():
+    if vista_arbol.get():
+        tree_proc.pack_forget()
+        sb_proc.pack_forget()
+        sb_arbol.pack(side="right", fill="y")
+        tree_arbol.pack(fill="both", expand=True)
+    else:
+        tree_arbol.pack_forget()
+        sb_arbol.pack_forget()
+        sb_proc.pack(side="right", fill="y")
+        tree_proc.pack(fill="both", expand=True)
+    mostrar_pestana_procesos(last_snapshot)
+
+def tabla_procesos_activa():
+    return tabla_arbol if vista_arbol.get() else tabla_proc
+
+ttk.Checkbutton(top_proc, text="🌳 Vista de árbol", variable=vista_arbol,
+                command=toggle_vista_arbol).pack(side="right", padx=5)
+
+cols_proc = COLUMNAS_PROCESOS
+sb_proc = ttk.Scrollbar(frame_procesos, orient="vertical")
+sb_proc.pack(side="right", fill="y")
+tree_proc = ttk.Treeview(frame_procesos, columns=cols_proc, show="headings", selectmode="extended")
 for col in cols_proc:
-    numeric = col in ("PID", "CPU %", "RAM %")
-    tree_proc.heading(col, text=col,
-                      command=lambda c=col, n=numeric: sort_treeview(tree_proc, c, False, n))
+    tree_proc.heading(col, text=col, command=lambda c=col: ordenar_con_top(
+        tabla_proc, c, lambda: mostrar_pestana_procesos(last_snapshot)))
     tree_proc.column(col, anchor="center")
 tree_proc.pack(fill="both", expand=True)
+tabla_proc = Tabla(tree_proc, cols_proc, numericas=NUMERICAS_PROCESOS, nombre="procesos",
+                   scrollbar=sb_proc, virtual=lista_virtual.get())
+
+# árbol (no se empaqueta hasta activar la vista de árbol)
+sb_arbol = ttk.Scrollbar(frame_procesos, orient="vertical")
+tree_arbol = ttk.Treeview(frame_procesos, columns=COLUMNAS_ARBOL, show="tree headings",
+                          selectmode="extended", yscrollcommand=sb_arbol.set)
+sb_arbol.configure(command=tree_arbol.yview)
+tree_arbol.heading("#0", text="Nombre", command=lambda: tabla_arbol.ordenar_por("#0"))
+tree_arbol.column("#0", width=260)
+for col in COLUMNAS_ARBOL:
+    tree_arbol.heading(col, text=col, command=lambda c=col: tabla_arbol.ordenar_por(c))
+    tree_arbol.column(col, anchor="center", width=110)
+tabla_arbol = TablaArbol(tree_arbol, COLUMNAS_ARBOL, numericas=NUMERICAS_ARBOL, texto="Nombre",
+                         nombre="arbol")
+
+def mostrar_pestana_procesos(snapshot):
+    if vista_arbol.get():
+        mostrar_arbol(tabla_arbol, indice_arbol, snapshot, search_proc_mode, search_proc_query)
+        lbl_top_proc.config(text="")  # el árbol muestra siempre todos los procesos
+    else:
+        mostrar_procesos(tabla_proc, snapshot, search_proc_mode, search_proc_query)
 
 # menú contextual en Procesos
 proc_menu = tk.Menu(root, tearoff=0)
-proc_menu.add_command(label="Finalizar tarea", command=lambda: terminar_proceso(tree_proc, pid_col_index=0))
+proc_menu.add_command(label="Finalizar tarea",
+                      command=lambda: finalizar_seleccion(tabla_procesos_activa()))
+proc_menu.add_command(label="Finalizar árbol de procesos",
+                      command=lambda: finalizar_seleccion(tabla_procesos_activa(), arbol=True))
 
 def on_proc_right_click(event):
-    row = tree_proc.identify_row(event.y)
+    tree = event.widget
+    row = tree.identify_row(event.y)
     if row:
-        tree_proc.selection_set(row)
+        if row not in tree.selection():
+            tree.selection_set(row)  # clic derecho sobre una selección múltiple la conserva
         proc_menu.tk_popup(event.x_root, event.y_root)
         proc_menu.grab_release()
 
 tree_proc.bind("<Button-3>", on_proc_right_click)
+tree_arbol.bind("<Button-3>", on_proc_right_click)
 
 # PESTAÑA USUARIOS
 frame_usuarios = ttk.Frame(notebook)
 notebook.add(frame_usuarios, text="👤 Usuarios")
 
-cols_u = ("Usuario", "Estado", "CPU %", "Memoria (MB)", "Disco", "Red")
+cols_u = COLUMNAS_USUARIOS
 tree_user = ttk.Treeview(frame_usuarios, columns=cols_u, show="headings")
 for col in cols_u:
-    numeric = col in ("CPU %", "Memoria (MB)")
-    tree_user.heading(col, text=col,
-                      command=lambda c=col, n=numeric: sort_treeview(tree_user, c, False, n))
+    tree_user.heading(col, text=col, command=lambda c=col: tabla_user.ordenar_por(c))
     tree_user.column(col, anchor="center")
 tree_user.pack(fill="both", expand=True)
+tabla_user = Tabla(tree_user, cols_u, numericas=NUMERICAS_USUARIOS, nombre="usuarios")
+
+# PESTAÑA GRUPOS
+frame_cgroups = ttk.Frame(notebook)
+notebook.add(frame_cgroups, text="📦 Grupos")
+
+top_cg = ttk.Frame(frame_cgroups)
+top_cg.pack(fill="x", pady=5)
+niveles_cgroup_var = tk.StringVar(value="Servicios y contenedores (2 niveles)")
+ttk.Label(top_cg, text="Agrupar por:").pack(side="left", padx=5)
+cb_niveles_cgroup = ttk.Combobox(top_cg, textvariable=niveles_cgroup_var,
+                                 values=tuple(NIVELES_CGROUP), state="readonly", width=34)
+cb_niveles_cgroup.pack(side="left", padx=5)
+cb_niveles_cgroup.bind("<<ComboboxSelected>>",
+                       lambda e: mostrar_cgroups(tabla_cgroups, last_snapshot, niveles_cgroup_var))
+
+cols_cg = COLUMNAS_CGROUPS
+tree_cgroups = ttk.Treeview(frame_cgroups, columns=cols_cg, show="headings")
+for col in cols_cg:
+    tree_cgroups.heading(col, text=col, command=lambda c=col: tabla_cgroups.ordenar_por(c))
+    tree_cgroups.column(col, anchor="center")
+tree_cgroups.column("Grupo (cgroup)", anchor="w", width=320)
+tree_cgroups.pack(fill="both", expand=True)
+tabla_cgroups = Tabla(tree_cgroups, cols_cg, numericas=NUMERICAS_CGROUPS, nombre="cgroups")
 
 # PESTAÑA DETALLES
 frame_detalles = ttk.Frame(notebook)
@@ -655,7 +889,7 @@ cb_det = ttk.Combobox(
 )
 cb_det.pack(side="left")
 
-entry_det = ttk.Entry(top_det, textvariable=search_det_query, width=30)
+entry_det = ttk.Entry(top_det, textvariable=search_det_query, width=40)
 entry_det.pack(side="left", padx=5)
 
 def limpiar_busqueda_det():
@@ -663,39 +897,84 @@ def limpiar_busqueda_det():
 
 ttk.Button(top_det, text="Limpiar", command=limpiar_busqueda_det).pack(side="left", padx=5)
 
-cols_d = ("Nombre", "PID", "Estado", "Usuario", "CPU %", "Memoria (MB)")
-tree_detalles = ttk.Treeview(frame_detalles, columns=cols_d, show="headings")
+lbl_error_det = ttk.Label(top_det, text="", foreground="#c0392b")
+lbl_error_det.pack(side="left", padx=5)
+
+lbl_top_det = ttk.Label(top_det, text="")
+lbl_top_det.pack(side="left", padx=5)
+
+cols_d = COLUMNAS_DETALLES
+sb_det = ttk.Scrollbar(frame_detalles, orient="vertical")
+sb_det.pack(side="right", fill="y")
+tree_detalles = ttk.Treeview(frame_detalles, columns=cols_d, show="headings", selectmode="extended")
 for col in cols_d:
-    numeric = col in ("PID", "CPU %", "Memoria (MB)")
-    tree_detalles.heading(col, text=col,
-                          command=lambda c=col, n=numeric: sort_treeview(tree_detalles, c, False, n))
+    tree_detalles.heading(col, text=col, command=lambda c=col: ordenar_con_top(
+        tabla_detalles, c, lambda: mostrar_detalles(
+            tabla_detalles, last_snapshot, search_det_mode, search_det_query)))
     tree_detalles.column(col, anchor="center")
 tree_detalles.pack(fill="both", expand=True)
+tabla_detalles = Tabla(tree_detalles, cols_d, numericas=NUMERICAS_DETALLES, nombre="detalles",
+                       scrollbar=sb_det, virtual=lista_virtual.get())
 
 # menú contextual en Detalles
 det_menu = tk.Menu(root, tearoff=0)
-det_menu.add_command(label="Finalizar tarea", command=lambda: terminar_proceso(tree_detalles, pid_col_index=1))
+det_menu.add_command(label="Finalizar tarea", command=lambda: finalizar_seleccion(tabla_detalles))
+det_menu.add_command(label="Finalizar árbol de procesos",
+                     command=lambda: finalizar_seleccion(tabla_detalles, arbol=True))
 
 def on_det_right_click(event):
     row = tree_detalles.identify_row(event.y)
     if row:
-        tree_detalles.selection_set(row)
+        if row not in tree_detalles.selection():
+            tree_detalles.selection_set(row)
         det_menu.tk_popup(event.x_root, event.y_root)
         det_menu.grab_release()
 
 tree_detalles.bind("<Button-3>", on_det_right_click)
 
+# ---- Búsqueda inmediata: re-filtra al escribir, sin esperar al próximo tick ----
+busquedas_pendientes = {}  # tabla -> id del after que la re-filtra
+
+def refiltrar_luego(tabla, renderizar, modo_var, query_var, lbl_error):
+    pendiente = busquedas_pendientes.pop(tabla, None)
+    if pendiente is not None:
+        root.after_cancel(pendiente)
+
+    def ejecutar():
+        busquedas_pendientes.pop(tabla, None)
+        lbl_error.config(text=error_de_consulta(modo_var.get(), query_var.get()) or "")
+        try:
+            renderizar()
+        except Exception:
+            pass
+
+    busquedas_pendientes[tabla] = root.after(DEBOUNCE_MS, ejecutar)
+
+def refiltrar_procesos(*args):
+    refiltrar_luego(tabla_proc, lambda: mostrar_pestana_procesos(last_snapshot),
+        search_proc_mode, search_proc_query, lbl_error_proc)
+
+def refiltrar_detalles(*args):
+    refiltrar_luego(tabla_detalles, lambda: mostrar_detalles(
+        tabla_detalles, last_snapshot, search_det_mode, search_det_query),
+        search_det_mode, search_det_query, lbl_error_det)
+
+search_proc_query.trace_add("write", refiltrar_procesos)
+search_proc_mode.trace_add("write", refiltrar_procesos)
+search_det_query.trace_add("write", refiltrar_detalles)
+search_det_mode.trace_add("write", refiltrar_detalles)
+
 # PESTAÑA SERVICIOS
 frame_servicios = ttk.Frame(notebook)
 notebook.add(frame_servicios, text="🛠 Servicios")
 
-cols_s = ("Nombre", "Estado", "Descripción")
+cols_s = COLUMNAS_SERVICIOS
 tree_serv = ttk.Treeview(frame_servicios, columns=cols_s, show="headings")
 for col in cols_s:
-    tree_serv.heading(col, text=col,
-                      command=lambda c=col: sort_treeview(tree_serv, c, False, False))
+    tree_serv.heading(col, text=col, command=lambda c=col: tabla_serv.ordenar_por(c))
     tree_serv.column(col, anchor="center")
 tree_serv.pack(fill="both", expand=True)
+tabla_serv = Tabla(tree_serv, cols_s, numericas=NUMERICAS_SERVICIOS, nombre="servicios")
 
 frame_btn_serv = ttk.Frame(frame_servicios)
 frame_btn_serv.pack(pady=5)
@@ -707,57 +986,190 @@ ttk.Button(frame_btn_serv, text="Detener",
 ttk.Button(frame_btn_serv, text="Reiniciar",
            command=lambda: reiniciar_servicio(tree_serv)).grid(row=0, column=2, padx=5)
 
+# PESTAÑA RENDIMIENTO
+frame_rendimiento = ttk.Frame(notebook)
+notebook.add(frame_rendimiento, text="📈 Rendimiento")
+frame_rendimiento.columnconfigure((0, 1), weight=1)
+frame_rendimiento.rowconfigure((0, 1, 3), weight=1)
+
+def crear_grafica(fila, columna, titulo, color, **opciones):
+    canvas = tk.Canvas(frame_rendimiento, height=120, highlightthickness=0)
+    canvas.grid(row=fila, column=columna, sticky="nsew", padx=5, pady=5)
+    return Grafica(canvas, titulo, color=color, tema=current_theme, **opciones)
+
+graf_cpu = crear_grafica(0, 0, "CPU %", "#0078d7")
+graf_ram = crear_grafica(0, 1, "Memoria %", "#8e44ad")
+graf_disco = crear_grafica(1, 0, "Disco", "#27ae60", escala=1024 * 1024, adaptable=True,
+                           formato=formato_tasa)
+graf_red = crear_grafica(1, 1, "Red", "#d35400", escala=1024 * 1024, adaptable=True,
+                         formato=formato_tasa)
+
+lbl_seguido = ttk.Label(frame_rendimiento, text="Seleccione un proceso en la pestaña Procesos para graficarlo.")
+lbl_seguido.grid(row=2, column=0, columnspan=2, sticky="w", padx=5)
+graf_proc_cpu = crear_grafica(3, 0, "CPU % del proceso", "#0078d7")
+graf_proc_mem = crear_grafica(3, 1, "RAM % del proceso", "#8e44ad")
+
+graf_cpu.mostrar(historial.sistema["cpu"])
+graf_ram.mostrar(historial.sistema["ram"])
+graf_disco.mostrar(historial.sistema["disco"])
+graf_red.mostrar(historial.sistema["red"])
+graficas = (graf_cpu, graf_ram, graf_disco, graf_red, graf_proc_cpu, graf_proc_mem)
+
+def seguir_proceso(event=None):
+    """
+    Grafica el proceso seleccionado en Procesos (si hay uno solo).
+    """
+    global pid_seguido
+    if len(tabla_proc.seleccion) != 1 or origen_remoto() is not None:
+        return  # el historial es de este equipo: un PID remoto sería otro proceso
+    pid = next(iter(tabla_proc.seleccion))
+    if pid == pid_seguido:
+        return
+    pid_seguido = pid
+    historial.seguir(pid)
+    series = historial.procesos[pid]
+    i = last_snapshot.indice_de(pid)
+    nombre = last_snapshot.nombre(i) if i is not None else ""
+    lbl_seguido.config(text=f"Proceso: {nombre} (PID {pid})")
+    graf_proc_cpu.mostrar(series["cpu"])
+    graf_proc_mem.mostrar(series["mem_pct"])
+
+tree_proc.bind("<<TreeviewSelect>>", seguir_proceso, add="+")
+
+@perfil.cronometrar("historial")
+def registrar_historial(snapshot):
+    global pid_seguido
+    try:
+        historial.registrar(snapshot, muestreador_sistema.muestrear())
+    except Exception:
+        return
+    if pid_seguido is not None and pid_seguido not in historial.procesos:
+        lbl_seguido.config(text=f"El proceso {pid_seguido} terminó.")
+        pid_seguido = None
+        graf_proc_cpu.mostrar(None)
+        graf_proc_mem.mostrar(None)
+
+@perfil.cronometrar("graficas")
+def avanzar_graficas():
+    # con la pestaña oculta las muestras se acumulan y al volver se redibuja
+    for g in graficas:
+        g.avanzar()
+
 # --------------------------------------------------
 # ACTUALIZACIÓN PERIÓDICA
 # --------------------------------------------------
 
-services_counter = 0  # para actualizar servicios con menos frecuencia
+# cada pestaña se refresca solo mientras está a la vista
+planificador.agregar(str(frame_procesos), lambda: mostrar_pestana_procesos(last_snapshot))
+planificador.agregar(str(frame_usuarios), lambda: mostrar_usuarios(tabla_user, last_snapshot))
+planificador.agregar(str(frame_cgroups), lambda: mostrar_cgroups(
+    tabla_cgroups, last_snapshot, niveles_cgroup_var))
+planificador.agregar(str(frame_detalles), lambda: mostrar_detalles(
+    tabla_detalles, last_snapshot, search_det_mode, search_det_query))
+# la lista de unidades la cachea el monitor; CPU y memoria siguen a cada foto
+planificador.agregar(str(frame_servicios), lambda: mostrar_servicios(tabla_serv, last_snapshot))
+planificador.agregar(str(frame_rendimiento), avanzar_graficas)
+
+def al_cambiar_pestana(event=None):
+    clave = notebook.select()
+    planificador.mostrar(clave)
+    intervalo = planificador.pestanas[clave].intervalo
+    intervalo_pestana_var.set(next(nombre for nombre, valor in INTERVALOS_PESTANA.items()
+                                   if valor == intervalo))
+    planificador.tick(vista_version)  # la pestaña se pone al día al mostrarse
+
+notebook.bind("<<NotebookTabChanged>>", al_cambiar_pestana)
+planificador.mostrar(notebook.select())
+
+def revisar_ventana():
+    try:
+        minimizada = root.state() == "iconic"
+        enfocada = root.focus_displayof() is not None
+    except Exception:
+        return
+    planificador.estado_ventana(enfocada, minimizada)
 
-def schedule_updates():
-    global services_counter, last_snapshot, auto_update
+def ajustar_intervalo_colector():
+    # se redondea a medio segundo para no despertar al colector por cambios mínimos
+    intervalo = round(planificador.intervalo_colector(colector.costo) * 2) / 2
+    if intervalo != colector.intervalo:
+        colector.intervalo = intervalo
+        ajustar_historial()  # la retención es en segundos, no en muestras
 
-    # actualizar snapshot solo si no está en pausa
-    if auto_update:
-        try:
-            last_snapshot = obtener_procesos_snapshot()
-        except Exception:
-            last_snapshot = []
+def revisar_colector():
+    """
+    Recoge la última foto terminada por el colector, o por el agente
+    remoto elegido (no bloquea), y deja que el planificador redibuje la
+    pestaña visible. Las fotos del colector van siempre al historial:
+    Rendimiento grafica este equipo aunque se muestre otro. También recoge
+    los lotes que el Terminador ya finalizó.
+    """
+    global last_snapshot, snapshot_version, historial_version, vista_version
 
-    snapshot = last_snapshot
+    revisar_terminador()
+    revisar_ventana()
+    if auto_update:
+        version_local, local = colector.ultimo()
+        if local is not None and version_local != historial_version:
+            historial_version = version_local
+            # lo mide el colector en su hilo o subproceso (obtener_procesos_snapshot)
+            perfil.registrar("colector", colector.costo)
+            registrar_historial(local)
+            vista_version += 1
+
+        origen = origen_remoto()
+        if origen is None:
+            version, snapshot = version_local, local
+        else:
+            version, snapshot = remotos.ultimo(origen)
+        if snapshot is not None and version != snapshot_version:
+            snapshot_version = version
+            if snapshot is not last_snapshot:
+                last_snapshot = snapshot
+                vista_version += 1
+    planificador.tick(vista_version)
+
+    root.after(POLL_MS, revisar_colector)
 
-    try:
-        mostrar_procesos(tree_proc, snapshot, search_proc_mode, search_proc_query)
-    except Exception:
-        pass
-    try:
-        mostrar_usuarios(tree_user, snapshot)
-    except Exception:
-        pass
-    try:
-        mostrar_detalles(tree_detalles, snapshot, search_det_mode, search_det_query)
-    except Exception:
-        pass
+def schedule_updates():
+    # intervalo del colector según su costo y el estado de la ventana
+    if auto_update:
+        ajustar_intervalo_colector()
 
-    # actualizar barra CPU/RAM (siempre)
+    # actualizar barra CPU/RAM (siempre): con fotos nuevas sale del historial
     try:
-        cpu_total = psutil.cpu_percent(interval=None)
-        ram_total = psutil.virtual_memory().percent
-        lbl_status.config(text=f"CPU: {cpu_total:.1f}% | RAM: {ram_total:.1f}%")
+        if auto_update and len(historial.sistema["cpu"]):
+            cpu_total = historial.sistema["cpu"].ultimo()
+            ram_total = historial.sistema["ram"].ultimo()
+        else:
+            cpu_total = psutil.cpu_percent(interval=None)
+            ram_total = psutil.virtual_memory().percent
+        texto = f"CPU: {cpu_total:.1f}% | RAM: {ram_total:.1f}%"
+        cache = estadisticas_cache()
+        if cache:
+            texto += f" | Caché: {cache['tasa_aciertos']:.0%} aciertos"
+        texto += f" | Muestreo: cada {colector.intervalo:g} s"
+        origen = origen_remoto()
+        if origen is not None:
+            equipo = remotos.equipos.get(origen)
+            if equipo is not None:
+                texto += f" | Equipo: {equipo.nombre} ({equipo.estado})"
+        lbl_status.config(text=texto)
     except Exception:
         pass
 
-    # servicios solo cuando no está en pausa
-    if auto_update:
-        services_counter += 1
-        # Actualizar servicios cada 5 ciclos (~10 s si el after es 2000 ms)
-        if services_counter % 5 == 0:
-            try:
-                mostrar_servicios(tree_serv)
-            except Exception:
-                pass
-
-    # refresco cada 2000 ms para dar aire a la UI
     root.after(2000, schedule_updates)
 
+def al_cerrar():
+    colector.detener()
+    remotos.detener()
+    if grabador is not None:
+        grabador.cerrar()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", al_cerrar)
+
+colector.iniciar()
+revisar_colector()
 schedule_updates()
 root.mainloop()
@@ -0,0 +1,168 @@
+"""
+Medición de tiempos por etapa (muestreo, filtro, renderers, llamadas a Tk)
+con histogramas de memoria fija. Desactivado no mide nada: medir()
+devuelve un contexto vacío y registrar() vuelve enseguida.
+
+Las etapas se anidan (mostrar_procesos incluye filtro y tk procesos), así
+que sus tiempos no se suman entre sí.
+"""
+import contextlib, functools, json, math, threading, time
+
+# --------------------------------------------------
+# Histograma de tiempos
+# --------------------------------------------------
+
+class Histograma:
+    """
+    Tiempos en cubetas logarítmicas: CUBETAS_POR_DECADA por década desde
+    MINIMO segundos, unas 80 cubetas en total sin importar cuántas
+    mediciones haya. Un percentil sale con el borde superior de su cubeta
+    (error < 26 % con 10 cubetas por década), nunca por encima del máximo.
+    """
+
+    MINIMO = 1e-6  # 1 µs
+    DECADAS = 8    # hasta 100 s
+    CUBETAS_POR_DECADA = 10
+
+    def __init__(self):
+        self.cuentas = [0] * (self.DECADAS * self.CUBETAS_POR_DECADA + 1)
+        self.n = 0
+        self.total = 0.0
+        self.maximo = 0.0
+
+    def agregar(self, segundos):
+        if segundos <= self.MINIMO:
+            k = 0
+        else:
+            k = min(int(math.log10(segundos / self.MINIMO) * self.CUBETAS_POR_DECADA) + 1,
+                    len(self.cuentas) - 1)
+        self.cuentas[k] += 1
+        self.n += 1
+        self.total += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+    def percentil(self, p):
+        """
+        Tiempo (s) por debajo del cual cae el p % de las mediciones.
+        """
+        if not self.n:
+            return 0.0
+        objetivo = p / 100 * self.n
+        acumulado = 0
+        for k, cuenta in enumerate(self.cuentas):
+            acumulado += cuenta
+            if acumulado >= objetivo and cuenta:
+                borde = self.MINIMO * 10 ** (k / self.CUBETAS_POR_DECADA)
+                return min(borde, self.maximo)
+        return self.maximo
+
+# --------------------------------------------------
+# Perfilador por etapas
+# --------------------------------------------------
+
+class _Medicion:
+    __slots__ = ("perfilador", "etapa", "inicio")
+
+    def __init__(self, perfilador, etapa):
+        self.perfilador = perfilador
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.perfilador.registrar(self.etapa, time.perf_counter() - self.inicio)
+        return False
+
+
+_NULO = contextlib.nullcontext()
+
+
+class Perfilador:
+    """
+    Un Histograma por etapa. Se puede registrar desde cualquier hilo (el
+    colector y el hilo de Tk comparten la instancia 'perfil').
+    """
+
+    def __init__(self):
+        self.activo = False
+        self.etapas = {}  # etapa -> Histograma
+        self.desde = time.time()
+        self._lock = threading.Lock()
+
+    def registrar(self, etapa, segundos):
+        if not self.activo:
+            return
+        with self._lock:
+            histograma = self.etapas.get(etapa)
+            if histograma is None:
+                histograma = self.etapas[etapa] = Histograma()
+            histograma.agregar(segundos)
+
+    def medir(self, etapa):
+        """
+        with perfil.medir("etapa"): ...
+        """
+        if not self.activo:
+            return _NULO
+        return _Medicion(self, etapa)
+
+    def cronometrar(self, etapa):
+        """
+        Decorador: mide cada llamada a la función como 'etapa'.
+        """
+        def decorar(funcion):
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                if not self.activo:
+                    return funcion(*args, **kwargs)
+                with _Medicion(self, etapa):
+                    return funcion(*args, **kwargs)
+            return envoltura
+        return decorar
+
+    def reiniciar(self):
+        with self._lock:
+            self.etapas = {}
+            self.desde = time.time()
+
+    def resumen(self):
+        """
+        Una entrada por etapa, de la que más tiempo acumuló a la que menos
+        (tiempos en milisegundos).
+        """
+        with self._lock:
+            etapas = list(self.etapas.items())
+        filas = [{
+            "etapa": etapa,
+            "n": h.n,
+            "p50_ms": round(h.percentil(50) * 1000, 3),
+            "p99_ms": round(h.percentil(99) * 1000, 3),
+            "max_ms": round(h.maximo * 1000, 3),
+            "total_ms": round(h.total * 1000, 1),
+        } for etapa, h in etapas]
+        filas.sort(key=lambda f: f["total_ms"], reverse=True)
+        return filas
+
+    def a_json(self):
+        return json.dumps({"desde": self.desde, "hasta": time.time(),
+                           "etapas": self.resumen()}, indent=2, ensure_ascii=False)
+
+    def exportar(self, ruta):
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(self.a_json())
+
+    def texto(self):
+        """
+        Tabla de texto para el panel de perfil.
+        """
+        lineas = [f"{'etapa':<22}{'n':>7}{'p50 ms':>9}{'p99 ms':>9}{'máx ms':>9}"]
+        for f in self.resumen():
+            lineas.append(f"{f['etapa'][:22]:<22}{f['n']:>7}{f['p50_ms']:>9.2f}"
+                          f"{f['p99_ms']:>9.2f}{f['max_ms']:>9.2f}")
+        return "\n".join(lineas)
+
+
+perfil = Perfilador()  # instancia compartida por toda la aplicación
@@ -0,0 +1,134 @@
+import time
+
+# --------------------------------------------------
+# Intervalo de muestreo según el costo medido
+# --------------------------------------------------
+
+def intervalo_por_costo(costo, presupuesto, minimo, maximo):
+    """
+    Intervalo (s) para que un muestreo que tarda 'costo' segundos no use más
+    de 'presupuesto' de un núcleo (0.05 = 5 %), acotado a [minimo, maximo].
+    """
+    if presupuesto <= 0:
+        return maximo
+    return min(max(costo / presupuesto, minimo), maximo)
+
+# --------------------------------------------------
+# Planificador de refrescos por pestaña
+# --------------------------------------------------
+
+class Pestana:
+    """
+    Cómo y cuándo se refrescó una pestaña.
+    """
+
+    __slots__ = ("refrescar", "intervalo", "por_foto", "ultima", "version")
+
+    def __init__(self, refrescar, intervalo, por_foto):
+        self.refrescar = refrescar
+        self.intervalo = intervalo  # None = en cada foto nueva
+        self.por_foto = por_foto    # False = por tiempo (Servicios)
+        self.ultima = None          # time.monotonic() del último refresco
+        self.version = None         # versión de la foto que muestra
+
+
+class Planificador:
+    """
+    Decide qué se redibuja en cada tick de la interfaz, en lugar de
+    refrescar todas las pestañas cada 2 s.
+
+    Solo se refresca la pestaña visible. Las ocultas quedan atrasadas (su
+    versión no es la de la última foto) y se ponen al día en cuanto se
+    seleccionan. Una pestaña por_foto se redibuja cuando hay foto nueva,
+    pero no más seguido que su intervalo; las demás cada 'intervalo'
+    segundos.
+
+    Con la ventana sin foco los intervalos se multiplican por
+    factor_sin_foco y minimizada no se dibuja nada. El intervalo del
+    colector sale del costo medido del muestreo (promedio móvil), para que
+    no use más de presupuesto_cpu de un núcleo, y también se alarga sin
+    foco o minimizada.
+    """
+
+    SUAVIZADO = 0.3  # peso de la última medición en el promedio del costo
+
+    def __init__(self, presupuesto_cpu=0.05, intervalo_minimo=2.0, intervalo_maximo=30.0,
+                 factor_sin_foco=2.0, factor_minimizada=5.0):
+        self.presupuesto_cpu = presupuesto_cpu
+        self.intervalo_minimo = intervalo_minimo
+        self.intervalo_maximo = intervalo_maximo
+        self.factor_sin_foco = factor_sin_foco
+        self.factor_minimizada = factor_minimizada
+        self.pestanas = {}
+        self.visible = None
+        self.enfocada = True
+        self.minimizada = False
+        self.costo = None  # costo promedio del muestreo (s)
+
+    # ---- configuración ----
+
+    def agregar(self, clave, refrescar, intervalo=None, por_foto=True):
+        self.pestanas[clave] = Pestana(refrescar, intervalo, por_foto)
+
+    def configurar(self, clave, intervalo):
+        """
+        Cambia el intervalo de una pestaña (None = en cada foto nueva).
+        """
+        self.pestanas[clave].intervalo = intervalo
+
+    def mostrar(self, clave):
+        self.visible = clave
+
+    def estado_ventana(self, enfocada, minimizada):
+        self.enfocada = enfocada
+        self.minimizada = minimizada
+
+    def _factor(self):
+        if self.minimizada:
+            return self.factor_minimizada
+        return 1.0 if self.enfocada else self.factor_sin_foco
+
+    # ---- colector ----
+
+    def intervalo_colector(self, costo):
+        """
+        Intervalo de muestreo para el último costo medido (s).
+        """
+        if self.costo is None:
+            self.costo = costo
+        else:
+            self.costo += self.SUAVIZADO * (costo - self.costo)
+        intervalo = intervalo_por_costo(self.costo, self.presupuesto_cpu,
+                                        self.intervalo_minimo, self.intervalo_maximo)
+        return min(intervalo * self._factor(), self.intervalo_maximo)
+
+    # ---- tick ----
+
+    def tick(self, version, ahora=None):
+        """
+        Refresca la pestaña visible si le toca. 'version' identifica la foto
+        en pantalla (sube con cada foto nueva). Devuelve True si refrescó.
+        """
+        pestana = self.pestanas.get(self.visible)
+        if pestana is None or self.minimizada:
+            return False
+        ahora = time.monotonic() if ahora is None else ahora
+        intervalo = pestana.intervalo
+        if intervalo is not None:
+            intervalo *= self._factor()
+        reciente = (pestana.ultima is not None and intervalo is not None
+                    and ahora - pestana.ultima < intervalo)
+
+        if pestana.por_foto:
+            if version == pestana.version or (reciente and pestana.version is not None):
+                return False
+        elif reciente:
+            return False
+
+        pestana.ultima = ahora
+        pestana.version = version
+        try:
+            pestana.refrescar()
+        except Exception:
+            pass  # una pestaña con error no debe frenar el resto de la interfaz
+        return True
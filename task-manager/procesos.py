@@ -1,11 +1,5 @@
-import psutil
-from tabulate import tabulate
+from consola import ejecutar
 
-def mostrar_procesos():
-    procesos = []
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-        try:
-            procesos.append(proc.info)
-        except psutil.NoSuchProcess:
-            continue
-    print(tabulate(procesos, headers="keys", tablefmt="fancy_grid"))
+def mostrar_procesos(intervalo=2.0, cantidad=1, formato="table"):
+    # misma foto que la ventana (colector + vistas), sin importar tkinter
+    ejecutar("procesos", intervalo, cantidad, formato)
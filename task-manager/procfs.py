@@ -0,0 +1,177 @@
+import os, sys
+
+from contabilidad import CacheMetadatos, Metadatos
+
+# --------------------------------------------------
+# Lector directo de /proc (solo Linux)
+# --------------------------------------------------
+
+# letra de estado de /proc/<pid>/stat -> nombre usado por psutil
+ESTADOS_PROC = {
+    "R": "running", "S": "sleeping", "D": "disk-sleep", "T": "stopped",
+    "t": "tracing-stop", "Z": "zombie", "X": "dead", "x": "dead",
+    "K": "wake-kill", "W": "waking", "P": "parked", "I": "idle",
+}
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGESIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class BackendProcfs:
+    """
+    Backend de muestreo que lee /proc/<pid>/stat directamente, sin pasar
+    por psutil.
+
+    /proc/<pid>/stat trae en una sola lectura el nombre, estado, tiempos
+    de CPU, hora de inicio y RSS (en páginas), así que no hace falta abrir
+    statm ni status. El archivo se lee con un solo os.readv sobre un
+    buffer reutilizable, y el usuario sale del fstat del mismo descriptor
+    (los archivos de /proc/<pid> pertenecen al uid efectivo del proceso),
+    con la traducción uid -> nombre cacheada. Los procesos no volcables
+    (setuid, ssh-agent, sandboxes) aparecen como de root, así que con
+    uid 0 se confirma con la línea Uid: de status (el uid real, como
+    psutil). Nombre y usuario se guardan en una CacheMetadatos, así que
+    el fstat y el decode solo se hacen para procesos nuevos.
+    """
+
+    nombre = "procfs"
+
+    def __init__(self, raiz="/proc", leer_io=True):
+        self.raiz = raiz
+        self.leer_io = leer_io
+        self._buf = bytearray(4096)
+        self._usuarios = {}  # uid -> nombre de usuario
+        self.metadatos = CacheMetadatos()
+        self._btime = self._leer_btime()
+
+    @staticmethod
+    def disponible(raiz="/proc"):
+        return sys.platform.startswith("linux") and os.path.exists(os.path.join(raiz, "self", "stat"))
+
+    # ---- lecturas globales ----
+
+    def _leer_btime(self):
+        try:
+            with open(os.path.join(self.raiz, "stat"), "rb") as f:
+                for linea in f:
+                    if linea.startswith(b"btime"):
+                        return float(linea.split()[1])
+        except OSError:
+            pass
+        return 0.0
+
+    def _leer_memtotal(self):
+        try:
+            with open(os.path.join(self.raiz, "meminfo"), "rb") as f:
+                for linea in f:
+                    if linea.startswith(b"MemTotal:"):
+                        return int(linea.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+
+    # ---- por proceso ----
+
+    def _usuario(self, uid):
+        nombre = self._usuarios.get(uid)
+        if nombre is None:
+            import pwd  # solo existe en Unix; colector importa este módulo también en Windows
+            try:
+                nombre = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                nombre = str(uid)
+            self._usuarios[uid] = nombre
+        return nombre
+
+    def _uid_real(self, pid):
+        """
+        uid real de la línea 'Uid:' de /proc/<pid>/status, o None.
+        """
+        try:
+            with open(f"{self.raiz}/{pid}/status", "rb") as f:
+                for linea in f:
+                    if linea.startswith(b"Uid:"):
+                        return int(linea.split()[1])
+        except (OSError, IndexError, ValueError):
+            pass
+        return None
+
+    def _leer_io(self, pid):
+        try:
+            fd = os.open(f"{self.raiz}/{pid}/io", os.O_RDONLY)
+        except OSError:
+            return None, None  # sin permiso (procesos de otros usuarios)
+        try:
+            n = os.readv(fd, [self._buf])
+        except OSError:
+            return None, None
+        finally:
+            os.close(fd)
+        lectura = escritura = None
+        for linea in bytes(self._buf[:n]).splitlines():
+            if linea.startswith(b"read_bytes:"):
+                lectura = int(linea[11:])
+            elif linea.startswith(b"write_bytes:"):
+                escritura = int(linea[12:])
+        return lectura, escritura
+
+    def procesos(self):
+        """
+        Genera un registro por proceso:
+        (pid, create_time, ppid, nombre, usuario, estado, cpu_seg, mem %, rss, io_lectura, io_escritura)
+        cpu_seg es el tiempo de CPU acumulado (user + system) en segundos; los
+        contadores de disco son acumulados (bytes) o None si no se pudieron leer.
+        """
+        raiz = self.raiz
+        buf = self._buf
+        memtotal = self._leer_memtotal() or 1
+        metadatos = self.metadatos
+
+        for entrada in os.listdir(raiz):
+            if not entrada.isdigit():
+                continue
+            try:
+                fd = os.open(f"{raiz}/{entrada}/stat", os.O_RDONLY)
+            except OSError:
+                continue  # terminó entre el listdir y el open
+            try:
+                n = os.readv(fd, [buf])
+
+                # "pid (comm) estado ppid ..." -- comm puede tener espacios y paréntesis
+                cierra = buf.rfind(b")", 0, n)
+                if cierra < 0:
+                    continue
+                campos = buf[cierra + 2:n].split()
+                pid = int(entrada)
+                create_time = self._btime + int(campos[19]) / CLK_TCK
+                ppid = int(campos[1])
+
+                # nombre y usuario solo se leen la primera vez que se ve el proceso
+                meta = metadatos.buscar(pid, create_time)
+                if meta is None:
+                    abre = buf.find(b"(", 0, n)
+                    nombre = buf[abre + 1:cierra].decode("utf-8", "replace")
+                    uid = os.fstat(fd).st_uid
+                    if uid == 0:  # root, o un proceso no volcable
+                        uid = self._uid_real(pid)
+                        if uid is None:
+                            uid = 0
+                    meta = Metadatos(nombre, self._usuario(uid))
+                    metadatos.guardar(pid, create_time, meta)
+            except (OSError, IndexError, ValueError):
+                continue
+            finally:
+                os.close(fd)
+
+            estado = ESTADOS_PROC.get(chr(campos[0][0]), "")
+            cpu_seg = (int(campos[11]) + int(campos[12])) / CLK_TCK
+            rss = int(campos[21]) * PAGESIZE
+            if self.leer_io:
+                lectura, escritura = self._leer_io(pid)
+            else:
+                lectura = escritura = None
+
+            yield (pid, create_time, ppid, meta.nombre, meta.usuario, estado,
+                   cpu_seg, rss * 100.0 / memtotal, rss, lectura, escritura)
+
+        metadatos.barrer()
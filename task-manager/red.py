@@ -0,0 +1,279 @@
+"""
+Tráfico de red por proceso (solo Linux).
+
+/proc/net/tcp* y udp* listan los sockets pero no traen bytes, así que los
+contadores por socket salen de NETLINK_SOCK_DIAG (lo mismo que usa
+'ss -ti'): tcp_info.bytes_received y tcp_info.bytes_acked de cada socket
+TCP, con su inodo. El dueño de cada inodo se encuentra en los enlaces
+'socket:[inodo]' de /proc/<pid>/fd.
+
+Límites: UDP no lleva contadores de bytes por socket, y sock_diag solo ve
+los sockets del espacio de nombres de red propio (los contenedores con red
+aparte no se atribuyen). Sin permisos de root solo se pueden leer los fd
+de los procesos propios.
+"""
+import heapq, os, socket, struct, sys
+
+from contabilidad import EstadoPorProceso
+
+# --------------------------------------------------
+# Contadores por socket (NETLINK_SOCK_DIAG)
+# --------------------------------------------------
+
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+INET_DIAG_INFO = 2
+
+NLMSGHDR = struct.Struct("=IHHII")
+# inet_diag_req_v2: familia, protocolo, extensiones, relleno, estados, sockid (48 bytes)
+PEDIDO = struct.Struct("=BBBxI48x")
+ATRIBUTO = struct.Struct("=HH")
+INODO = struct.Struct("=I")
+BYTES_TCP = struct.Struct("=QQ")  # tcp_info.bytes_acked, tcp_info.bytes_received
+
+OFFSET_INODO = 68     # idiag_inode dentro de inet_diag_msg
+LARGO_DIAG_MSG = 72
+OFFSET_BYTES = 120    # bytes_acked dentro de tcp_info (Linux >= 4.1)
+
+
+def _alinear(n):
+    return (n + 3) & ~3
+
+
+def _volcar_tcp(sock, familia, contadores):
+    pedido = PEDIDO.pack(familia, socket.IPPROTO_TCP, 1 << (INET_DIAG_INFO - 1), 0xFFFFFFFF)
+    sock.send(NLMSGHDR.pack(NLMSGHDR.size + len(pedido), SOCK_DIAG_BY_FAMILY,
+                            NLM_F_REQUEST | NLM_F_DUMP, 1, 0) + pedido)
+    while True:
+        datos = sock.recv(1 << 16)
+        pos = 0
+        while pos + NLMSGHDR.size <= len(datos):
+            largo, tipo = NLMSGHDR.unpack_from(datos, pos)[:2]
+            if tipo == NLMSG_DONE:
+                return
+            if tipo == NLMSG_ERROR:
+                raise OSError("sock_diag devolvió un error")
+            msg = pos + NLMSGHDR.size
+            fin = pos + largo
+            attr = msg + LARGO_DIAG_MSG
+            while attr + ATRIBUTO.size <= fin:
+                alen, atipo = ATRIBUTO.unpack_from(datos, attr)
+                if alen < ATRIBUTO.size:
+                    break
+                if atipo == INET_DIAG_INFO and alen - ATRIBUTO.size >= OFFSET_BYTES + BYTES_TCP.size:
+                    enviados, recibidos = BYTES_TCP.unpack_from(datos, attr + ATRIBUTO.size + OFFSET_BYTES)
+                    inodo = INODO.unpack_from(datos, msg + OFFSET_INODO)[0]
+                    if inodo:
+                        contadores[inodo] = (recibidos, enviados)
+                    break
+                attr += _alinear(alen)
+            pos += _alinear(largo)
+
+
+def leer_sockets_tcp():
+    """
+    {inodo: (bytes recibidos, bytes enviados)} de todos los sockets TCP
+    (IPv4 e IPv6) del espacio de nombres de red actual. Los enviados son
+    los confirmados por el otro extremo (bytes_acked).
+    """
+    contadores = {}
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_SOCK_DIAG) as sock:
+        for familia in (socket.AF_INET, socket.AF_INET6):
+            _volcar_tcp(sock, familia, contadores)
+    return contadores
+
+# --------------------------------------------------
+# Inodos de socket por proceso
+# --------------------------------------------------
+
+def inodos_de_socket(raiz, pid):
+    """
+    Inodos de los sockets abiertos por un proceso, o None si no se pueden
+    leer sus fd (sin permiso o terminó).
+    """
+    carpeta = f"{raiz}/{pid}/fd"
+    try:
+        fds = os.listdir(carpeta)
+    except OSError:
+        return None
+    inodos = set()
+    for fd in fds:
+        try:
+            destino = os.readlink(f"{carpeta}/{fd}")
+        except OSError:
+            continue  # se cerró mientras se recorría
+        if destino.startswith("socket:["):
+            inodos.add(int(destino[8:-1]))
+    return inodos
+
+
+class _Sockets:
+    """
+    Lo que se sabe de los sockets de un proceso.
+    """
+
+    __slots__ = ("inodos", "escaneo", "rx", "tx")
+
+    def __init__(self):
+        self.inodos = None   # None = todavía no se leyeron sus fd
+        self.escaneo = None  # instante (monotónico) de la última lectura de fd
+        self.rx = 0.0
+        self.tx = 0.0
+
+# --------------------------------------------------
+# Contabilidad de red por proceso
+# --------------------------------------------------
+
+class ContabilidadRed(EstadoPorProceso):
+    """
+    Tasas de red (B/s recibidos y enviados) por proceso, por
+    (pid, create_time).
+
+    muestrear() va al principio de cada tick: lee los contadores de todos
+    los sockets TCP, los resta de la lectura anterior y reparte los bytes
+    entre los dueños de cada inodo. tasas() da el resultado de cada
+    proceso durante el recorrido y barrer() olvida los que terminaron.
+
+    Leer /proc/<pid>/fd es lo caro, así que el mapa inodo -> proceso se
+    cachea y solo se relee cuando hay tráfico de un socket sin dueño
+    conocido: primero los procesos que nunca se leyeron y después los
+    leídos hace más tiempo, hasta max_escaneos procesos por tick. Un inodo
+    que no aparece después de releer todos los procesos (de otro usuario
+    sin permiso, del kernel) se deja de buscar.
+    """
+
+    def __init__(self, raiz="/proc", max_escaneos=200, leer_sockets=leer_sockets_tcp):
+        super().__init__()
+        self.raiz = raiz
+        self.max_escaneos = max_escaneos
+        self.leer_sockets = leer_sockets
+        self.duenos = {}      # inodo -> (pid, create_time)
+        self._previos = None  # {inodo: (rx, tx)} de la lectura anterior
+        self._t_previo = None
+        self._buscados = {}   # inodo sin dueño -> instante en que se vio por primera vez
+        self._perdidos = set()  # inodos sin dueño que ya no se buscan
+        self.escaneos = 0     # lecturas de /proc/<pid>/fd en el último tick
+        self.sin_dueno = 0.0  # B/s de sockets sin dueño conocido en el último tick
+
+    @staticmethod
+    def disponible():
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            leer_sockets_tcp()
+        except (OSError, AttributeError):
+            return False
+        return True
+
+    # ---- tick ----
+
+    def muestrear(self, ahora):
+        """
+        Calcula las tasas de este tick. 'ahora' es time.monotonic().
+        """
+        contadores = self.leer_sockets()
+        previos, t_previo = self._previos, self._t_previo
+        self._previos, self._t_previo = contadores, ahora
+        for entrada in self._datos.values():
+            entrada.rx = entrada.tx = 0.0
+        self.escaneos = 0
+        self.sin_dueno = 0.0
+        if previos is None or ahora <= t_previo:
+            return
+        dt = ahora - t_previo
+
+        # tasas por inodo; un socket que no estaba en la lectura anterior
+        # se abrió durante el intervalo y todo su contador es de este tick
+        activos = {}
+        for inodo, (rx, tx) in contadores.items():
+            previo = previos.get(inodo)
+            if previo is not None:
+                rx, tx = rx - previo[0], tx - previo[1]
+            if rx > 0 or tx > 0:
+                activos[inodo] = (max(rx, 0) / dt, max(tx, 0) / dt)
+
+        self._perdidos &= contadores.keys()
+        for inodo in [i for i in self._buscados if i not in contadores]:
+            del self._buscados[inodo]
+        faltan = [i for i in activos
+                  if i not in self.duenos and i not in self._perdidos]
+        if faltan:
+            self._buscar(faltan, ahora)
+
+        datos = self._datos
+        for inodo, (rx, tx) in activos.items():
+            clave = self.duenos.get(inodo)
+            entrada = datos.get(clave) if clave is not None else None
+            if entrada is None:
+                self.sin_dueno += rx + tx
+                continue
+            entrada.rx += rx
+            entrada.tx += tx
+
+    def _buscar(self, faltan, ahora):
+        buscados = self._buscados
+        for inodo in faltan:
+            buscados.setdefault(inodo, ahora)
+        pendientes = set(faltan)
+
+        def antiguedad(clave):
+            escaneo = self._datos[clave].escaneo
+            return float("-inf") if escaneo is None else escaneo
+
+        for clave in heapq.nsmallest(self.max_escaneos, self._datos, key=antiguedad):
+            self._escanear(clave, ahora)
+            pendientes -= self.duenos.keys()
+            if not pendientes:
+                break
+
+        for inodo in faltan:
+            if inodo in self.duenos:
+                buscados.pop(inodo, None)
+
+        # si ya se releyeron todos los procesos desde que apareció el inodo,
+        # no es de ninguno que se pueda leer
+        if self._datos:
+            mas_viejo = min(antiguedad(clave) for clave in self._datos)
+            for inodo in [i for i, desde in buscados.items() if desde <= mas_viejo]:
+                del buscados[inodo]
+                self._perdidos.add(inodo)
+
+    def _escanear(self, clave, ahora):
+        entrada = self._datos[clave]
+        inodos = inodos_de_socket(self.raiz, clave[0])
+        self.escaneos += 1
+        entrada.escaneo = ahora
+        duenos = self.duenos
+        for inodo in entrada.inodos or ():
+            if duenos.get(inodo) == clave:
+                del duenos[inodo]
+        entrada.inodos = inodos or set()
+        for inodo in entrada.inodos:
+            # un socket heredado por fork se cuenta una sola vez
+            duenos.setdefault(inodo, clave)
+
+    # ---- por proceso ----
+
+    def tasas(self, pid, create_time):
+        """
+        (B/s recibidos, B/s enviados) del proceso en el último muestreo.
+        """
+        entrada = self.obtener(pid, create_time)
+        if entrada is None:
+            self.guardar(pid, create_time, _Sockets())
+            return 0.0, 0.0
+        self.tocar(pid, create_time)
+        return entrada.rx, entrada.tx
+
+    def barrer(self):
+        muertos = [clave for clave in self._datos if clave not in self._vistos]
+        duenos = self.duenos
+        for clave in muertos:
+            for inodo in self._datos[clave].inodos or ():
+                if duenos.get(inodo) == clave:
+                    del duenos[inodo]
+        return super().barrer()
@@ -0,0 +1,380 @@
+"""
+Monitoreo remoto: un agente que sirve las fotos de procesos de su equipo
+por un socket TCP o Unix, y un cliente asyncio que sigue a varios agentes
+a la vez desde un solo hilo.
+
+Protocolo (little-endian), sobre una conexión persistente:
+
+    cabecera  "TMNET\\0" | versión H | intervalo d | cada_clave I | compresión B
+              | largo H + nombre del equipo (utf-8)
+    marcos    los del formato de grabación (grabador.py): STRS, KEYF, DELT
+
+Cada conexión tiene su propio Codificador: empieza con un KEYF y sigue con
+deltas (solo las filas nuevas o que cambiaron), comprimidos con zlib. Los
+marcos de una foto salen juntos en una sola escritura. Si un cliente lee
+más lento de lo que se muestrea, se saltan fotos: el delta siguiente se
+calcula contra la última que ese cliente recibió.
+
+El agente no autentica: por defecto escucha solo en 127.0.0.1 (o en un
+socket Unix); para otro equipo conviene un túnel SSH.
+
+Uso:
+
+    python remoto.py agente --tcp 127.0.0.1:7077 --interval 2
+    python remoto.py agente --unix /tmp/tm.sock
+    python remoto.py ver 127.0.0.1:7077 unix:/tmp/tm.sock --count 5
+"""
+import argparse, asyncio, socket, sys, threading, time
+
+from grabador import (CABECERA, COLUMNAS_POR_VERSION, LARGO_CADENA, MARCO, VERSION, Codificador,
+                      Decodificador)
+
+MAGICO = b"TMNET\x00"
+PUERTO = 7077
+REINTENTO = 2.0  # segundos entre intentos de reconexión
+
+# --------------------------------------------------
+# Direcciones
+# --------------------------------------------------
+
+def leer_direccion(texto):
+    """
+    'host:puerto', 'host' (puerto PUERTO), 'unix:/ruta' o '/ruta' ->
+    ("tcp", host, puerto) o ("unix", ruta, None).
+    """
+    if texto.startswith("unix:"):
+        return "unix", texto[5:], None
+    if texto.startswith("/"):
+        return "unix", texto, None
+    host, _, puerto = texto.rpartition(":")
+    if not host:
+        return "tcp", texto, PUERTO
+    return "tcp", host.strip("[]"), int(puerto)
+
+
+async def _abrir(direccion):
+    tipo, destino, puerto = leer_direccion(direccion)
+    if tipo == "unix":
+        return await asyncio.open_unix_connection(destino)
+    return await asyncio.open_connection(destino, puerto)
+
+# --------------------------------------------------
+# Agente
+# --------------------------------------------------
+
+class _Conexion:
+    __slots__ = ("codificador", "hay_foto", "bytes_enviados")
+
+    def __init__(self, cada_clave, comprimir):
+        self.codificador = Codificador(cada_clave=cada_clave, comprimir=comprimir)
+        self.hay_foto = asyncio.Event()
+        self.bytes_enviados = 0
+
+
+class Agente:
+    """
+    Muestrea con un Colector propio (en su hilo) y manda cada foto nueva a
+    todas las conexiones abiertas. Las conexiones se atienden en un bucle
+    asyncio; el hilo del colector solo avisa con call_soon_threadsafe.
+
+    muestrear se puede reemplazar (p. ej. por benchmark.FuenteSintetica)
+    para levantar varios agentes de prueba en la misma máquina.
+    """
+
+    def __init__(self, muestrear=None, intervalo=2.0, cada_clave=60, comprimir=True, nombre=None):
+        from colector import Colector, obtener_procesos_snapshot
+
+        self.colector = Colector(muestrear or obtener_procesos_snapshot, intervalo=intervalo)
+        self.intervalo = intervalo
+        self.cada_clave = cada_clave
+        self.comprimir = comprimir
+        self.nombre = nombre or socket.gethostname()
+        self.conexiones = set()
+        self.servidores = []
+        self._ultima = None
+        self._loop = None
+
+    async def iniciar(self, tcp=(), unix=()):
+        """
+        Abre los sockets pedidos ('host:puerto' y rutas) y arranca el colector.
+        """
+        self._loop = asyncio.get_running_loop()
+        for direccion in tcp:
+            _, host, puerto = leer_direccion(direccion)
+            self.servidores.append(await asyncio.start_server(self._atender, host, puerto))
+        for ruta in unix:
+            self.servidores.append(await asyncio.start_unix_server(self._atender, ruta))
+        self.colector.al_publicar.append(self._publicada)
+        self.colector.iniciar()
+
+    def direcciones(self):
+        """
+        Direcciones en las que escucha (con el puerto real si se pidió el 0).
+        """
+        salida = []
+        for servidor in self.servidores:
+            for sock in servidor.sockets:
+                nombre = sock.getsockname()
+                if isinstance(nombre, tuple):
+                    salida.append(f"{nombre[0]}:{nombre[1]}")
+                else:
+                    salida.append(f"unix:{nombre}")
+        return salida
+
+    async def detener(self):
+        self.colector.detener()
+        for servidor in self.servidores:
+            servidor.close()
+            await servidor.wait_closed()
+        self.servidores = []
+
+    def _publicada(self, snapshot):
+        # hilo del colector
+        self._loop.call_soon_threadsafe(self._nueva_foto, snapshot)
+
+    def _nueva_foto(self, snapshot):
+        self._ultima = snapshot
+        for conexion in self.conexiones:
+            conexion.hay_foto.set()
+
+    async def _atender(self, lector, escritor):
+        conexion = _Conexion(self.cada_clave, self.comprimir)
+        nombre = self.nombre.encode("utf-8")[:0xFFFF]
+        self.conexiones.add(conexion)
+        try:
+            escritor.write(CABECERA.pack(MAGICO, VERSION, self.intervalo, self.cada_clave,
+                                         int(self.comprimir))
+                           + LARGO_CADENA.pack(len(nombre)) + nombre)
+            if self._ultima is not None:
+                conexion.hay_foto.set()  # el cliente nuevo no espera al próximo muestreo
+            while True:
+                await conexion.hay_foto.wait()
+                conexion.hay_foto.clear()
+                datos = conexion.codificador.codificar(self._ultima)
+                escritor.write(datos)
+                conexion.bytes_enviados += len(datos)
+                await escritor.drain()
+        except (ConnectionError, OSError):
+            pass  # el cliente se fue
+        finally:
+            self.conexiones.discard(conexion)
+            escritor.close()
+
+# --------------------------------------------------
+# Cliente
+# --------------------------------------------------
+
+class Equipo:
+    """
+    Estado de un agente seguido por el ClienteRemoto.
+    """
+
+    __slots__ = ("direccion", "nombre", "estado", "version", "snapshot", "bytes_recibidos",
+                 "tarea")
+
+    def __init__(self, direccion):
+        self.direccion = direccion
+        self.nombre = direccion   # se reemplaza por el que manda el agente
+        self.estado = "conectando"
+        self.version = 0
+        self.snapshot = None
+        self.bytes_recibidos = 0
+        self.tarea = None
+
+
+class ClienteRemoto:
+    """
+    Sigue a varios agentes desde un bucle asyncio en un hilo propio (una
+    tarea por agente, con reconexión). Como el Colector, publica por equipo
+    la última foto terminada con su versión: la interfaz solo consulta
+    ultimo() y nunca espera a la red.
+    """
+
+    def __init__(self, reintento=REINTENTO):
+        self.reintento = reintento
+        self.equipos = {}  # dirección -> Equipo
+        self._lock = threading.Lock()
+        self._loop = None
+        self._hilo = None
+
+    # ---- control (desde cualquier hilo) ----
+
+    def _asegurar_bucle(self):
+        if self._hilo is None:
+            self._loop = asyncio.new_event_loop()
+            self._hilo = threading.Thread(target=self._loop.run_forever, name="remotos",
+                                          daemon=True)
+            self._hilo.start()
+
+    def conectar(self, direccion):
+        if direccion in self.equipos:
+            return
+        leer_direccion(direccion)  # ValueError si está mal escrita
+        self._asegurar_bucle()
+        equipo = Equipo(direccion)
+        with self._lock:
+            self.equipos[direccion] = equipo
+        self._loop.call_soon_threadsafe(self._lanzar, equipo)
+
+    def desconectar(self, direccion):
+        with self._lock:
+            equipo = self.equipos.pop(direccion, None)
+        if equipo is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._cancelar, equipo)
+
+    def detener(self):
+        with self._lock:
+            equipos = list(self.equipos.values())
+            self.equipos = {}
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cerrar(equipos), self._loop).result(timeout=2)
+        except Exception:
+            pass  # se cierra igual
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._hilo.join(timeout=1)
+        if not self._loop.is_running():
+            self._loop.close()
+        self._loop = self._hilo = None
+
+    def ultimo(self, direccion):
+        """
+        (versión, snapshot) de la última foto de ese agente; (0, None) si
+        todavía no llegó ninguna.
+        """
+        with self._lock:
+            equipo = self.equipos.get(direccion)
+            if equipo is None or equipo.snapshot is None:
+                return 0, None
+            return equipo.version, equipo.snapshot
+
+    # ---- dentro del bucle ----
+
+    def _lanzar(self, equipo):
+        equipo.tarea = self._loop.create_task(self._seguir(equipo))
+
+    def _cancelar(self, equipo):
+        if equipo.tarea is not None:
+            equipo.tarea.cancel()
+
+    async def _cerrar(self, equipos):
+        tareas = [e.tarea for e in equipos if e.tarea is not None]
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
+    async def _seguir(self, equipo):
+        while True:
+            escritor = None
+            try:
+                lector, escritor = await _abrir(equipo.direccion)
+                await self._recibir(equipo, lector)
+                equipo.estado = "desconectado"
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                equipo.estado = f"error: {e}" if str(e) else "desconectado"
+            except Exception as e:  # zlib.error, struct.error: datos corruptos
+                equipo.estado = f"error: {e}"
+            finally:
+                if escritor is not None:
+                    escritor.close()
+            await asyncio.sleep(self.reintento)
+
+    async def _recibir(self, equipo, lector):
+        cabecera = await lector.readexactly(CABECERA.size)
+        magico, version, _, _, comprimir = CABECERA.unpack(cabecera)
+        if magico != MAGICO or version not in COLUMNAS_POR_VERSION:
+            raise ValueError("no es un agente (o es de otra versión)")
+        (largo,) = LARGO_CADENA.unpack(await lector.readexactly(LARGO_CADENA.size))
+        equipo.nombre = (await lector.readexactly(largo)).decode("utf-8", "replace")
+        equipo.estado = "conectado"
+        decodificador = Decodificador(COLUMNAS_POR_VERSION[version], bool(comprimir))
+
+        while True:
+            tipo, largo, timestamp = MARCO.unpack(await lector.readexactly(MARCO.size))
+            contenido = await lector.readexactly(largo)
+            equipo.bytes_recibidos += MARCO.size + largo
+            snapshot = decodificador.aplicar(tipo, timestamp, contenido)
+            if snapshot is not None:
+                with self._lock:
+                    equipo.version += 1
+                    equipo.snapshot = snapshot
+
+# --------------------------------------------------
+# Línea de comandos
+# --------------------------------------------------
+
+def _agente(args):
+    muestrear = None
+    if args.sintetico:
+        from benchmark import FuenteSintetica
+        muestrear = FuenteSintetica(args.sintetico)
+    tcp = args.tcp or ([] if args.unix else [f"127.0.0.1:{PUERTO}"])
+
+    async def correr():
+        agente = Agente(muestrear, args.interval, args.cada_clave, not args.sin_compresion,
+                        args.nombre)
+        await agente.iniciar(tcp, args.unix)
+        print("escuchando en " + ", ".join(agente.direcciones()), flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await agente.detener()
+
+    try:
+        asyncio.run(correr())
+    except KeyboardInterrupt:
+        pass
+
+
+def _ver(args):
+    cliente = ClienteRemoto()
+    for direccion in args.direcciones:
+        cliente.conectar(direccion)
+    try:
+        n = 0
+        while not args.count or n < args.count:
+            time.sleep(args.interval)
+            n += 1
+            for direccion, equipo in list(cliente.equipos.items()):
+                _, snapshot = cliente.ultimo(direccion)
+                procesos = len(snapshot) if snapshot is not None else "-"
+                print(f"{equipo.nombre} ({direccion}): {equipo.estado}, {procesos} procesos, "
+                      f"{equipo.version} fotos, {equipo.bytes_recibidos / 1024:.1f} KiB")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cliente.detener()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monitoreo remoto de procesos")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("agente", help="sirve las fotos de este equipo")
+    p.add_argument("--tcp", action="append", default=[],
+                   help=f"host:puerto donde escuchar (default 127.0.0.1:{PUERTO})")
+    p.add_argument("--unix", action="append", default=[], help="socket Unix donde escuchar")
+    p.add_argument("--interval", type=float, default=2.0)
+    p.add_argument("--cada-clave", type=int, default=60, help="marcos entre fotos completas")
+    p.add_argument("--sin-compresion", action="store_true")
+    p.add_argument("--nombre", default=None, help="nombre del equipo (default: hostname)")
+    p.add_argument("--sintetico", type=int, default=0,
+                   help="servir N procesos sintéticos en lugar de los reales (pruebas)")
+    p.set_defaults(funcion=_agente)
+
+    p = sub.add_parser("ver", help="se conecta a agentes y resume lo que llega")
+    p.add_argument("direcciones", nargs="+")
+    p.add_argument("--interval", type=float, default=2.0)
+    p.add_argument("--count", type=int, default=0, help="0 = sin fin")
+    p.set_defaults(funcion=_ver)
+
+    args = parser.parse_args(argv)
+    args.funcion(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
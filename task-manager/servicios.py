@@ -1,12 +1,11 @@
-import psutil
 from tabulate import tabulate
 
+from unidades import fuente_por_defecto
+
 def mostrar_servicios():
-    servicios = []
-    for s in psutil.win_service_iter():
-        try:
-            info = s.as_dict()
-            servicios.append([info['name'], info['status'], info['display_name']])
-        except Exception:
-            continue
-    print(tabulate(servicios, headers=["Nombre", "Estado", "Descripción"], tablefmt="fancy_grid"))
+    listar = fuente_por_defecto()
+    if listar is None:
+        print("Servicios no disponibles en este sistema")
+        return
+    servicios = [[u.nombre, u.estado, u.pid or "", u.descripcion] for u in listar()]
+    print(tabulate(servicios, headers=["Nombre", "Estado", "PID", "Descripción"], tablefmt="fancy_grid"))
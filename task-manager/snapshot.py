@@ -0,0 +1,284 @@
+from array import array
+import time
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él se usan los array de la stdlib
+    np = None
+
+MB = 1024 * 1024
+
+# --------------------------------------------------
+# Cadenas internadas
+# --------------------------------------------------
+
+class Internador:
+    """
+    Asigna un id entero estable a cada cadena (nombres, usuarios, estados).
+    La lista de cadenas solo crece, así que un id no cambia de significado
+    entre una foto y la siguiente.
+    """
+
+    def __init__(self):
+        self.cadenas = []
+        self._ids = {}
+
+    def id_de(self, cadena):
+        i = self._ids.get(cadena)
+        if i is None:
+            i = len(self.cadenas)
+            self._ids[cadena] = i
+            self.cadenas.append(cadena)
+        return i
+
+    def __len__(self):
+        return len(self.cadenas)
+
+# --------------------------------------------------
+# Foto columnar de procesos
+# --------------------------------------------------
+
+# columna de ids -> atributo con su tabla de cadenas
+TABLAS = {"nombre": "nombres", "usuario": "usuarios", "estado": "estados",
+          "cgroup": "cgroups"}
+
+# nombre de columna -> typecode del array
+COLUMNAS = {
+    "pid": "q",
+    "ppid": "q",       # PID del padre (0 = sin padre)
+    "cpu": "d",        # % de un núcleo (como psutil.cpu_percent)
+    "mem_pct": "d",
+    "rss": "Q",        # bytes
+    "estado": "B",     # id en la tabla de estados
+    "nombre": "I",     # id en la tabla de nombres
+    "usuario": "I",    # id en la tabla de usuarios
+    "io_lectura": "d",    # bytes/s leídos de disco
+    "io_escritura": "d",  # bytes/s escritos a disco
+}
+
+# columnas que solo trae la foto si el colector las midió (p. ej. la red,
+# solo en Linux); si faltan, las vistas muestran "-"
+COLUMNAS_OPCIONALES = {
+    "red_rx": "d",  # bytes/s recibidos por la red
+    "red_tx": "d",  # bytes/s enviados por la red
+    "cgroup": "I",  # id en la tabla de cgroups (0 = desconocido)
+}
+
+
+class ProcessSnapshot:
+    """
+    Foto inmutable de todos los procesos guardada por columnas: un array
+    tipado por campo, con el mismo índice para el mismo proceso. Los textos
+    (nombre, usuario, estado) se guardan como ids internados.
+
+    columna() devuelve una vista de solo lectura (numpy si está disponible),
+    y sumar_por()/indices() hacen las agregaciones y filtros sin recorrer
+    diccionarios.
+    """
+
+    __slots__ = ("timestamp", "_cols", "nombres", "usuarios", "estados", "cgroups",
+                 "_indice", "_pids_ordenados")
+
+    def __init__(self, timestamp, columnas, nombres, usuarios, estados, cgroups=None):
+        self.timestamp = timestamp
+        self._cols = columnas
+        self.nombres = nombres    # listas de cadenas compartidas con el Internador
+        self.usuarios = usuarios
+        self.estados = estados
+        self.cgroups = [] if cgroups is None else cgroups
+        self._indice = None
+        self._pids_ordenados = None
+
+    @classmethod
+    def vacio(cls):
+        return cls(0.0, {c: array(t) for c, t in COLUMNAS.items()}, [], [], [])
+
+    def __len__(self):
+        return len(self._cols["pid"])
+
+    # ---- acceso ----
+
+    def columna(self, nombre):
+        """
+        Vista de solo lectura de una columna: ndarray sin copia si hay numpy,
+        memoryview del array si no.
+        """
+        arr = self._cols[nombre]
+        if np is not None:
+            vista = np.frombuffer(arr, dtype=arr.typecode) if len(arr) else np.array([], dtype=arr.typecode)
+            vista.flags.writeable = False
+            return vista
+        return memoryview(arr).toreadonly()
+
+    def tiene(self, nombre):
+        return nombre in self._cols
+
+    def total_ids(self, grupo):
+        """
+        Cantidad de ids conocidos para una columna internada ('usuario', ...).
+        """
+        return len(getattr(self, TABLAS[grupo]))
+
+    def lista(self, nombre):
+        """
+        Columna como lista de Python (útil para recorrer fila por fila).
+        """
+        return self._cols[nombre].tolist()
+
+    def indice_de(self, pid):
+        """
+        Posición del proceso con ese PID, o None.
+        """
+        if self._indice is None:
+            self._indice = {p: i for i, p in enumerate(self._cols["pid"])}
+        return self._indice.get(pid)
+
+    def pids_ordenados(self):
+        """
+        (PIDs ordenados, posición de cada uno en la foto), para buscar rangos
+        de PID con bisect. Se calcula una vez por foto.
+        """
+        if self._pids_ordenados is None:
+            pids = self._cols["pid"]
+            if np is not None:
+                orden = np.argsort(self.columna("pid"), kind="stable")
+                self._pids_ordenados = (self.columna("pid")[orden].tolist(), orden.tolist())
+            else:
+                posiciones = sorted(range(len(pids)), key=pids.__getitem__)
+                self._pids_ordenados = ([pids[i] for i in posiciones], posiciones)
+        return self._pids_ordenados
+
+    def valor(self, columna, i):
+        return self._cols[columna][i]
+
+    def pid(self, i):
+        return self._cols["pid"][i]
+
+    def nombre(self, i):
+        return self.nombres[self._cols["nombre"][i]]
+
+    def usuario(self, i):
+        return self.usuarios[self._cols["usuario"][i]]
+
+    def estado(self, i):
+        return self.estados[self._cols["estado"][i]]
+
+    # ---- helpers vectorizados ----
+
+    def sumar_por(self, grupo, valores, minlength=0):
+        """
+        Suma la columna 'valores' agrupando por la columna de ids 'grupo'.
+        Devuelve una secuencia indexada por id (np.bincount o lista).
+        """
+        ids = self._cols[grupo]
+        vals = self._cols[valores]
+        if np is not None:
+            if not len(ids):
+                return np.zeros(minlength)
+            return np.bincount(self.columna(grupo), weights=self.columna(valores),
+                               minlength=minlength)
+        totales = [0.0] * max(minlength, (max(ids) + 1) if ids else 0)
+        for g, v in zip(ids, vals):
+            totales[g] += v
+        return totales
+
+    def contar_por(self, grupo, minlength=0):
+        ids = self._cols[grupo]
+        if np is not None:
+            if not len(ids):
+                return np.zeros(minlength, dtype=np.int64)
+            return np.bincount(self.columna(grupo), minlength=minlength)
+        cuenta = [0] * max(minlength, (max(ids) + 1) if ids else 0)
+        for g in ids:
+            cuenta[g] += 1
+        return cuenta
+
+    def indices(self, mascara):
+        """
+        Posiciones donde la máscara (secuencia de bool) es verdadera.
+        """
+        if np is not None:
+            return np.flatnonzero(mascara).tolist()
+        return [i for i, m in enumerate(mascara) if m]
+
+    def mascara_mayor(self, columna, umbral):
+        if np is not None:
+            return self.columna(columna) > umbral
+        return [v > umbral for v in self._cols[columna]]
+
+    def mascara_id(self, columna, ids):
+        """
+        Máscara de las filas cuya columna de ids está en 'ids'.
+        """
+        ids = set(ids)
+        if np is not None:
+            return np.isin(self.columna(columna), list(ids))
+        return [v in ids for v in self._cols[columna]]
+
+    def bytes_usados(self):
+        """
+        Memoria aproximada de las columnas (sin las tablas de cadenas compartidas).
+        """
+        return sum(a.buffer_info()[1] * a.itemsize for a in self._cols.values())
+
+
+class ConstructorSnapshot:
+    """
+    Arma una ProcessSnapshot fila por fila. Los Internador viven en el
+    constructor, así los ids se mantienen entre fotos consecutivas.
+    """
+
+    def __init__(self):
+        self.nombres = Internador()
+        self.usuarios = Internador()
+        self.estados = Internador()
+        self.cgroups = Internador()
+        self.cgroups.id_de("")  # id 0: cgroup desconocido
+        self._nuevas()
+
+    def _nuevas(self):
+        self._cols = {c: array(t) for c, t in COLUMNAS.items()}
+        self._opcionales = set()  # columnas opcionales que ya tiene esta foto
+
+    def agregar(self, pid, nombre, usuario, estado, cpu, mem_pct, rss,
+                io_lectura=0.0, io_escritura=0.0, ppid=0, red_rx=None, red_tx=None,
+                cgroup=None):
+        c = self._cols
+        c["pid"].append(pid)
+        c["ppid"].append(ppid or 0)
+        c["cpu"].append(cpu or 0.0)
+        c["mem_pct"].append(mem_pct or 0.0)
+        c["rss"].append(rss or 0)
+        c["estado"].append(self.estados.id_de(estado or ""))
+        c["nombre"].append(self.nombres.id_de(nombre or ""))
+        c["usuario"].append(self.usuarios.id_de(usuario or "Desconocido"))
+        c["io_lectura"].append(io_lectura)
+        c["io_escritura"].append(io_escritura)
+        # cada opcional por separado: sin sock_diag puede haber cgroups y al revés
+        if red_rx is not None or "red_rx" in self._opcionales:
+            self._agregar_opcional("red_rx", red_rx)
+            self._agregar_opcional("red_tx", red_tx)
+        if cgroup is not None or "cgroup" in self._opcionales:
+            self._agregar_opcional("cgroup", None if cgroup is None else self.cgroups.id_de(cgroup))
+
+    def _agregar_opcional(self, nombre, valor):
+        # la columna nace con la primera fila que trae el dato, con ceros
+        # para las filas anteriores
+        col = self._cols.get(nombre)
+        if col is None:
+            tipo = COLUMNAS_OPCIONALES[nombre]
+            col = self._cols[nombre] = array(tipo, bytes(array(tipo).itemsize * (len(self._cols["pid"]) - 1)))
+            self._opcionales.add(nombre)
+        col.append(valor or 0)
+
+    def terminar(self, timestamp=None):
+        snap = ProcessSnapshot(
+            time.time() if timestamp is None else timestamp,
+            self._cols,
+            self.nombres.cadenas,
+            self.usuarios.cadenas,
+            self.estados.cadenas,
+            self.cgroups.cadenas,
+        )
+        self._nuevas()
+        return snap
@@ -0,0 +1,615 @@
+from bisect import bisect_left, insort
+
+from perfil import perfil
+
+# --------------------------------------------------
+# Claves de orden
+# --------------------------------------------------
+
+def _clave_numerica(valor):
+    # las filas ya traen números; None u otros textos van al final
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return float("-inf")
+
+def _clave_texto(valor):
+    return "" if valor is None else str(valor).lower()
+
+def _subsecuencia_creciente(seq):
+    """
+    Índices de una subsecuencia creciente más larga de seq (O(n log n)).
+    """
+    colas = []      # último valor de cada longitud
+    colas_idx = []  # índice en seq de ese valor
+    previo = [-1] * len(seq)
+    for i, valor in enumerate(seq):
+        j = bisect_left(colas, valor)
+        if j == len(colas):
+            colas.append(valor)
+            colas_idx.append(i)
+        else:
+            colas[j] = valor
+            colas_idx[j] = i
+        previo[i] = colas_idx[j - 1] if j else -1
+
+    resultado = set()
+    i = colas_idx[-1] if colas_idx else -1
+    while i != -1:
+        resultado.add(i)
+        i = previo[i]
+    return resultado
+
+# --------------------------------------------------
+# Tabla: Treeview actualizado por diferencias
+# --------------------------------------------------
+
+
+class Tabla:
+    """
+    Mantiene un Treeview sincronizado con filas identificadas por una clave
+    (PID en Procesos/Detalles, nombre de usuario en Usuarios).
+
+    Todas las filas viven en un modelo del lado de Python (clave -> valores,
+    más el orden de las claves). Al Treeview solo se le aplican diferencias:
+    se insertan las filas nuevas, se actualizan con tree.item(...) las que
+    cambiaron y se borran en una sola llamada las que desaparecieron.
+
+    En modo virtual solo se materializa la ventana visible (unas 50 filas);
+    el scrollbar y la rueda del ratón mueven esa ventana sobre el modelo,
+    así que ordenar o cambiar el tema no depende de cuántos procesos haya.
+
+    El orden por columna se guarda en la propia Tabla (por pestaña) y se
+    mantiene entre refrescos: la clave de orden de cada fila se calcula una
+    vez a partir del valor tipado, y cuando cambian pocas filas se recolocan
+    por bisección en vez de reordenar todo.
+    """
+
+    ALTURA_FILA = 20       # px por fila del Treeview (tema clam)
+    ALTURA_ENCABEZADO = 24
+
+    # si cambian más de esta fracción de filas, conviene reordenar completo
+    UMBRAL_INCREMENTAL = 0.05
+
+    def __init__(self, tree, columnas, numericas=(), scrollbar=None, virtual=False,
+                 filas_visibles=50, nombre="tabla"):
+        self.tree = tree
+        self.etapa = f"tk {nombre}"  # etapa del perfil para las llamadas al widget
+        self.columnas = tuple(columnas)
+        self.numericas = set(numericas)
+        self.scrollbar = scrollbar
+
+        # estado de orden: columna activa (índice), sentido y claves precalculadas
+        self.orden_col = None
+        self.orden_desc = False
+        self._clave_col = None
+        self._ordenadas = []  # [(clave_orden, clave)] siempre ascendente
+        self._clave_de = {}   # clave -> clave_orden
+
+        # modelo completo
+        self.modelo = {}   # clave -> tupla de valores
+        self.orden = []    # claves en el orden en que se muestran
+
+        # filas materializadas en el Treeview
+        self.iids = {}        # clave -> iid
+        self.claves = {}      # iid -> clave
+        self.valores = {}     # clave -> valores mostrados
+        self._mostradas = []  # claves en el orden actual del widget
+        self._movidas = None  # claves que pudieron cambiar de posición (None = no se sabe)
+
+        self.seleccion = set()  # claves seleccionadas (sobrevive al scroll)
+
+        self.virtual = False
+        self.inicio = 0
+        self.filas_visibles = filas_visibles
+
+        tree.bind("<<TreeviewSelect>>", self._al_seleccionar, add="+")
+        self.set_virtual(virtual)
+
+    # ---- datos ----
+
+    def actualizar(self, filas):
+        """
+        filas: iterable de (clave, valores). Si no hay orden activo, las claves
+        nuevas se agregan al final; si lo hay, se colocan en su lugar.
+        Las que no vienen se quitan del modelo.
+        """
+        anterior = self.modelo
+        modelo = {}
+        nuevas = []
+        for clave, vals in filas:
+            modelo[clave] = vals
+            if clave not in anterior:
+                nuevas.append(clave)
+        self.modelo = modelo
+        self.seleccion &= modelo.keys()
+
+        if self.orden_col is None:
+            if len(modelo) - len(nuevas) != len(anterior):
+                self.orden = [clave for clave in self.orden if clave in modelo]
+            self.orden.extend(nuevas)
+            self._movidas = set()
+        else:
+            self._movidas = self._reordenar(anterior, nuevas)
+        self.render()
+
+    def ordenar_por(self, columna, desc=None):
+        """
+        Ordena por una columna (nombre). Sin 'desc', un segundo clic sobre la
+        misma columna invierte el sentido.
+        """
+        idx = self.columnas.index(columna)
+        if desc is None:
+            desc = (not self.orden_desc) if idx == self.orden_col else False
+        self.orden_col = idx
+        self.orden_desc = desc
+        self._clave_col = _clave_numerica if columna in self.numericas else _clave_texto
+
+        col = self.orden_col
+        clave_col = self._clave_col
+        self._clave_de = {clave: clave_col(vals[col]) for clave, vals in self.modelo.items()}
+        self._ordenar_todo()
+        self._marcar_encabezados()
+        self.render()
+
+    def _ordenar_todo(self):
+        self._ordenadas = sorted((ck, clave) for clave, ck in self._clave_de.items())
+        self._publicar_orden()
+
+    def _publicar_orden(self):
+        if self.orden_desc:
+            self.orden = [clave for _, clave in reversed(self._ordenadas)]
+        else:
+            self.orden = [clave for _, clave in self._ordenadas]
+
+    def _reordenar(self, anterior, nuevas):
+        """
+        Recoloca las filas nuevas, salientes y cambiadas. Devuelve las claves
+        cuya posición relativa pudo cambiar (las demás conservan su orden).
+        """
+        modelo = self.modelo
+        col = self.orden_col
+        clave_col = self._clave_col
+        clave_de = self._clave_de
+
+        # filas que salen o cuyo valor en la columna de orden cambió
+        quitar = [clave for clave in anterior if clave not in modelo]
+        cambiadas = [clave for clave, vals in modelo.items()
+                     if clave in anterior and vals[col] != anterior[clave][col]]
+
+        if len(quitar) + len(cambiadas) + len(nuevas) > self.UMBRAL_INCREMENTAL * len(modelo):
+            for clave in quitar:
+                del clave_de[clave]
+            for clave in cambiadas:
+                clave_de[clave] = clave_col(modelo[clave][col])
+            for clave in nuevas:
+                clave_de[clave] = clave_col(modelo[clave][col])
+            self._ordenar_todo()
+            return set(cambiadas)
+
+        ordenadas = self._ordenadas
+        for clave in quitar + cambiadas:
+            item = (clave_de.pop(clave), clave)
+            del ordenadas[bisect_left(ordenadas, item)]
+        for clave in cambiadas + nuevas:
+            ck = clave_col(modelo[clave][col])
+            clave_de[clave] = ck
+            insort(ordenadas, (ck, clave))
+        self._publicar_orden()
+        return set(cambiadas)
+
+    def _marcar_encabezados(self):
+        for i, col in enumerate(self.columnas):
+            texto = col
+            if i == self.orden_col:
+                texto += " ▼" if self.orden_desc else " ▲"
+            self.tree.heading(col, text=texto)
+
+    def limpiar(self):
+        self.modelo = {}
+        self.orden = []
+        self._ordenadas = []
+        self._clave_de = {}
+        self.seleccion.clear()
+        self.render()
+
+    # ---- ventana virtual ----
+
+    def set_virtual(self, virtual):
+        self.virtual = virtual
+        self.inicio = 0
+        if self.scrollbar is not None:
+            if virtual:
+                self.tree.configure(yscrollcommand="")
+                self.scrollbar.configure(command=self._al_scrollbar)
+            else:
+                self.tree.configure(yscrollcommand=self.scrollbar.set)
+                self.scrollbar.configure(command=self.tree.yview)
+        if virtual:
+            self.tree.bind("<Configure>", self._al_redimensionar)
+            for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.tree.bind(evento, self._al_rueda)
+        else:
+            for evento in ("<Configure>", "<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.tree.unbind(evento)
+        self.render()
+
+    def desplazar(self, filas):
+        self.ir_a(self.inicio + filas)
+
+    def ir_a(self, inicio):
+        maximo = max(len(self.orden) - self.filas_visibles, 0)
+        inicio = min(max(int(inicio), 0), maximo)
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self.render()
+
+    def _al_scrollbar(self, accion, cantidad, unidad=None):
+        if accion == "moveto":
+            self.ir_a(float(cantidad) * len(self.orden))
+        elif accion == "scroll":
+            paso = self.filas_visibles if unidad == "pages" else 1
+            self.desplazar(int(cantidad) * paso)
+
+    def _al_rueda(self, event):
+        if event.num == 4:
+            self.desplazar(-3)
+        elif event.num == 5:
+            self.desplazar(3)
+        elif event.delta:
+            self.desplazar(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _al_redimensionar(self, event):
+        filas = max((event.height - self.ALTURA_ENCABEZADO) // self.ALTURA_FILA, 1)
+        if filas != self.filas_visibles:
+            self.filas_visibles = filas
+            self.inicio = min(self.inicio, max(len(self.orden) - filas, 0))
+            self.render()
+
+    # ---- selección ----
+
+    def _al_seleccionar(self, event=None):
+        # solo se reemplaza la parte visible de la selección; lo seleccionado
+        # fuera de la ventana se recuerda hasta que el usuario lo cambie
+        visibles = set(self._mostradas)
+        marcadas = {self.claves[iid] for iid in self.tree.selection() if iid in self.claves}
+        self.seleccion = (self.seleccion - visibles) | marcadas
+
+    # ---- sincronizar con el widget ----
+
+    def _insertar(self, clave, posicion, reseleccionar):
+        vals = self.modelo[clave]
+        iid = self.tree.insert("", posicion, values=vals)
+        self.iids[clave] = iid
+        self.claves[iid] = clave
+        self.valores[clave] = vals
+        if clave in self.seleccion:
+            reseleccionar.append(iid)
+
+    def render(self):
+        with perfil.medir(self.etapa):
+            self._render()
+
+    def _render(self):
+        if self.virtual:
+            objetivo = self.orden[self.inicio:self.inicio + self.filas_visibles]
+        else:
+            objetivo = self.orden
+
+        tree = self.tree
+        iids = self.iids
+        claves = self.claves
+        valores = self.valores
+        modelo = self.modelo
+        objetivo_set = set(objetivo)
+
+        salientes = [clave for clave in self._mostradas if clave not in objetivo_set]
+        if salientes:
+            borrar = [iids.pop(clave) for clave in salientes]
+            tree.delete(*borrar)
+            for iid, clave in zip(borrar, salientes):
+                del claves[iid]
+                del valores[clave]
+
+        restantes = [clave for clave in self._mostradas if clave in objetivo_set]
+        reseleccionar = []
+
+        if restantes == objetivo[:len(restantes)]:
+            # caso común: mismo orden, a lo sumo filas nuevas al final
+            for clave in restantes:
+                vals = modelo[clave]
+                if valores[clave] != vals:
+                    tree.item(iids[clave], values=vals)
+                    valores[clave] = vals
+            for clave in objetivo[len(restantes):]:
+                self._insertar(clave, "end", reseleccionar)
+        else:
+            # las filas que conservan su orden relativo se quedan quietas; el
+            # resto se despega y se recoloca con un move cada una. Si no se sabe
+            # cuáles se movieron, se usa la subsecuencia creciente más larga.
+            if self._movidas is not None:
+                mover = [clave for clave in restantes if clave in self._movidas]
+            else:
+                posicion = {clave: i for i, clave in enumerate(objetivo)}
+                quietas = _subsecuencia_creciente([posicion[clave] for clave in restantes])
+                mover = [clave for i, clave in enumerate(restantes) if i not in quietas]
+            if mover:
+                tree.detach(*[iids[clave] for clave in mover])
+            mover = set(mover)
+            for idx, clave in enumerate(objetivo):
+                iid = iids.get(clave)
+                if iid is None:
+                    self._insertar(clave, idx, reseleccionar)
+                    continue
+                if clave in mover:
+                    tree.move(iid, "", idx)
+                vals = modelo[clave]
+                if valores[clave] != vals:
+                    tree.item(iid, values=vals)
+                    valores[clave] = vals
+
+        self._mostradas = list(objetivo)
+        self._movidas = None
+        if reseleccionar:
+            tree.selection_add(*reseleccionar)
+
+        if self.virtual and self.scrollbar is not None:
+            total = len(self.orden) or 1
+            self.scrollbar.set(self.inicio / total,
+                               min((self.inicio + self.filas_visibles) / total, 1.0))
+
+# --------------------------------------------------
+# TablaArbol: Treeview jerárquico actualizado por diferencias
+# --------------------------------------------------
+
+
+class TablaArbol:
+    """
+    Treeview jerárquico (padre -> hijos) sincronizado por diferencias, igual
+    que Tabla pero por niveles. La columna #0 lleva el texto del nodo.
+
+    Solo se materializan los hijos de los nodos abiertos: un nodo cerrado
+    con hijos lleva un único hijo vacío para que Tk dibuje el triángulo, y
+    al abrirlo (<<TreeviewOpen>>) se cargan los hijos de verdad. Así el
+    costo de cada refresco depende de lo que está desplegado y no de la
+    cantidad total de nodos.
+
+    Los hermanos se ordenan por la columna elegida (por clave si no hay
+    orden). Al reconciliar, los nodos que cambiaron de padre se despegan
+    antes de borrar los que salieron, y dentro de cada padre se mueven solo
+    los que no están en la subsecuencia creciente más larga.
+    """
+
+    def __init__(self, tree, columnas, numericas=(), texto="", nombre="arbol"):
+        self.tree = tree
+        self.etapa = f"tk {nombre}"
+        self.columnas = tuple(columnas)
+        self.numericas = set(numericas)
+        self.texto = texto  # encabezado de la columna #0
+
+        self.orden_col = None  # índice en columnas, -1 = columna #0
+        self.orden_desc = False
+
+        # modelo (lo arma arbol.datos_arbol o equivalente)
+        self._hijos = {}
+        self._raices = []
+        self._valores_de = None
+        self._visibles = None
+
+        # nodos materializados en el Treeview
+        self.iids = {}        # clave -> iid
+        self.claves = {}      # iid -> clave
+        self.valores = {}     # clave -> (texto, valores) mostrados
+        self._padre = {}      # clave -> clave del padre en el widget (None = raíz)
+        self._mostradas = {}  # clave padre -> hijas en el orden del widget
+        self._relleno = {}    # clave -> iid del hijo vacío
+
+        self.abiertos = set()
+        self.seleccion = set()
+
+        tree.bind("<<TreeviewOpen>>", self._al_abrir, add="+")
+        tree.bind("<<TreeviewClose>>", self._al_cerrar, add="+")
+        tree.bind("<<TreeviewSelect>>", self._al_seleccionar, add="+")
+
+    # ---- datos ----
+
+    def actualizar(self, hijos, raices, valores_de, visibles=None):
+        """
+        hijos: clave -> iterable de claves hijas; raices: claves del primer
+        nivel; valores_de(clave) -> (texto, valores), que solo se llama para
+        los nodos a la vista. visibles, si se da, restringe los nodos.
+        """
+        self._hijos = hijos
+        self._raices = raices
+        self._valores_de = valores_de
+        self._visibles = visibles
+        self.render()
+
+    def ordenar_por(self, columna, desc=None):
+        """
+        Ordena los hermanos por una columna (nombre, o "#0" para el texto).
+        Sin 'desc', un segundo clic sobre la misma columna invierte el sentido.
+        """
+        idx = -1 if columna == "#0" else self.columnas.index(columna)
+        if desc is None:
+            desc = (not self.orden_desc) if idx == self.orden_col else False
+        self.orden_col = idx
+        self.orden_desc = desc
+        self._marcar_encabezados()
+        self.render()
+
+    def _marcar_encabezados(self):
+        for i, col in [(-1, "#0"), *enumerate(self.columnas)]:
+            texto = self.texto if i == -1 else col
+            if i == self.orden_col:
+                texto += " ▼" if self.orden_desc else " ▲"
+            self.tree.heading(col, text=texto)
+
+    def limpiar(self):
+        self._hijos = {}
+        self._raices = []
+        self.seleccion.clear()
+        self.render()
+
+    def _hijas(self, clave):
+        hijas = self._raices if clave is None else self._hijos.get(clave, ())
+        if self._visibles is not None:
+            return [h for h in hijas if h in self._visibles]
+        return list(hijas)
+
+    def _tiene_hijas(self, clave):
+        hijas = self._hijos.get(clave, ())
+        if self._visibles is not None:
+            return any(h in self._visibles for h in hijas)
+        return bool(hijas)
+
+    def _ordenar(self, claves, filas):
+        col = self.orden_col
+        if col is None:
+            return sorted(claves)
+        if col == -1:
+            return sorted(claves, key=lambda k: (_clave_texto(filas[k][0]), k),
+                          reverse=self.orden_desc)
+        clave_col = _clave_numerica if self.columnas[col] in self.numericas else _clave_texto
+        return sorted(claves, key=lambda k: (clave_col(filas[k][1][col]), k),
+                      reverse=self.orden_desc)
+
+    # ---- abrir / cerrar / selección ----
+
+    def _al_abrir(self, event=None):
+        clave = self.claves.get(self.tree.focus())
+        if clave is not None and clave not in self.abiertos:
+            self.abiertos.add(clave)
+            self.render()
+
+    def _al_cerrar(self, event=None):
+        clave = self.claves.get(self.tree.focus())
+        if clave is not None and clave in self.abiertos:
+            self.abiertos.discard(clave)
+            self.render()
+
+    def _al_seleccionar(self, event=None):
+        # lo seleccionado dentro de nodos cerrados se recuerda
+        marcadas = {self.claves[iid] for iid in self.tree.selection() if iid in self.claves}
+        self.seleccion = {k for k in self.seleccion if k not in self.iids} | marcadas
+
+    # ---- sincronizar con el widget ----
+
+    def render(self):
+        with perfil.medir(self.etapa):
+            self._render()
+
+    def _render(self):
+        tree = self.tree
+        iids = self.iids
+
+        # lo que tiene que verse: los hijos de las raíces y de los nodos abiertos
+        filas = {}
+        objetivo = {}
+        destino = {}
+        pendientes = [None]
+        if self._valores_de is None:
+            pendientes = []
+            objetivo[None] = []
+        while pendientes:
+            padre = pendientes.pop()
+            hijas = self._hijas(padre)
+            for h in hijas:
+                filas[h] = self._valores_de(h)
+                destino[h] = padre
+            hijas = self._ordenar(hijas, filas)
+            objetivo[padre] = hijas
+            pendientes.extend(h for h in hijas if h in self.abiertos and h not in objetivo)
+
+        # los que cambian de padre se despegan antes de borrar nada
+        mudanzas = [k for k in iids if k in filas and self._padre[k] != destino[k]]
+        if mudanzas:
+            tree.detach(*[iids[k] for k in mudanzas])
+        salientes = [k for k in iids if k not in filas]
+        if salientes:
+            fuera = set(salientes)
+            tree.delete(*[iids[k] for k in salientes if self._padre[k] not in fuera])
+            for k in salientes:
+                del self.claves[iids.pop(k)]
+                del self.valores[k]
+                del self._padre[k]
+                self._relleno.pop(k, None)
+                self._mostradas.pop(k, None)
+
+        reseleccionar = []
+        for padre, hijas in objetivo.items():  # los padres antes que sus hijos
+            self._colocar(padre, hijas, filas, reseleccionar)
+        self._mostradas = {padre: hijas for padre, hijas in objetivo.items()}
+
+        # hijo vacío en los nodos cerrados que tienen hijos
+        for k in filas:
+            hace_falta = k not in objetivo and self._tiene_hijas(k)
+            relleno = self._relleno.get(k)
+            if hace_falta and relleno is None:
+                self._relleno[k] = tree.insert(iids[k], "end", text="")
+            elif not hace_falta and relleno is not None:
+                tree.delete(self._relleno.pop(k))
+
+        if reseleccionar:
+            tree.selection_add(*reseleccionar)
+
+    def _colocar(self, padre, hijas, filas, reseleccionar):
+        tree = self.tree
+        iids = self.iids
+        piid = "" if padre is None else iids[padre]
+        if padre is not None and padre in self._relleno:
+            tree.delete(self._relleno.pop(padre))
+
+        en_objetivo = set(hijas)
+        restantes = [k for k in self._mostradas.get(padre, ())
+                     if k in en_objetivo and k in iids and self._padre[k] == padre]
+
+        if restantes == hijas[:len(restantes)]:
+            for k in restantes:
+                self._refrescar(k, filas[k])
+            for k in hijas[len(restantes):]:
+                self._poner(k, piid, padre, "end", filas[k], reseleccionar)
+            return
+
+        posicion = {k: i for i, k in enumerate(hijas)}
+        quietas = _subsecuencia_creciente([posicion[k] for k in restantes])
+        mover = [k for i, k in enumerate(restantes) if i not in quietas]
+        if mover:
+            tree.detach(*[iids[k] for k in mover])
+        mover = set(mover)
+        for idx, k in enumerate(hijas):
+            if k in mover:
+                tree.move(iids[k], piid, idx)
+                self._refrescar(k, filas[k])
+            elif k in iids and self._padre[k] == padre:
+                self._refrescar(k, filas[k])
+            else:
+                self._poner(k, piid, padre, idx, filas[k], reseleccionar)
+
+    def _poner(self, clave, piid, padre, posicion, fila, reseleccionar):
+        """
+        Inserta el nodo, o lo vuelve a colgar si se había despegado al
+        cambiar de padre.
+        """
+        texto, vals = fila
+        iid = self.iids.get(clave)
+        if iid is None:
+            iid = self.tree.insert(piid, posicion, text=texto, values=vals,
+                                   open=clave in self.abiertos)
+            self.iids[clave] = iid
+            self.claves[iid] = clave
+            if clave in self.seleccion:
+                reseleccionar.append(iid)
+        else:
+            self.tree.move(iid, piid, posicion)
+            if self.valores[clave] != fila:
+                self.tree.item(iid, text=texto, values=vals)
+        self.valores[clave] = fila
+        self._padre[clave] = padre
+
+    def _refrescar(self, clave, fila):
+        if self.valores[clave] != fila:
+            texto, vals = fila
+            self.tree.item(self.iids[clave], text=texto, values=vals)
+            self.valores[clave] = fila
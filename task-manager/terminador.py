@@ -0,0 +1,178 @@
+import os, queue, threading
+
+import psutil
+
+# --------------------------------------------------
+# Finalizar procesos en lote
+# --------------------------------------------------
+
+GRACIA = 3.0       # segundos entre SIGTERM y SIGKILL
+ESPERA_KILL = 1.0  # segundos que se espera después de SIGKILL
+PASO_ESPERA = 0.1  # cada cuánto se revisan los zombis durante la espera
+
+
+class ResultadoLote:
+    """
+    Qué pasó con cada PID de un lote (listas de PIDs).
+    """
+
+    __slots__ = ("pedidos", "terminados", "forzados", "no_existian", "sin_permiso",
+                 "sobreviven", "error")
+
+    def __init__(self, pedidos):
+        self.pedidos = list(pedidos)
+        self.terminados = []   # salieron con SIGTERM
+        self.forzados = []     # hizo falta SIGKILL
+        self.no_existian = []
+        self.sin_permiso = []
+        self.sobreviven = []   # siguen vivos aun después de SIGKILL
+        self.error = None
+
+    def texto(self):
+        """
+        Resumen de una línea para la barra de estado.
+        """
+        if self.error is not None:
+            return f"Error al finalizar: {self.error}"
+        finalizados = len(self.terminados) + len(self.forzados)
+        partes = [f"Finalizados {finalizados} proceso{'s' if finalizados != 1 else ''}"]
+        if self.forzados:
+            partes.append(f"{len(self.forzados)} con SIGKILL")
+        if self.sin_permiso:
+            partes.append(f"{len(self.sin_permiso)} sin permiso")
+        if self.no_existian:
+            partes.append(f"{len(self.no_existian)} ya no existían")
+        if self.sobreviven:
+            partes.append("siguen vivos: " + ", ".join(map(str, self.sobreviven[:5])))
+        return " | ".join(partes)
+
+
+def _es_zombi(proc):
+    try:
+        return proc.status() == psutil.STATUS_ZOMBIE
+    except psutil.Error:
+        return True  # ya no existe
+
+
+def _esperar(procesos, timeout):
+    """
+    psutil.wait_procs en tramos cortos: un proceso que quedó zombi ya
+    terminó aunque nadie lo recoja todavía (y un SIGKILL no le hace nada),
+    así que no se espera la gracia completa por él.
+    """
+    terminados = []
+    vivos = list(procesos)
+    restante = timeout
+    while vivos and restante > 0:
+        paso = min(PASO_ESPERA, restante)
+        idos, vivos = psutil.wait_procs(vivos, timeout=paso)
+        terminados += idos
+        zombis = [p for p in vivos if _es_zombi(p)]
+        if zombis:
+            terminados += zombis
+            vivos = [p for p in vivos if p not in zombis]
+        restante -= paso
+    return terminados, vivos
+
+
+def finalizar_lote(pids, arbol=False, gracia=GRACIA):
+    """
+    Finaliza un lote de procesos con una sola escalada para todos: SIGTERM
+    a cada uno, una espera común (psutil.wait_procs) de hasta 'gracia' segundos
+    y SIGKILL a los que sigan vivos. Con arbol=True se suman los
+    descendientes de cada PID, leídos antes de enviar la primera señal
+    (después los huérfanos pasarían a colgar de init).
+
+    Bloquea hasta gracia + ESPERA_KILL segundos: se llama desde el hilo
+    del Terminador, nunca desde el de Tk. El propio proceso nunca se incluye.
+    """
+    resultado = ResultadoLote(pids)
+    propio = os.getpid()
+    procesos = {}
+    for pid in pids:
+        try:
+            proc = psutil.Process(pid)
+            procesos.setdefault(pid, proc)
+            if arbol:
+                for hijo in proc.children(recursive=True):
+                    procesos.setdefault(hijo.pid, hijo)
+        except psutil.NoSuchProcess:
+            resultado.no_existian.append(pid)
+        except psutil.AccessDenied:
+            resultado.sin_permiso.append(pid)
+    procesos.pop(propio, None)
+
+    senalados = []
+    for proc in procesos.values():
+        try:
+            proc.terminate()  # psutil verifica que el PID no se haya reutilizado
+            senalados.append(proc)
+        except psutil.NoSuchProcess:
+            resultado.no_existian.append(proc.pid)
+        except psutil.AccessDenied:
+            resultado.sin_permiso.append(proc.pid)
+
+    terminados, vivos = _esperar(senalados, gracia)
+    resultado.terminados = [p.pid for p in terminados]
+
+    forzados = []
+    for proc in vivos:
+        try:
+            proc.kill()
+            forzados.append(proc)
+        except psutil.NoSuchProcess:
+            resultado.terminados.append(proc.pid)  # salió justo al vencer la gracia
+        except psutil.AccessDenied:
+            resultado.sin_permiso.append(proc.pid)
+    muertos, sobreviven = _esperar(forzados, ESPERA_KILL)
+    resultado.forzados = [p.pid for p in muertos]
+    resultado.sobreviven = [p.pid for p in sobreviven]
+    return resultado
+
+# --------------------------------------------------
+# Hilo de trabajo
+# --------------------------------------------------
+
+class Terminador:
+    """
+    Finaliza lotes de procesos en un hilo propio, uno por vez y en el orden
+    pedido. pedir() no bloquea; la interfaz consulta resultados() desde su
+    root.after y muestra cada lote terminado en la barra de estado.
+    """
+
+    def __init__(self, gracia=GRACIA):
+        self.gracia = gracia
+        self.pendientes = 0  # lotes pedidos que todavía no terminaron
+        self._pedidos = queue.Queue()
+        self._hechos = queue.Queue()
+        self._hilo = None
+
+    def pedir(self, pids, arbol=False):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, name="terminador", daemon=True)
+            self._hilo.start()
+        self.pendientes += 1
+        self._pedidos.put((list(pids), arbol))
+
+    def resultados(self):
+        """
+        Lotes terminados desde la última llamada (no bloquea).
+        """
+        hechos = []
+        while True:
+            try:
+                hechos.append(self._hechos.get_nowait())
+            except queue.Empty:
+                break
+        self.pendientes -= len(hechos)
+        return hechos
+
+    def _bucle(self):
+        while True:
+            pids, arbol = self._pedidos.get()
+            try:
+                resultado = finalizar_lote(pids, arbol, self.gracia)
+            except Exception as e:
+                resultado = ResultadoLote(pids)
+                resultado.error = e
+            self._hechos.put(resultado)
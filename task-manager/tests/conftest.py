@@ -0,0 +1,7 @@
+"""
+Los módulos del administrador son planos (se importan por nombre desde
+task-manager/), así que las pruebas agregan esa carpeta al path.
+"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,208 @@
+"""
+Grupos por cgroup sobre un /proc y un cgroupfs falsos en un
+directorio temporal.
+"""
+import pytest
+
+from agregacion import resumen_cgroups
+from cgroups import (CacheCgroups, LectorCgroupfs, MonitorCgroupfs, grupos_de, leer_cgroup,
+                     leer_grupos, recortar)
+from snapshot import MB, ConstructorSnapshot
+from vistas import filas_cgroups
+
+V1 = """12:memory:/user.slice/user-1000.slice
+11:cpu,cpuacct:/user.slice
+1:name=systemd:/user.slice/user-1000.slice/session-2.scope
+"""
+
+
+@pytest.fixture
+def proc(tmp_path):
+    raiz = tmp_path / "proc"
+    archivos = {
+        1: "0::/init.scope\n",
+        10: "0::/system.slice/ssh.service\n",
+        11: V1,
+        12: "4:memory:/docker/abc\n3:cpu:/docker/abc\n",  # v1 sin name=systemd
+        13: "basura sin dos puntos\n",
+    }
+    for pid, texto in archivos.items():
+        (raiz / str(pid)).mkdir(parents=True)
+        (raiz / str(pid) / "cgroup").write_text(texto)
+    (raiz / "self").mkdir()
+    (raiz / "self" / "cgroup").write_text("0::/\n")
+    return str(raiz)
+
+
+def escribir(base, ruta, nombre, texto):
+    carpeta = base / ruta.strip("/")
+    carpeta.mkdir(parents=True, exist_ok=True)
+    (carpeta / nombre).write_text(texto)
+
+
+@pytest.fixture
+def cgroupfs_v2(tmp_path):
+    base = tmp_path / "cgroup"
+    base.mkdir()
+    (base / "cgroup.controllers").write_text("cpu memory io\n")
+    # la raíz cuenta a toda la máquina: no se debe usar nunca
+    escribir(base, "/", "memory.current", str(64 << 30))
+    escribir(base, "/", "cpu.stat", "usage_usec 999999999\n")
+    escribir(base, "/system.slice/ssh.service", "memory.current", str(300 * MB))
+    escribir(base, "/system.slice/ssh.service", "cpu.stat",
+             "usage_usec 1000000\nuser_usec 600000\nsystem_usec 400000\n")
+    escribir(base, "/system.slice", "memory.current", str(500 * MB))
+    escribir(base, "/system.slice", "cpu.stat", "usage_usec 5000000\n")
+    escribir(base, "/system.slice/roto.service", "memory.current", "max\n")
+    return base
+
+# --------------------------------------------------
+# /proc/<pid>/cgroup
+# --------------------------------------------------
+
+def test_leer_cgroup_v2_y_v1(proc):
+    assert leer_cgroup(proc, 1) == "/init.scope"
+    assert leer_cgroup(proc, 10) == "/system.slice/ssh.service"
+    # v1: la jerarquía de systemd aunque no sea la primera línea
+    assert leer_cgroup(proc, 11) == "/user.slice/user-1000.slice/session-2.scope"
+    # v1 sin name=systemd: la primera jerarquía
+    assert leer_cgroup(proc, 12) == "/docker/abc"
+    assert leer_cgroup(proc, 13) is None
+    assert leer_cgroup(proc, 99) is None  # terminó
+
+
+def test_cache_lee_una_vez_por_proceso(proc):
+    cache = CacheCgroups(raiz=proc)
+    assert CacheCgroups.disponible(proc)
+    assert cache.cgroup(10, 5.0) == "/system.slice/ssh.service"
+    assert cache.cgroup(10, 5.0) == "/system.slice/ssh.service"
+    assert cache.cgroup(99, 5.0) == ""  # ilegible: cgroup desconocido
+    assert cache.lecturas == 2
+    cache.cgroup(10, 6.0)  # PID reutilizado: otro proceso
+    assert cache.lecturas == 3
+
+
+@pytest.mark.parametrize("ruta, niveles, esperado", [
+    ("/user.slice/user-1000.slice/session-2.scope", 2, "/user.slice/user-1000.slice"),
+    ("/user.slice/user-1000.slice/session-2.scope", 1, "/user.slice"),
+    ("/user.slice/user-1000.slice", 5, "/user.slice/user-1000.slice"),
+    ("/system.slice/ssh.service", None, "/system.slice/ssh.service"),
+    ("/", 2, "/"),
+    ("", 2, ""),
+])
+def test_recortar(ruta, niveles, esperado):
+    assert recortar(ruta, niveles) == esperado
+
+# --------------------------------------------------
+# cgroupfs
+# --------------------------------------------------
+
+def test_lector_v2(cgroupfs_v2):
+    lector = LectorCgroupfs(str(cgroupfs_v2))
+    assert lector.v2
+    assert lector.memoria("/system.slice/ssh.service") == 300 * MB
+    assert lector.memoria("/system.slice/roto.service") is None
+    assert lector.memoria("/no/existe") is None
+
+    ruta = "/system.slice/ssh.service"
+    assert lector.cpu(ruta, 10.0) is None  # primera lectura: sin referencia
+    escribir(cgroupfs_v2, ruta, "cpu.stat", "usage_usec 1500000\n")
+    assert lector.cpu(ruta, 11.0) == pytest.approx(50.0)  # 0.5 s de CPU en 1 s
+
+    lector.olvidar_excepto(set())
+    assert lector.cpu(ruta, 12.0) is None
+
+
+def test_lector_v1(tmp_path):
+    base = tmp_path / "cgroup"
+    escribir(base, "/memory/docker/abc", "memory.usage_in_bytes", str(80 * MB))
+    escribir(base, "/cpuacct/docker/abc", "cpuacct.usage", str(2 * 10**9))  # ns
+    lector = LectorCgroupfs(str(base))
+    assert not lector.v2
+    assert lector.memoria("/docker/abc") == 80 * MB
+    assert lector.cpu("/docker/abc", 0.0) is None
+    escribir(base, "/cpuacct/docker/abc", "cpuacct.usage", str(3 * 10**9))
+    assert lector.cpu("/docker/abc", 2.0) == pytest.approx(50.0)
+
+# --------------------------------------------------
+# Resumen por grupo
+# --------------------------------------------------
+
+def foto():
+    c = ConstructorSnapshot()
+    procesos = [
+        # pid, cgroup, cpu, rss
+        (1, "/init.scope", 0.5, 10 * MB),
+        (10, "/system.slice/ssh.service", 10.0, 20 * MB),
+        (11, "/system.slice/ssh.service/sesion", 30.0, 40 * MB),
+        (20, "/system.slice/cron.service", 1.0, 5 * MB),
+        (30, "/", 2.0, 1 * MB),
+        (40, None, 4.0, 2 * MB),  # sin dato: cgroup desconocido
+    ]
+    for pid, cgroup, cpu, rss in procesos:
+        c.agregar(pid, f"p{pid}", "root", "sleeping", cpu, 0.1, rss, 0.0, 0.0, ppid=1,
+                  cgroup=cgroup)
+    return c.terminar()
+
+
+def test_grupos_de():
+    assert grupos_de(foto(), 2) == {"/init.scope", "/system.slice/ssh.service",
+                                    "/system.slice/cron.service", "/", ""}
+
+
+def test_resumen_usa_cgroupfs_aparte_y_excluye_la_raiz(cgroupfs_v2):
+    snap = foto()
+    lector = LectorCgroupfs(str(cgroupfs_v2))
+    leer_grupos(lector, grupos_de(snap, 2), 1.0)
+    escribir(cgroupfs_v2, "/system.slice/ssh.service", "cpu.stat", "usage_usec 3000000\n")
+    cgroupfs = leer_grupos(lector, grupos_de(snap, 2), 2.0)
+
+    # la raíz y el grupo desconocido no se leen de cgroupfs
+    assert "/" not in cgroupfs and "" not in cgroupfs
+
+    filas = {f[0]: f for f in resumen_cgroups(snap, 4, niveles=2, cgroupfs=cgroupfs)}
+    assert set(filas) == {"/init.scope", "/system.slice/ssh.service",
+                          "/system.slice/cron.service", "/", "(desconocido)"}
+
+    grupo, procesos, cpu, memoria, _, red, cpu_cg, memoria_cg = filas["/system.slice/ssh.service"]
+    assert (procesos, memoria) == (2, 60 * MB)       # suma de sus procesos
+    assert cpu == pytest.approx(40.0 / 4)
+    assert memoria_cg == 300 * MB                    # memory.current, en su propia columna
+    assert cpu_cg == pytest.approx(200.0 / 4)        # 2 s de CPU en 1 s, sobre 4 núcleos
+    assert red is None                               # la foto no trae red
+
+    assert filas["/"][6:] == (None, None)
+    assert filas["(desconocido)"][1] == 1
+    assert filas["/system.slice/cron.service"][6:] == (None, None)  # sin archivos en cgroupfs
+
+
+def test_filas_cgroups_muestra_guion_sin_cgroupfs():
+    filas = dict(filas_cgroups(foto(), niveles=1, cgroupfs={}, num_cpus=1))
+    assert filas["/system.slice"] == ("/system.slice", 3, 41.0, 65.0, 0.0, "-", "-", "-")
+
+
+def test_monitor_publica_por_niveles(cgroupfs_v2):
+    monitor = MonitorCgroupfs(LectorCgroupfs(str(cgroupfs_v2)))
+    monitor.niveles = 1
+    monitor.al_publicar(foto())
+    assert monitor.valores(1)["/system.slice"] == (None, 500 * MB)
+    assert monitor.valores(2) == {}  # leído con otro agrupamiento
+
+
+def test_foto_sin_cgroups():
+    c = ConstructorSnapshot()
+    c.agregar(1, "a", "root", "sleeping", 1.0, 0.1, MB)
+    snap = c.terminar()
+    assert not snap.tiene("cgroup")
+    assert resumen_cgroups(snap, 1) == []
+    assert grupos_de(snap) == set()
+
+
+def test_cgroups_sin_red_no_crean_columnas_de_red():
+    # sin sock_diag (contenedores, inet_diag sin cargar) la red debe seguir en "-"
+    snap = foto()
+    assert snap.tiene("cgroup") and not snap.tiene("red_rx")
+
+    c = ConstructorSnapshot()
+    c.agregar(1, "a", "root", "sleeping", 1.0, 0.1, MB, red_rx=10.0, red_tx=5.0)
+    assert not c.terminar().tiene("cgroup")
@@ -0,0 +1,141 @@
+"""
+Monitoreo remoto: ida y vuelta por Codificador/Decodificador, y
+varios agentes en localhost seguidos por un ClienteRemoto junto a una
+dirección donde no escucha nadie.
+"""
+import asyncio, socket, time
+
+import pytest
+
+from benchmark import FuenteSintetica
+from grabador import CLAVE, COLUMNAS_DISCO, MARCO, Codificador, Decodificador
+from remoto import Agente, ClienteRemoto, leer_direccion
+
+
+def filas_por_pid(snap):
+    # cada columna cuantizada como en el formato (décimas de %, KiB...)
+    filas = {}
+    for i in range(len(snap)):
+        fila = []
+        for nombre, _, factor in COLUMNAS_DISCO:
+            valor = snap.valor(nombre, i)
+            if nombre in ("nombre", "usuario", "estado"):
+                valor = getattr(snap, nombre)(i)
+            elif factor is not None:
+                valor = int(valor * factor + 0.5)
+            fila.append(valor)
+        filas[snap.pid(i)] = tuple(fila)
+    return filas
+
+
+def marcos(datos):
+    pos = 0
+    while pos < len(datos):
+        tipo, largo, timestamp = MARCO.unpack_from(datos, pos)
+        pos += MARCO.size
+        yield tipo, timestamp, datos[pos:pos + largo]
+        pos += largo
+
+# --------------------------------------------------
+# Codificador / Decodificador
+# --------------------------------------------------
+
+@pytest.mark.parametrize("comprimir", [True, False])
+def test_ida_y_vuelta(comprimir):
+    fuente = FuenteSintetica(400, cambios=0.2, churn=0.05)
+    codificador = Codificador(COLUMNAS_DISCO, cada_clave=4, comprimir=comprimir)
+    decodificador = Decodificador(COLUMNAS_DISCO, comprimir=comprimir)
+
+    tipos = []
+    for _ in range(10):
+        original = fuente()
+        decodificadas = []
+        for tipo, timestamp, contenido in marcos(codificador.codificar(original)):
+            tipos.append(tipo)
+            foto = decodificador.aplicar(tipo, timestamp, contenido)
+            if foto is not None:
+                decodificadas.append(foto)
+        assert len(decodificadas) == 1  # un KEYF o un DELT por foto
+        assert filas_por_pid(decodificadas[0]) == filas_por_pid(original)
+
+    # un marco completo cada cada_clave fotos, deltas en el medio
+    completos = [t for t in tipos if t in (CLAVE, b"DELT")]
+    assert completos[0] == CLAVE and completos[4] == CLAVE
+    assert completos.count(b"DELT") == 7
+
+
+def test_delta_sin_clave_es_un_error():
+    fuente = FuenteSintetica(50)
+    codificador = Codificador(COLUMNAS_DISCO)
+    codificador.codificar(fuente())
+    delta = list(marcos(codificador.codificar(fuente())))[-1]
+    assert delta[0] == b"DELT"
+    with pytest.raises(ValueError):
+        Decodificador(COLUMNAS_DISCO).aplicar(*delta)
+
+
+def test_leer_direccion():
+    assert leer_direccion("127.0.0.1:7101") == ("tcp", "127.0.0.1", 7101)
+    assert leer_direccion("servidor") == ("tcp", "servidor", 7077)
+    assert leer_direccion("[::1]:80") == ("tcp", "::1", 80)
+    assert leer_direccion("unix:/tmp/tm.sock") == ("unix", "/tmp/tm.sock", None)
+    assert leer_direccion("/tmp/tm.sock") == ("unix", "/tmp/tm.sock", None)
+
+# --------------------------------------------------
+# Varios agentes en localhost
+# --------------------------------------------------
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def esperar(condicion, limite=10.0):
+    fin = time.monotonic() + limite
+    while not condicion():
+        if time.monotonic() > fin:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+def test_varios_agentes_y_uno_caido(tmp_path):
+    async def escenario():
+        chico = Agente(FuenteSintetica(300), intervalo=0.1, nombre="chico")
+        grande = Agente(FuenteSintetica(2000, semilla=7), intervalo=0.1, nombre="grande")
+        await chico.iniciar(tcp=["127.0.0.1:0"])
+        await grande.iniciar(unix=[str(tmp_path / "grande.sock")])
+        direccion_chico, = chico.direcciones()
+        direccion_grande, = grande.direcciones()
+        caida = f"127.0.0.1:{puerto_libre()}"
+
+        cliente = ClienteRemoto(reintento=0.1)
+        try:
+            for direccion in (direccion_chico, direccion_grande, caida):
+                cliente.conectar(direccion)
+            listos = await esperar(lambda: cliente.ultimo(direccion_chico)[0] >= 3
+                                   and cliente.ultimo(direccion_grande)[0] >= 3)
+            assert listos, {d: e.estado for d, e in cliente.equipos.items()}
+
+            for direccion, agente, n in ((direccion_chico, chico, 300),
+                                         (direccion_grande, grande, 2000)):
+                equipo = cliente.equipos[direccion]
+                assert (equipo.nombre, equipo.estado) == (agente.nombre, "conectado")
+                _, foto = cliente.ultimo(direccion)
+                assert len(foto) == n
+                assert equipo.bytes_recibidos > 0
+
+            # la dirección caída no frena a las demás y se sigue reintentando
+            assert await esperar(lambda: cliente.equipos[caida].estado.startswith("error"))
+            assert cliente.ultimo(caida) == (0, None)
+
+            cliente.desconectar(direccion_chico)
+            assert cliente.ultimo(direccion_chico) == (0, None)
+        finally:
+            cliente.detener()
+            await chico.detener()
+            await grande.detener()
+        assert cliente.equipos == {}
+
+    asyncio.run(escenario())
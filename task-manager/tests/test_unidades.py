@@ -0,0 +1,212 @@
+"""
+Servicios: lectura de 'systemctl show', MonitorServicios con una
+fuente falsa sobre un árbol de cgroups en un directorio temporal, y las
+filas de la pestaña Servicios.
+"""
+import threading, time
+
+from snapshot import ConstructorSnapshot
+from unidades import MonitorServicios, Unidad, leer_show, pids_de_cgroup
+from vistas import filas_servicios
+
+SHOW = """Id=ssh.service
+Description=OpenBSD Secure Shell server
+LoadState=loaded
+ActiveState=active
+SubState=running
+MainPID=812
+ControlGroup=/system.slice/ssh.service
+
+Id=cron.service
+Description=Regular background program processing daemon
+LoadState=loaded
+ActiveState=inactive
+SubState=dead
+MainPID=0
+ControlGroup=
+
+Id=fantasma.service
+LoadState=not-found
+ActiveState=inactive
+
+Id=raro.service
+LoadState=loaded
+ActiveState=active
+SubState=active
+MainPID=no-es-un-numero
+"""
+
+
+def foto(procesos):
+    # procesos: (pid, ppid, cpu, rss)
+    c = ConstructorSnapshot()
+    for pid, ppid, cpu, rss in procesos:
+        c.agregar(pid, f"p{pid}", "root", "sleeping", cpu, 0.1, rss, ppid=ppid)
+    return c.terminar()
+
+
+def escribir_cgroup(raiz, ruta, pids):
+    carpeta = raiz / ruta.strip("/")
+    carpeta.mkdir(parents=True, exist_ok=True)
+    (carpeta / "cgroup.procs").write_text("".join(f"{p}\n" for p in pids))
+
+# --------------------------------------------------
+# leer_show
+# --------------------------------------------------
+
+def test_leer_show():
+    unidades = {u.nombre: u for u in leer_show(SHOW)}
+    assert set(unidades) == {"ssh.service", "cron.service", "raro.service"}  # sin not-found
+
+    ssh = unidades["ssh.service"]
+    assert ssh.estado == "active (running)"
+    assert ssh.pid == 812
+    assert ssh.cgroup == "/system.slice/ssh.service"
+    assert ssh.descripcion == "OpenBSD Secure Shell server"
+
+    cron = unidades["cron.service"]
+    assert cron.estado == "inactive (dead)"
+    assert (cron.pid, cron.cgroup) == (0, "")
+
+    raro = unidades["raro.service"]
+    assert raro.estado == "active"  # SubState igual a ActiveState no se repite
+    assert raro.pid == 0
+
+# --------------------------------------------------
+# MonitorServicios
+# --------------------------------------------------
+
+class FuenteFalsa:
+    def __init__(self, unidades):
+        self.unidades = unidades
+        self.llamadas = 0
+        self.error = None
+
+    def __call__(self):
+        self.llamadas += 1
+        if self.error is not None:
+            raise self.error
+        return list(self.unidades)
+
+
+def test_pids_de_cgroup_incluye_subgrupos(tmp_path):
+    escribir_cgroup(tmp_path, "/system.slice/docker.service", [10, 11])
+    escribir_cgroup(tmp_path, "/system.slice/docker.service/hijo", [12])
+    assert pids_de_cgroup(str(tmp_path), "/system.slice/docker.service") == {10, 11, 12}
+    assert pids_de_cgroup(str(tmp_path), "/system.slice/no-existe.service") is None
+
+
+def test_monitor_relista_solo_si_cambia_la_firma(tmp_path):
+    escribir_cgroup(tmp_path, "/system.slice/ssh.service", [812, 900])
+    fuente = FuenteFalsa([
+        Unidad("ssh.service", "active (running)", pid=812, cgroup="/system.slice/ssh.service"),
+        Unidad("sin-cgroup.service", "active (running)", pid=40),
+        Unidad("borrado.service", "active (running)", pid=50, cgroup="/system.slice/borrado.service"),
+    ])
+    firma = ["a"]
+    monitor = MonitorServicios(fuente=fuente, firma=lambda: firma[0], raiz=str(tmp_path),
+                               edad_maxima=3600)
+
+    monitor.actualizar()
+    version, unidades, miembros = monitor.ultimo()
+    assert version == 1
+    assert [u.nombre for u in unidades] == ["ssh.service", "sin-cgroup.service", "borrado.service"]
+    # solo las unidades con cgroup legible tienen miembros
+    assert miembros == {"ssh.service": {812, 900}}
+
+    # misma firma: no se vuelve a listar, pero los PIDs por cgroup se releen
+    escribir_cgroup(tmp_path, "/system.slice/ssh.service", [812])
+    monitor.actualizar()
+    version, _, miembros = monitor.ultimo()
+    assert (version, fuente.llamadas) == (2, 1)
+    assert miembros["ssh.service"] == {812}
+
+    firma[0] = "b"
+    monitor.actualizar()
+    assert fuente.llamadas == 2
+    assert monitor.listados == 2
+
+
+def test_monitor_relista_por_edad(tmp_path):
+    fuente = FuenteFalsa([Unidad("a.service", "active")])
+    monitor = MonitorServicios(fuente=fuente, firma=lambda: "fija", raiz=str(tmp_path),
+                               edad_maxima=0.0)
+    monitor.actualizar()
+    time.sleep(0.01)
+    monitor.actualizar()
+    assert fuente.llamadas == 2
+
+
+def test_monitor_error_conserva_la_lista_anterior(tmp_path):
+    fuente = FuenteFalsa([Unidad("a.service", "active")])
+    firma = [1]
+    monitor = MonitorServicios(fuente=fuente, firma=lambda: firma[0], raiz=str(tmp_path))
+    monitor.actualizar()
+
+    fuente.error = OSError("systemctl no responde")
+    firma[0] = 2
+    monitor.actualizar()
+    _, unidades, _ = monitor.ultimo()
+    assert isinstance(monitor.error, OSError)
+    assert [u.nombre for u in unidades] == ["a.service"]
+
+    fuente.error = None
+    firma[0] = 3
+    monitor.actualizar()
+    assert monitor.error is None
+
+
+def test_invalidar_relista_en_el_hilo(tmp_path):
+    fuente = FuenteFalsa([Unidad("a.service", "active")])
+    monitor = MonitorServicios(fuente=fuente, firma=lambda: "fija", raiz=str(tmp_path),
+                               edad_maxima=3600)
+    monitor.pedir()
+    limite = time.monotonic() + 5
+    while monitor.ultimo()[0] < 1 and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert fuente.llamadas == 1
+
+    monitor.invalidar()
+    while fuente.llamadas < 2 and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert fuente.llamadas == 2
+
+
+# --------------------------------------------------
+# filas_servicios
+# --------------------------------------------------
+
+def test_filas_servicios_por_cgroup_y_por_descendientes():
+    snap = foto([
+        (812, 1, 10.0, 100 << 20),    # ssh (por cgroup)
+        (900, 812, 5.0, 50 << 20),
+        (40, 1, 2.0, 10 << 20),       # sin cgroup: el principal y sus descendientes
+        (41, 40, 1.0, 10 << 20),
+        (42, 41, 1.0, 10 << 20),
+        (43, 1, 50.0, 10 << 20),      # no es de ningún servicio
+    ])
+    unidades = [
+        Unidad("ssh.service", "active (running)", "SSH", pid=812, cgroup="/system.slice/ssh.service"),
+        Unidad("app.service", "active (running)", "App", pid=40),
+        Unidad("parado.service", "inactive (dead)", "Parado"),
+    ]
+    filas = dict(filas_servicios(snap, unidades, {"ssh.service": {812, 900, 999}}, num_cpus=1))
+
+    # 999 está en el cgroup pero no en la foto: no se cuenta
+    assert filas["ssh.service"] == ("ssh.service", "active (running)", 812, 2, 15.0, 150.0, "SSH")
+    assert filas["app.service"][3:6] == (3, 4.0, 30.0)
+    assert filas["parado.service"][2:6] == ("", 0, 0.0, 0.0)
+
+
+def test_filas_servicios_con_ciclo_de_ppid():
+    # un ppid viejo que apunta a un PID reutilizado cierra un ciclo 100 -> 200 -> 100
+    snap = foto([(100, 200, 1.0, 1 << 20), (200, 100, 2.0, 1 << 20)])
+    unidades = [Unidad("ciclo.service", "active (running)", pid=100)]
+    resultado = []
+    hilo = threading.Thread(target=lambda: resultado.append(
+        filas_servicios(snap, unidades, {}, num_cpus=1)), daemon=True)
+    hilo.start()
+    hilo.join(timeout=5)
+    assert not hilo.is_alive(), "filas_servicios no termina con un ciclo de ppid"
+    (_, valores), = resultado[0]
+    assert valores[3:5] == (2, 3.0)
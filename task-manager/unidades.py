@@ -0,0 +1,289 @@
+"""
+Servicios del sistema: unidades de systemd en Linux y servicios de Windows
+(psutil.win_service_iter), con el mismo formato para los dos.
+
+Listar servicios es lento (un subproceso systemctl, o un as_dict() por
+servicio en Windows), así que MonitorServicios lo hace en un hilo propio y
+guarda la lista hasta que cambia la firma del sistema (directorios que
+systemd toca al arrancar o parar una unidad) o vence edad_maxima. La
+interfaz solo cruza la última lista con la foto de procesos.
+"""
+import os, subprocess, sys, threading, time
+
+import psutil
+
+ES_WINDOWS = sys.platform.startswith("win")
+
+# --------------------------------------------------
+# Unidades
+# --------------------------------------------------
+
+class Unidad:
+    """
+    Un servicio: nombre, estado legible, descripción, PID principal (0 si
+    no corre) y cgroup ("" si no tiene o no se sabe).
+    """
+
+    __slots__ = ("nombre", "estado", "descripcion", "pid", "cgroup")
+
+    def __init__(self, nombre, estado, descripcion="", pid=0, cgroup=""):
+        self.nombre = nombre
+        self.estado = estado
+        self.descripcion = descripcion
+        self.pid = pid
+        self.cgroup = cgroup
+
+# --------------------------------------------------
+# Fuentes: cada una devuelve una lista de Unidad
+# --------------------------------------------------
+
+PROPIEDADES = ("Id", "Description", "LoadState", "ActiveState", "SubState", "MainPID",
+               "ControlGroup")
+
+
+def _systemctl(*args):
+    salida = subprocess.run(["systemctl", "--no-pager", *args], capture_output=True,
+                            text=True, timeout=10)
+    if salida.returncode != 0 and not salida.stdout:
+        raise OSError(salida.stderr.strip() or f"systemctl terminó con código {salida.returncode}")
+    return salida.stdout
+
+
+def leer_show(texto):
+    """
+    Unidades a partir de la salida de 'systemctl show -p ...' de varias
+    unidades (bloques Clave=valor separados por líneas vacías).
+    """
+    unidades = []
+    for bloque in texto.split("\n\n"):
+        props = dict(linea.split("=", 1) for linea in bloque.splitlines() if "=" in linea)
+        if not props.get("Id") or props.get("LoadState") == "not-found":
+            continue
+        estado = props.get("ActiveState", "")
+        sub = props.get("SubState", "")
+        if sub and sub != estado:
+            estado = f"{estado} ({sub})"
+        try:
+            pid = int(props.get("MainPID") or 0)
+        except ValueError:
+            pid = 0
+        unidades.append(Unidad(props["Id"], estado, props.get("Description", ""), pid,
+                               props.get("ControlGroup", "")))
+    return unidades
+
+
+def listar_unidades_systemd():
+    """
+    Servicios de systemd (cargados, activos o no) con dos llamadas a
+    systemctl: list-units para los nombres y show para sus propiedades.
+    """
+    nombres = []
+    for linea in _systemctl("list-units", "--type=service", "--all", "--plain",
+                            "--no-legend").splitlines():
+        partes = linea.split()
+        if partes and partes[0] == "●":  # unidades fallidas traen un punto adelante
+            partes = partes[1:]
+        if partes and partes[0].endswith(".service"):
+            nombres.append(partes[0])
+    if not nombres:
+        return []
+    return leer_show(_systemctl("show", "--property=" + ",".join(PROPIEDADES), "--", *nombres))
+
+
+def listar_servicios_windows():
+    unidades = []
+    for s in psutil.win_service_iter():
+        try:
+            info = s.as_dict()
+        except Exception:
+            continue
+        unidades.append(Unidad(info["name"], info["status"], info["display_name"],
+                               info.get("pid") or 0))
+    return unidades
+
+
+def fuente_por_defecto():
+    """
+    Función que lista los servicios de este sistema, o None si no hay
+    ninguna (ni Windows ni systemd).
+    """
+    if ES_WINDOWS:
+        return listar_servicios_windows
+    if sys.platform.startswith("linux") and os.path.isdir("/run/systemd/system"):
+        return listar_unidades_systemd
+    return None
+
+# --------------------------------------------------
+# Procesos de cada unidad (cgroups)
+# --------------------------------------------------
+
+def raiz_cgroup(base="/sys/fs/cgroup"):
+    """
+    Directorio con la jerarquía de systemd: la unificada (v2), la
+    'unified' del modo híbrido o la 'systemd' de v1. None si no hay.
+    """
+    for raiz in (base, f"{base}/unified", f"{base}/systemd"):
+        if os.path.exists(f"{raiz}/cgroup.procs"):
+            return raiz
+    return None
+
+
+def pids_de_cgroup(raiz, cgroup):
+    """
+    PIDs del cgroup y de sus subgrupos, o None si no se pudo leer.
+    """
+    carpeta = raiz + cgroup
+    if not os.path.isdir(carpeta):
+        return None
+    pids = set()
+    for actual, _, _ in os.walk(carpeta):
+        try:
+            with open(f"{actual}/cgroup.procs", "rb") as f:
+                pids.update(int(p) for p in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def firma_systemd(raiz=None):
+    """
+    mtime de los directorios que cambian cuando una unidad arranca o para
+    (un cgroup nuevo en system.slice, un enlace en /run/systemd/units), o
+    cuando se recargan los archivos de unidad.
+    """
+    rutas = ["/run/systemd/units", "/run/systemd/system", "/etc/systemd/system"]
+    if raiz is not None:
+        rutas.append(f"{raiz}/system.slice")
+    firma = []
+    for ruta in rutas:
+        try:
+            firma.append(os.stat(ruta).st_mtime_ns)
+        except OSError:
+            firma.append(None)
+    return tuple(firma)
+
+# --------------------------------------------------
+# Acciones
+# --------------------------------------------------
+
+ACCIONES = ("start", "stop", "restart")
+
+
+def accion_servicio(nombre, accion):
+    """
+    Inicia, detiene o reinicia un servicio. En systemd la orden se encola
+    (--no-block) y vuelve enseguida; PermissionError si falta permiso.
+    """
+    if accion not in ACCIONES:
+        raise ValueError(f"Acción desconocida: {accion}")
+    if ES_WINDOWS:
+        srv = psutil.win_service_get(nombre)
+        if accion in ("stop", "restart"):
+            srv.stop()
+        if accion in ("start", "restart"):
+            srv.start()
+        return
+    salida = subprocess.run(["systemctl", "--no-block", accion, "--", nombre],
+                            capture_output=True, text=True, timeout=30)
+    if salida.returncode != 0:
+        mensaje = salida.stderr.strip()
+        if "denied" in mensaje or "authentication" in mensaje.lower():
+            raise PermissionError(mensaje)
+        raise OSError(mensaje or f"systemctl terminó con código {salida.returncode}")
+
+# --------------------------------------------------
+# Monitor en segundo plano
+# --------------------------------------------------
+
+class MonitorServicios:
+    """
+    Mantiene la lista de servicios y los PIDs de cada uno sin bloquear la
+    interfaz.
+
+    pedir() despierta al hilo, que vuelve a listar las unidades solo si la
+    firma cambió, si se llamó a invalidar() o si la lista tiene más de
+    edad_maxima segundos; los PIDs por cgroup se releen en cada pedido
+    (un archivo por unidad). ultimo() devuelve (versión, unidades,
+    miembros) y no bloquea; miembros es {nombre: set de PIDs} para las
+    unidades con cgroup legible.
+
+    fuente y firma se pueden reemplazar (por ejemplo, por una lista fija
+    sin systemd de por medio).
+    """
+
+    def __init__(self, fuente=None, firma=None, raiz=None, edad_maxima=60.0):
+        self.fuente = fuente_por_defecto() if fuente is None else fuente
+        self.raiz = raiz_cgroup() if raiz is None and not ES_WINDOWS else raiz
+        if firma is None and self.fuente is listar_unidades_systemd:
+            firma = lambda: firma_systemd(self.raiz)
+        self.firma = firma
+        self.edad_maxima = edad_maxima
+        self.error = None      # último error al listar (se muestra en la tabla)
+        self.listados = 0      # veces que se llamó a la fuente
+        self._lock = threading.Lock()
+        self._publicado = (0, [], {})
+        self._firma = None
+        self._listado = None   # time.monotonic() del último listado
+        self._invalido = True
+        self._despertar = threading.Event()
+        self._hilo = None
+
+    @property
+    def disponible(self):
+        return self.fuente is not None
+
+    def pedir(self):
+        if self.fuente is None:
+            return
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, name="servicios", daemon=True)
+            self._hilo.start()
+        self._despertar.set()
+
+    def invalidar(self):
+        """
+        La próxima actualización vuelve a listar las unidades (después de
+        iniciar o detener un servicio, por ejemplo).
+        """
+        self._invalido = True
+        self.pedir()
+
+    def ultimo(self):
+        with self._lock:
+            return self._publicado
+
+    def actualizar(self):
+        """
+        Una actualización completa en el hilo que llama (la usa el hilo de
+        trabajo, y sirve para usar el monitor sin hilo).
+        """
+        version, unidades, _ = self._publicado
+        firma = self.firma() if self.firma is not None else None
+        ahora = time.monotonic()
+        if (self._invalido or firma != self._firma or self._listado is None
+                or ahora - self._listado > self.edad_maxima):
+            self._invalido = False
+            try:
+                unidades = self.fuente()
+                self.error = None
+            except Exception as e:
+                self.error = e
+            self.listados += 1
+            self._firma = firma
+            self._listado = ahora
+
+        miembros = {}
+        if self.raiz is not None:
+            for unidad in unidades:
+                if unidad.cgroup:
+                    pids = pids_de_cgroup(self.raiz, unidad.cgroup)
+                    if pids is not None:
+                        miembros[unidad.nombre] = pids
+        with self._lock:
+            self._publicado = (version + 1, unidades, miembros)
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait()
+            self._despertar.clear()
+            self.actualizar()
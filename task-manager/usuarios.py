@@ -1,9 +1,9 @@
-import psutil
-from tabulate import tabulate
+from consola import ejecutar
 
-def mostrar_usuarios():
-    usuarios = psutil.users()
-    data = []
-    for u in usuarios:
-        data.append([u.name, u.host, u.terminal, u.started])
-    print(tabulate(data, headers=["Usuario", "Host", "Terminal", "Inicio"], tablefmt="fancy_grid"))
+def mostrar_usuarios(formato="table"):
+    # sesiones abiertas (psutil.users), como siempre mostró este módulo
+    ejecutar("sesiones", formato=formato)
+
+def mostrar_procesos_por_usuario(intervalo=2.0, cantidad=1, formato="table"):
+    # procesos agrupados por usuario, como la pestaña Usuarios
+    ejecutar("usuarios", intervalo, cantidad, formato)
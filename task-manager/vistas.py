@@ -0,0 +1,374 @@
+"""
+Filas de cada vista (Procesos, Usuarios, Detalles, árbol de procesos, Servicios,
+Grupos) a partir de una ProcessSnapshot. No importa tkinter: lo usan tanto main.py como consola.py.
+"""
+import heapq
+
+from agregacion import resumen_cgroups, resumen_usuarios
+from arbol import visibles_con_ancestros
+from busqueda import filtrar, minusculas
+from contabilidad import NUM_CPUS
+from perfil import perfil
+from snapshot import MB, TABLAS, np
+
+COLUMNAS_PROCESOS = ("PID", "Nombre", "CPU %", "RAM %")
+NUMERICAS_PROCESOS = ("PID", "CPU %", "RAM %")
+
+COLUMNAS_USUARIOS = ("Usuario", "Procesos", "Estado", "CPU %", "Memoria (MB)",
+                     "Disco (MB/s)", "Red (MB/s)")
+NUMERICAS_USUARIOS = ("Procesos", "CPU %", "Memoria (MB)", "Disco (MB/s)", "Red (MB/s)")
+
+COLUMNAS_DETALLES = ("Nombre", "PID", "Estado", "Usuario", "CPU %", "Memoria (MB)",
+                     "Disco (MB/s)", "Red (MB/s)")
+NUMERICAS_DETALLES = ("PID", "CPU %", "Memoria (MB)", "Disco (MB/s)", "Red (MB/s)")
+
+# el nombre va en la columna #0 del árbol
+COLUMNAS_ARBOL = ("PID", "CPU %", "RAM %", "CPU árbol %", "Memoria árbol (MB)")
+NUMERICAS_ARBOL = COLUMNAS_ARBOL
+
+COLUMNAS_SERVICIOS = ("Nombre", "Estado", "PID", "Procesos", "CPU %", "Memoria (MB)",
+                      "Descripción")
+NUMERICAS_SERVICIOS = ("PID", "Procesos", "CPU %", "Memoria (MB)")
+
+# las dos últimas salen de cgroupfs: incluyen la caché de páginas del grupo
+COLUMNAS_CGROUPS = ("Grupo (cgroup)", "Procesos", "CPU %", "Memoria (MB)", "Disco (MB/s)",
+                    "Red (MB/s)", "CPU cgroup %", "Memoria cgroup (MB)")
+NUMERICAS_CGROUPS = COLUMNAS_CGROUPS[1:]
+
+# --------------------------------------------------
+# Top N: solo las primeras filas en el orden de la tabla
+# --------------------------------------------------
+
+# columna de la vista -> (columnas de la foto que se suman, divisor, decimales),
+# igual que la calculan filas_procesos y filas_detalles
+COLUMNAS_FOTO = {
+    "PID": (("pid",), None, None), "Nombre": (("nombre",), None, None),
+    "Estado": (("estado",), None, None), "Usuario": (("usuario",), None, None),
+    "CPU %": (("cpu",), None, 1), "RAM %": (("mem_pct",), None, 2),
+    "Memoria (MB)": (("rss",), MB, 1),
+    "Disco (MB/s)": (("io_lectura", "io_escritura"), MB, 2),
+    "Red (MB/s)": (("red_rx", "red_tx"), MB, 2),
+}
+
+
+def _rangos(cadenas):
+    """
+    Posición de cada cadena internada en orden alfabético sin distinguir
+    mayúsculas (las iguales comparten posición), para ordenar por texto
+    con números.
+    """
+    bajas = minusculas(cadenas)
+    rangos = [0] * len(bajas)
+    previa, rango = None, -1
+    for i in sorted(range(len(bajas)), key=bajas.__getitem__):
+        if bajas[i] != previa:
+            previa, rango = bajas[i], rango + 1
+        rangos[i] = rango
+    return rangos
+
+
+def _redondear_np(valores, decimales):
+    """
+    round(v, decimales) de cada valor, como lo hace Python. np.rint sobre
+    el valor escalado coincide salvo cuando el escalado cae justo en .5
+    (0.35 * 10 da 3.5 aunque 0.35 está apenas por debajo): esos pocos se
+    redondean uno por uno.
+    """
+    escala = 10.0 ** decimales
+    escalados = valores * escala
+    redondeados = np.rint(escalados) / escala
+    dudosos = np.flatnonzero(np.abs(escalados - np.floor(escalados) - 0.5) < 1e-6)
+    if len(dudosos):
+        redondeados[dudosos] = [round(v, decimales) for v in valores[dudosos].tolist()]
+    return redondeados
+
+
+class TopN:
+    """
+    Elige las n primeras filas de una vista según su columna de orden
+    (columna, desc) sin ordenar toda la foto: con numpy, np.partition
+    encuentra el valor de corte en O(n); sin numpy, heapq en O(n log N).
+    La clave es el valor redondeado que muestra la vista, con empates por
+    PID, exactamente como ordena la Tabla: las N filas son las primeras
+    del orden completo y no saltan entre ticks por diferencias que no se
+    ven (muchos procesos en 0.0 % de CPU, RSS que varía unos KB).
+
+    Las N filas elegidas salen sin orden: la Tabla las ordena (N log N).
+    total y ocultos son los del último elegir().
+    """
+
+    def __init__(self, n=50, columna="CPU %", desc=True):
+        self.n = n
+        self.columna = columna
+        self.desc = desc
+        self.total = 0    # procesos que pasaron el filtro
+        self.ocultos = 0  # de esos, los que quedaron fuera del Top N
+
+    def _clave(self, snapshot):
+        """
+        Columna (ndarray o lista) con el valor de orden de cada proceso:
+        el mismo número que muestra la vista.
+        """
+        columnas, divisor, decimales = COLUMNAS_FOTO.get(self.columna, ((), None, None))
+        columnas = [c for c in columnas if snapshot.tiene(c)]
+        if not columnas:
+            return np.zeros(len(snapshot)) if np is not None else [0] * len(snapshot)
+        if columnas[0] in TABLAS:
+            rangos = _rangos(getattr(snapshot, TABLAS[columnas[0]]))
+            if np is not None:
+                return np.array(rangos, dtype=np.int64)[snapshot.columna(columnas[0])]
+            return [rangos[i] for i in snapshot.lista(columnas[0])]
+
+        if np is not None:
+            clave = snapshot.columna(columnas[0]).astype(np.float64)
+            for c in columnas[1:]:
+                clave += snapshot.columna(c)
+            if divisor is not None:
+                clave /= divisor
+            return clave if decimales is None else _redondear_np(clave, decimales)
+
+        clave = snapshot.lista(columnas[0])
+        for c in columnas[1:]:
+            clave = [a + b for a, b in zip(clave, snapshot.lista(c))]
+        if divisor is not None:
+            clave = [v / divisor for v in clave]
+        return clave if decimales is None else [round(v, decimales) for v in clave]
+
+    def elegir(self, snapshot, indices):
+        """
+        Las posiciones (de 'indices') que quedan en el Top N.
+        """
+        n = self.n
+        self.total = len(indices)
+        self.ocultos = max(self.total - n, 0)
+        if not self.ocultos:
+            return indices
+        if n <= 0:
+            return []
+
+        with perfil.medir("top n"):
+            clave = self._clave(snapshot)
+            if np is None:
+                pids = snapshot.lista("pid")
+                elegir = heapq.nlargest if self.desc else heapq.nsmallest
+                return elegir(n, indices, key=lambda i: (clave[i], pids[i]))
+
+            # menor = mejor; por encima del corte entran todos, en el corte por PID
+            if isinstance(indices, range):
+                posiciones = np.arange(indices.start, indices.stop, indices.step)
+            else:
+                posiciones = np.asarray(indices, dtype=np.int64)
+            k = clave[posiciones].astype(np.float64)
+            pids = snapshot.columna("pid")[posiciones].astype(np.int64)
+            if self.desc:
+                k, pids = -k, -pids
+            corte = np.partition(k, n - 1)[n - 1]
+            mejores = np.flatnonzero(k < corte)
+            empates = np.flatnonzero(k == corte)
+            faltan = n - len(mejores)
+            if faltan < len(empates):
+                empates = empates[np.argpartition(pids[empates], faltan - 1)[:faltan]]
+            return posiciones[np.concatenate((mejores, empates))].tolist()
+
+# --------------------------------------------------
+# Filas por vista: lista de (clave, valores)
+# --------------------------------------------------
+
+def filas_procesos(snapshot, modo=None, query="", top=None):
+    """
+    PID | Nombre | CPU % | RAM %, con clave PID. Con top (un TopN), solo
+    las filas que quedan en el Top N.
+    """
+    indices = filtrar(snapshot, modo, query)
+    if top is not None:
+        indices = top.elegir(snapshot, indices)
+    pids = snapshot.lista("pid")
+    nombre_ids = snapshot.lista("nombre")
+    cpus = snapshot.lista("cpu")
+    mem_pcts = snapshot.lista("mem_pct")
+    nombres = snapshot.nombres
+
+    filas = []
+    for i in indices:
+        pid = pids[i]
+        filas.append((pid, (
+            pid,
+            nombres[nombre_ids[i]],
+            round(cpus[i], 1),
+            round(mem_pcts[i], 2)
+        )))
+    return filas
+
+
+def filas_usuarios(snapshot, num_cpus=NUM_CPUS):
+    """
+    Usuario | Procesos | Estado | CPU % | Memoria (MB) | Disco (MB/s) | Red (MB/s),
+    con clave el nombre de usuario. El CPU % se normaliza por num_cpus.
+    """
+    filas = []
+    for user, procesos, cpu, rss, disco, red in resumen_usuarios(snapshot, num_cpus):
+        estado = "Activo"
+        filas.append((user, (
+            user,
+            procesos,
+            estado,
+            round(cpu, 1),
+            round(rss / MB, 1),
+            "-" if disco is None else round(disco / MB, 2),
+            "-" if red is None else round(red / MB, 2),
+        )))
+    return filas
+
+
+def filas_cgroups(snapshot, niveles=None, cgroupfs=None, num_cpus=NUM_CPUS):
+    """
+    Grupo | Procesos | CPU % | Memoria (MB) | Disco (MB/s) | Red (MB/s) |
+    CPU cgroup % | Memoria cgroup (MB), con clave la ruta del cgroup.
+    niveles recorta las rutas (1 = slices, 2 = servicios y contenedores);
+    cgroupfs son los valores ya leídos (cgroups.leer_grupos o
+    MonitorCgroupfs.valores), "-" donde falten.
+    """
+    filas = []
+    for grupo, procesos, cpu, memoria, disco, red, cpu_cg, memoria_cg in resumen_cgroups(
+            snapshot, num_cpus, niveles, cgroupfs):
+        filas.append((grupo, (
+            grupo,
+            procesos,
+            round(cpu, 1),
+            round(memoria / MB, 1),
+            round(disco / MB, 2),
+            "-" if red is None else round(red / MB, 2),
+            "-" if cpu_cg is None else round(cpu_cg, 1),
+            "-" if memoria_cg is None else round(memoria_cg / MB, 1),
+        )))
+    return filas
+
+
+def filas_detalles(snapshot, modo=None, query="", top=None):
+    """
+    Nombre | PID | Estado | Usuario | CPU % | Memoria MB | Disco MB/s | Red MB/s,
+    con clave PID. La red es "-" si la foto no la trae. top como en
+    filas_procesos.
+    """
+    indices = filtrar(snapshot, modo, query)
+    if top is not None:
+        indices = top.elegir(snapshot, indices)
+    pids = snapshot.lista("pid")
+    nombre_ids = snapshot.lista("nombre")
+    estado_ids = snapshot.lista("estado")
+    usuario_ids = snapshot.lista("usuario")
+    cpus = snapshot.lista("cpu")
+    rss = snapshot.lista("rss")
+    lectura = snapshot.lista("io_lectura")
+    escritura = snapshot.lista("io_escritura")
+    red = snapshot.tiene("red_rx")
+    if red:
+        red_rx, red_tx = snapshot.lista("red_rx"), snapshot.lista("red_tx")
+    nombres, estados, usuarios = snapshot.nombres, snapshot.estados, snapshot.usuarios
+
+    filas = []
+    for i in indices:
+        pid = pids[i]
+        filas.append((pid, (
+            nombres[nombre_ids[i]],
+            pid,
+            estados[estado_ids[i]],
+            usuarios[usuario_ids[i]],
+            round(cpus[i], 1),
+            round(rss[i] / MB, 1),
+            round((lectura[i] + escritura[i]) / MB, 2),
+            round((red_rx[i] + red_tx[i]) / MB, 2) if red else "-"
+        )))
+    return filas
+
+
+def nodos_arbol(snapshot, indice, modo=None, query=""):
+    """
+    Árbol de procesos para TablaArbol.actualizar: (hijos, raíces, valores_de,
+    visibles). indice es un arbol.IndiceArbol ya actualizado con la foto.
+
+    valores_de(pid) -> (Nombre, (PID, CPU %, RAM %, CPU árbol %, Memoria árbol MB));
+    las filas se arman solo para los nodos a la vista. Con búsqueda se ven
+    los procesos que pasan el filtro y sus ancestros.
+    """
+    cpu_arbol, rss_arbol = indice.sumas(snapshot, ("cpu", "rss"))
+    cpus = snapshot.lista("cpu")
+    mem_pcts = snapshot.lista("mem_pct")
+
+    def valores_de(pid):
+        i = snapshot.indice_de(pid)
+        return snapshot.nombre(i), (
+            pid,
+            round(cpus[i], 1),
+            round(mem_pcts[i], 2),
+            round(float(cpu_arbol[i]), 1),
+            round(float(rss_arbol[i]) / MB, 1),
+        )
+
+    raices = indice.raices()
+    visibles = None
+    if query.strip():
+        pids = snapshot.lista("pid")
+        visibles = visibles_con_ancestros(indice, [pids[i] for i in filtrar(snapshot, modo, query)])
+        raices = [pid for pid in raices if pid in visibles]
+    return indice.hijos, raices, valores_de, visibles
+
+
+def _descendientes(pid, hijos):
+    # sin cgroup: el PID principal y todo lo que cuelga de él en la foto; un
+    # ppid viejo que apunta a un PID reutilizado puede cerrar un ciclo
+    pids = [pid]
+    vistos = {pid}
+    for p in pids:
+        for hijo in hijos.get(p, ()):
+            if hijo not in vistos:
+                vistos.add(hijo)
+                pids.append(hijo)
+    return pids
+
+
+def filas_servicios(snapshot, unidades, miembros, num_cpus=NUM_CPUS):
+    """
+    Nombre | Estado | PID | Procesos | CPU % | Memoria (MB) | Descripción,
+    con clave el nombre del servicio. unidades y miembros son los de
+    unidades.MonitorServicios.ultimo().
+
+    Los procesos de un servicio son los de su cgroup si se pudo leer; si
+    no, su PID principal y sus descendientes. CPU y memoria se suman sobre
+    la foto (CPU normalizado por num_cpus, como en Usuarios).
+    """
+    cpus = snapshot.lista("cpu")
+    rss = snapshot.lista("rss")
+    indice_de = snapshot.indice_de
+    hijos = None
+    if any(u.pid and u.nombre not in miembros for u in unidades):
+        hijos = {}
+        for pid, ppid in zip(snapshot.lista("pid"), snapshot.lista("ppid")):
+            if pid != ppid:
+                hijos.setdefault(ppid, []).append(pid)
+
+    filas = []
+    for u in unidades:
+        pids = miembros.get(u.nombre)
+        if pids is None and u.pid:
+            pids = _descendientes(u.pid, hijos)
+        procesos = 0
+        cpu = 0.0
+        memoria = 0
+        for pid in pids or ():
+            i = indice_de(pid)
+            if i is None:
+                continue  # terminó o todavía no está en la foto
+            procesos += 1
+            cpu += cpus[i]
+            memoria += rss[i]
+        filas.append((u.nombre, (
+            u.nombre,
+            u.estado,
+            u.pid or "",
+            procesos,
+            round(min(cpu / num_cpus, 100.0), 1),
+            round(memoria / MB, 1),
+            u.descripcion,
+        )))
+    return filas